@@ -0,0 +1,210 @@
+"""Modo asíncrono de la API de Paris Style.
+
+Expone las mismas rutas que backend_enhanced_v3_fixed, pero con endpoints
+`async def` y una sesión AsyncSession sobre aiosqlite, de modo que las
+esperas de la base de datos no ocupan hilos del threadpool. La lógica de
+cada ruta se ejecuta con AsyncSession.run_sync sobre las funciones del
+backend síncrono, así que el comportamiento es idéntico en ambos modos.
+Las rutas que escriben son `def` con la sesión síncrona del backend y se
+ejecutan en el threadpool, como en el modo síncrono: con aiosqlite, una
+transacción de escritura reparte sus sentencias entre las lecturas del bucle
+de eventos y retiene el lock de SQLite mucho más tiempo.
+
+Se selecciona con PARIS_STYLE_MODO_DB=async al ejecutar el backend, o
+directamente con: uvicorn backend_async:app
+"""
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+from typing import Optional
+
+import backend_enhanced_v3_fixed as backend
+from backend_enhanced_v3_fixed import (
+    AjusteStock, CitaCreate, CitaLoteCreate, CitaUpdate, CursoCreate, ProductoCreate, UsuarioActual, UsuarioCreate,
+    UsuarioLogin, VentaCreate, verify_token
+)
+from db_config import crear_engine_async
+
+async_engine = crear_engine_async(backend.DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False)
+
+app = FastAPI(
+    title=backend.app.title + " (async)",
+    version=backend.app.version,
+    description=backend.app.description
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Siguiente-Cursor", "ETag"],
+)
+
+# Dependencias
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_current_user(user_id: int = Depends(verify_token)) -> UsuarioActual:
+    user = backend.cache_usuarios.obtener(user_id)
+    if user is None:
+        async with AsyncSessionLocal() as db:
+            user = await db.run_sync(lambda s: backend.cargar_usuario_actual(s, user_id))
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return user
+
+async def get_usuario_opcional(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+) -> Optional[UsuarioActual]:
+    if credentials is None:
+        return None
+    return await get_current_user(verify_token(credentials))
+
+# Endpoints
+@app.post("/api/auth/register")
+def register_user(user: UsuarioCreate, db: Session = Depends(backend.get_db)):
+    return backend.register_user(user, db)
+
+@app.post("/api/auth/login")
+async def login_user(user: UsuarioLogin, db: AsyncSession = Depends(get_db)):
+    return await db.run_sync(lambda s: backend.login_user(user, s))
+
+@app.get("/api/servicios")
+async def get_servicios(request: Request, db: AsyncSession = Depends(get_db)):
+    return await db.run_sync(lambda s: backend.get_servicios(request, s))
+
+@app.get("/api/estilistas")
+async def get_estilistas(request: Request, db: AsyncSession = Depends(get_db)):
+    return await db.run_sync(lambda s: backend.get_estilistas(request, s))
+
+@app.post("/api/citas")
+def create_cita(cita: CitaCreate, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(backend.get_db)):
+    return backend.create_cita(cita, current_user, db)
+
+@app.post("/api/citas/batch")
+def create_citas_lote(lote: CitaLoteCreate, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(backend.get_db)):
+    return backend.create_citas_lote(lote, current_user, db)
+
+@app.get("/api/citas")
+async def get_citas(
+    response: Response,
+    desde: Optional[str] = None,
+    hasta: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limite: int = backend.LIMITE_CITAS_DEFECTO,
+    current_user: UsuarioActual = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await db.run_sync(
+        lambda s: backend.get_citas(response, desde, hasta, cursor, limite, current_user, s)
+    )
+
+@app.get("/api/citas/cambios")
+async def get_cambios_citas(
+    cursor: Optional[str] = None,
+    limite: int = backend.LIMITE_CAMBIOS_DEFECTO,
+    current_user: UsuarioActual = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await db.run_sync(lambda s: backend.get_cambios_citas(cursor, limite, current_user, s))
+
+@app.put("/api/citas/{cita_id}")
+def update_cita(cita_id: int, cita_update: CitaUpdate, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(backend.get_db)):
+    return backend.update_cita(cita_id, cita_update, current_user, db)
+
+@app.get("/api/admin/reportes")
+async def get_reportes(
+    desde: Optional[str] = None,
+    hasta: Optional[str] = None,
+    current_user: UsuarioActual = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await db.run_sync(lambda s: backend.get_reportes(desde, hasta, current_user, s))
+
+@app.get("/api/user/profile")
+async def get_user_profile(current_user: UsuarioActual = Depends(get_current_user)):
+    return backend.get_user_profile(current_user)
+
+@app.get("/api/estilistas/{estilista_id}/disponibilidad")
+async def get_disponibilidad_estilista(estilista_id: int, fecha: str, db: AsyncSession = Depends(get_db)):
+    return await db.run_sync(lambda s: backend.get_disponibilidad_estilista(estilista_id, fecha, s))
+
+@app.get("/api/estilistas/disponibilidad")
+async def get_disponibilidad_estilistas(
+    desde: str,
+    hasta: str,
+    servicio_id: Optional[int] = None,
+    duracion_minutos: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    return await db.run_sync(
+        lambda s: backend.get_disponibilidad_estilistas(desde, hasta, servicio_id, duracion_minutos, s)
+    )
+
+@app.get("/api/productos")
+async def get_productos(request: Request, db: AsyncSession = Depends(get_db)):
+    return await db.run_sync(lambda s: backend.get_productos(request, s))
+
+@app.get("/api/productos/stock")
+async def get_stock_productos(response: Response, db: AsyncSession = Depends(get_db)):
+    return await db.run_sync(lambda s: backend.get_stock_productos(response, s))
+
+@app.post("/api/productos")
+def create_producto(producto: ProductoCreate, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(backend.get_db)):
+    return backend.create_producto(producto, current_user, db)
+
+@app.post("/api/productos/{producto_id}/stock")
+def ajustar_stock(producto_id: int, ajuste: AjusteStock, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(backend.get_db)):
+    return backend.ajustar_stock(producto_id, ajuste, current_user, db)
+
+@app.post("/api/ventas")
+def create_venta(venta: VentaCreate, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(backend.get_db)):
+    return backend.create_venta(venta, current_user, db)
+
+@app.get("/api/cursos")
+async def get_cursos(desde: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    return await db.run_sync(lambda s: backend.get_cursos(desde, s))
+
+@app.post("/api/cursos")
+def create_curso(curso: CursoCreate, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(backend.get_db)):
+    return backend.create_curso(curso, current_user, db)
+
+@app.post("/api/cursos/{curso_id}/inscripciones")
+def inscribir_curso(curso_id: int, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(backend.get_db)):
+    return backend.inscribir_curso(curso_id, current_user, db)
+
+@app.delete("/api/cursos/{curso_id}/inscripciones")
+def cancelar_inscripcion_curso(curso_id: int, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(backend.get_db)):
+    return backend.cancelar_inscripcion_curso(curso_id, current_user, db)
+
+@app.get("/api/cursos/{curso_id}/inscripciones")
+async def get_inscripciones_curso(curso_id: int, current_user: UsuarioActual = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    return await db.run_sync(lambda s: backend.get_inscripciones_curso(curso_id, current_user, s))
+
+@app.get("/api/buscar")
+async def buscar(
+    q: str,
+    tipo: Optional[str] = None,
+    limite: int = backend.LIMITE_BUSQUEDA_DEFECTO,
+    current_user: Optional[UsuarioActual] = Depends(get_usuario_opcional),
+    db: AsyncSession = Depends(get_db)
+):
+    return await db.run_sync(lambda s: backend.buscar(q, tipo, limite, current_user, s))
+
+def _copiar_rutas_sincronas():
+    """Las rutas sin versión async (raíz, exportación, ...) se sirven con la implementación síncrona"""
+    propias = {(ruta.path, metodo) for ruta in app.router.routes for metodo in getattr(ruta, "methods", None) or []}
+    for ruta in backend.app.router.routes:
+        metodos = getattr(ruta, "methods", None) or []
+        if ruta.path.startswith(("/docs", "/redoc", "/openapi")):
+            continue
+        if not any((ruta.path, metodo) in propias for metodo in metodos):
+            app.router.routes.append(ruta)
+
+_copiar_rutas_sincronas()
@@ -1,22 +1,43 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, ForeignKey, and_, or_
+from sqlalchemy import event, insert, bindparam, CheckConstraint, Column, Integer, String, Date, DateTime, Boolean, Text, ForeignKey, Index, UniqueConstraint, and_, or_, func, text, tuple_
 from sqlalchemy.orm import declarative_base, sessionmaker, Session, relationship
 from pydantic import BaseModel
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import datetime, timedelta, date
+from collections import OrderedDict, namedtuple
+from itertools import chain
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio
+import bisect
 import hashlib
+import json
+import os
+import threading
+import time
+import logging
 import jwt
+import numpy as np
 import uvicorn
 
+from busqueda import expresion_fts, expresion_telefono
+from db_config import DATABASE_URL, aiosqlite_disponible, crear_engine
+from logging_config import configurar_logging
+from migraciones import migrar_engine
+
 # Configuración
-DATABASE_URL = "sqlite:///./paris_style.db"
+MODO_DB = os.getenv("PARIS_STYLE_MODO_DB", "sync")  # "sync" o "async" (ver backend_async.py)
 SECRET_KEY = "SECRET_KEY_PARIS_STYLE_2024"
 ALGORITHM = "HS256"
+# Antelación del recordatorio por email de una cita confirmada
+ANTELACION_RECORDATORIO = timedelta(hours=float(os.getenv("PARIS_STYLE_RECORDATORIO_HORAS", "24")))
+
+configurar_logging()
+logger = logging.getLogger("paris_style.api")
 
 # Base de datos
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine = crear_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 security = HTTPBearer()
@@ -68,17 +89,192 @@ class Cita(Base):
     estilista_id = Column(Integer, ForeignKey("estilistas.id"), nullable=True)
     servicio_id = Column(Integer, ForeignKey("servicios.id"), nullable=False)
     fecha_hora = Column(DateTime, nullable=False)
+    fecha_fin = Column(DateTime)
     estado = Column(String, default="pendiente")
     notas = Column(Text)
     precio_total = Column(Integer)
     fecha_creacion = Column(DateTime, default=datetime.now)
     fecha_actualizacion = Column(DateTime, default=datetime.now)
+    recordatorio_en = Column(DateTime)
     
     cliente = relationship("Usuario", back_populates="citas")
     estilista = relationship("Estilista", back_populates="citas")
     servicio = relationship("Servicio", back_populates="citas")
 
-# Crear tablas
+    __table_args__ = (
+        Index("idx_citas_estilista_rango", "estilista_id", "fecha_hora", "fecha_fin"),
+        Index("idx_citas_fecha", "fecha_hora"),
+        Index("idx_citas_estilista_fecha_estado", "estilista_id", "fecha_hora", "estado"),
+        Index("idx_citas_cliente_fecha", "cliente_id", "fecha_hora"),
+        Index("idx_citas_recordatorio", "recordatorio_en", sqlite_where=text("estado = 'confirmada'")),
+    )
+
+class CambioCita(Base):
+    """Registro de cambios de citas; el id es el cursor de GET /api/citas/cambios"""
+    __tablename__ = "citas_cambios"
+    __table_args__ = (
+        Index("idx_citas_cambios_estilista", "estilista_id", "id"),
+        Index("idx_citas_cambios_cliente", "cliente_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    cita_id = Column(Integer, ForeignKey("citas.id"), nullable=False)
+    cliente_id = Column(Integer, nullable=False)
+    estilista_id = Column(Integer)
+    tipo = Column(String, nullable=False)
+    fecha = Column(DateTime, nullable=False, default=datetime.now)
+
+class DuracionMaximaCita(Base):
+    """Fila única con la duración, en minutos, de la cita más larga guardada; la mantienen los triggers de migraciones v14"""
+    __tablename__ = "citas_duracion_maxima"
+
+    id = Column(Integer, primary_key=True)
+    minutos = Column(Integer, nullable=False, default=0)
+
+class Notificacion(Base):
+    """Historial de emails enviados: una fila por cita y tipo, escrita por el trabajador de notification_service.py"""
+    __tablename__ = "notificaciones"
+    __table_args__ = (
+        # También sirve al anti-join NOT EXISTS: como mucho una fila por búsqueda
+        Index("uq_notificaciones_cita_tipo", "cita_id", "tipo", unique=True),
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
+    cita_id = Column(Integer, ForeignKey("citas.id"))
+    tipo = Column(String(50), nullable=False)
+    mensaje = Column(Text, nullable=False)
+    enviado = Column(Boolean, default=False)
+    fecha_envio = Column(DateTime)
+    fecha_creacion = Column(DateTime, default=datetime.now)
+
+class NotificacionSalida(Base):
+    """Bandeja de salida de emails; la vacía el trabajador de notification_service.py"""
+    __tablename__ = "notificaciones_salida"
+    __table_args__ = (
+        UniqueConstraint("cita_id", "tipo", name="uq_notificaciones_salida_cita_tipo"),
+        Index("idx_notificaciones_salida_pendientes", "disponible_en", sqlite_where=text("estado = 'pendiente'")),
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    cita_id = Column(Integer, ForeignKey("citas.id"), nullable=False)
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
+    tipo = Column(String, nullable=False)
+    estado = Column(String, nullable=False, default="pendiente")
+    intentos = Column(Integer, nullable=False, default=0)
+    disponible_en = Column(DateTime, nullable=False, default=datetime.now)
+    reclamado_por = Column(String)
+    ultimo_error = Column(Text)
+    fecha_creacion = Column(DateTime, nullable=False, default=datetime.now)
+    fecha_envio = Column(DateTime)
+
+class ResumenDiarioEstilista(Base):
+    """Citas, ingresos y minutos por día, estilista y estado (ver resumenes.py); estilista_id 0 = sin asignar"""
+    __tablename__ = "resumen_diario_estilista"
+    __table_args__ = ({"sqlite_with_rowid": False},)
+
+    dia = Column(Date, primary_key=True)
+    estilista_id = Column(Integer, primary_key=True)
+    estado = Column(String(20), primary_key=True)
+    citas = Column(Integer, nullable=False, default=0)
+    ingresos = Column(Integer, nullable=False, default=0)
+    minutos = Column(Integer, nullable=False, default=0)
+
+class ResumenDiarioServicio(Base):
+    """Citas, ingresos y minutos por día, servicio y estado (ver resumenes.py)"""
+    __tablename__ = "resumen_diario_servicio"
+    __table_args__ = ({"sqlite_with_rowid": False},)
+
+    dia = Column(Date, primary_key=True)
+    servicio_id = Column(Integer, primary_key=True)
+    estado = Column(String(20), primary_key=True)
+    citas = Column(Integer, nullable=False, default=0)
+    ingresos = Column(Integer, nullable=False, default=0)
+    minutos = Column(Integer, nullable=False, default=0)
+
+class Producto(Base):
+    """Productos de la tienda; el stock solo cambia con UPDATE condicionales (ver create_venta)"""
+    __tablename__ = "productos"
+    __table_args__ = (
+        CheckConstraint("stock >= 0"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String(100), nullable=False)
+    descripcion = Column(Text)
+    precio = Column(Integer, nullable=False)
+    stock = Column(Integer, nullable=False, default=0)
+    categoria = Column(String(50))
+    imagen_url = Column(String(255))
+    activo = Column(Boolean, default=True)
+    fecha_creacion = Column(DateTime, default=datetime.now)
+
+class Venta(Base):
+    """Venta en caja registrada por un administrador o estilista"""
+    __tablename__ = "ventas"
+    __table_args__ = (
+        Index("idx_ventas_fecha", "fecha"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    vendedor_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
+    cliente_id = Column(Integer, ForeignKey("usuarios.id"))
+    total = Column(Integer, nullable=False)
+    fecha = Column(DateTime, nullable=False, default=datetime.now)
+
+class VentaLinea(Base):
+    __tablename__ = "ventas_lineas"
+    __table_args__ = (
+        Index("idx_ventas_lineas_venta", "venta_id"),
+        Index("idx_ventas_lineas_producto", "producto_id"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    venta_id = Column(Integer, ForeignKey("ventas.id"), nullable=False)
+    producto_id = Column(Integer, ForeignKey("productos.id"), nullable=False)
+    cantidad = Column(Integer, nullable=False)
+    precio_unitario = Column(Integer, nullable=False)
+
+class Curso(Base):
+    """Cursos de formación; inscritos solo cambia con UPDATE condicionales (ver inscribir_curso)"""
+    __tablename__ = "cursos"
+    __table_args__ = (
+        CheckConstraint("inscritos >= 0 AND inscritos <= cupo"),
+        Index("idx_cursos_fecha", "fecha"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String(100), nullable=False)
+    descripcion = Column(Text)
+    precio = Column(Integer, nullable=False)
+    fecha = Column(Date, nullable=False)
+    horario = Column(String(50))
+    cupo = Column(Integer, nullable=False)
+    inscritos = Column(Integer, nullable=False, default=0)
+    activo = Column(Boolean, default=True)
+    fecha_creacion = Column(DateTime, default=datetime.now)
+
+class InscripcionCurso(Base):
+    __tablename__ = "inscripciones_cursos"
+    __table_args__ = (
+        UniqueConstraint("curso_id", "usuario_id", name="uq_inscripciones_curso_usuario"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    curso_id = Column(Integer, ForeignKey("cursos.id"), nullable=False)
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
+    fecha_inscripcion = Column(DateTime, nullable=False, default=datetime.now)
+
+# Crear o actualizar tablas (ver migraciones.py)
+migrar_engine(engine)
 Base.metadata.create_all(bind=engine)
 
 # Modelos Pydantic
@@ -101,6 +297,36 @@ class CitaCreate(BaseModel):
 class CitaUpdate(BaseModel):
     estado: str
 
+class CitaLoteCreate(BaseModel):
+    citas: List[CitaCreate]
+
+class ProductoCreate(BaseModel):
+    nombre: str
+    descripcion: Optional[str] = None
+    precio: int
+    stock: int = 0
+    categoria: Optional[str] = None
+    imagen_url: Optional[str] = None
+
+class AjusteStock(BaseModel):
+    cantidad: int
+
+class LineaVenta(BaseModel):
+    producto_id: int
+    cantidad: int
+
+class VentaCreate(BaseModel):
+    lineas: List[LineaVenta]
+    cliente_id: Optional[int] = None
+
+class CursoCreate(BaseModel):
+    nombre: str
+    descripcion: Optional[str] = None
+    precio: int
+    fecha: str
+    horario: Optional[str] = None
+    cupo: int
+
 # FastAPI app
 app = FastAPI(
     title="Paris Style API Enhanced v3 Fixed", 
@@ -114,6 +340,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Siguiente-Cursor", "ETag"],
 )
 
 # Dependencias
@@ -136,26 +363,136 @@ def create_access_token(data: dict):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+class CacheLRU:
+    """Cache acotado LRU con TTL, compartido entre los hilos del servidor.
+
+    Cada entrada caduca a los ttl_segundos o en el instante `expira_en`
+    indicado al guardarla, lo que ocurra primero. Con ttl_segundos=0 el
+    cache queda desactivado.
+    """
+
+    def __init__(self, max_entradas: int, ttl_segundos: float):
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[object, Tuple[object, float]]" = OrderedDict()
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            if entrada[1] <= time.time():
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada[0]
+
+    def guardar(self, clave, valor, expira_en: Optional[float] = None):
+        if self.ttl_segundos <= 0 or self.max_entradas <= 0:
+            return
+        caducidad = time.time() + self.ttl_segundos
+        if expira_en is not None:
+            caducidad = min(caducidad, expira_en)
+        with self._lock:
+            self._entradas[clave] = (valor, caducidad)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, *claves):
+        with self._lock:
+            if not claves:
+                self._entradas.clear()
+            for clave in claves:
+                self._entradas.pop(clave, None)
+
+# Datos del usuario autenticado que usan los endpoints. Es inmutable para
+# poder compartir la misma instancia entre peticiones concurrentes.
+UsuarioActual = namedtuple(
+    "UsuarioActual", ["id", "nombre", "email", "telefono", "es_admin", "es_estilista", "estilista_id"]
+)
+
+def usuario_actual(usuario: Usuario) -> UsuarioActual:
+    return UsuarioActual(
+        id=usuario.id,
+        nombre=usuario.nombre,
+        email=usuario.email,
+        telefono=usuario.telefono,
+        es_admin=bool(usuario.es_admin),
+        es_estilista=bool(usuario.es_estilista),
+        estilista_id=usuario.estilista_id
+    )
+
+CACHE_AUTENTICACION_MAX = int(os.getenv("PARIS_STYLE_CACHE_USUARIOS_MAX", "10000"))
+CACHE_AUTENTICACION_TTL = float(os.getenv("PARIS_STYLE_CACHE_USUARIOS_TTL", "60"))
+cache_tokens = CacheLRU(CACHE_AUTENTICACION_MAX, CACHE_AUTENTICACION_TTL)    # token -> user_id
+cache_usuarios = CacheLRU(CACHE_AUTENTICACION_MAX, CACHE_AUTENTICACION_TTL)  # user_id -> UsuarioActual
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    token = credentials.credentials
+    user_id = cache_tokens.obtener(token)
+    if user_id is not None:
+        return user_id
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("user_id")
-        if user_id is None:
+        # Los tokens con alcance (p. ej. el de GET /api/citas/eventos) no sirven para el resto de la API
+        if user_id is None or "scope" in payload:
             raise HTTPException(status_code=401, detail="Token inválido")
+        # Un token en cache nunca sobrevive a su propio "exp"
+        cache_tokens.guardar(token, user_id, expira_en=payload.get("exp"))
         return user_id
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Token inválido")
 
-def get_current_user(user_id: int = Depends(verify_token), db: Session = Depends(get_db)):
-    user = db.query(Usuario).filter(Usuario.id == user_id).first()
+def cargar_usuario_actual(db: Session, user_id: int) -> Optional[UsuarioActual]:
+    usuario = db.query(Usuario).filter(Usuario.id == user_id).first()
+    if not usuario:
+        return None
+    snapshot = usuario_actual(usuario)
+    cache_usuarios.guardar(user_id, snapshot)
+    return snapshot
+
+def get_current_user(user_id: int = Depends(verify_token)) -> UsuarioActual:
+    """Usuario autenticado; solo abre una sesión si no está en cache"""
+    user = cache_usuarios.obtener(user_id)
+    if user is None:
+        with SessionLocal() as db:
+            user = cargar_usuario_actual(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return user
 
+def get_usuario_opcional(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+) -> Optional[UsuarioActual]:
+    """Usuario autenticado, o None en las rutas que también atienden sin token"""
+    if credentials is None:
+        return None
+    return get_current_user(verify_token(credentials))
+
+@event.listens_for(Session, "after_flush")
+def _registrar_cambios_usuarios(session, flush_context):
+    modificados = session.info.setdefault("usuarios_modificados", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Usuario) and obj.id is not None:
+            modificados.add(obj.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_usuarios_tras_commit(session):
+    modificados = session.info.pop("usuarios_modificados", None)
+    if modificados:
+        cache_usuarios.invalidar(*modificados)
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_cambios_usuarios(session):
+    session.info.pop("usuarios_modificados", None)
+
 def parse_datetime_safe(datetime_str: str) -> datetime:
     """Convierte string de fecha a datetime de forma segura usando solo stdlib"""
     try:
-        print(f"Parsing datetime string: {datetime_str}")
+        logger.debug("Parseando fecha %s", datetime_str)
         
         # Limpiar el string de timezone info
         clean_str = datetime_str.replace('Z', '').replace('+00:00', '')
@@ -172,7 +509,7 @@ def parse_datetime_safe(datetime_str: str) -> datetime:
         for fmt in formats:
             try:
                 result = datetime.strptime(clean_str, fmt)
-                print(f"Successfully parsed with format {fmt}: {result}")
+                logger.debug("Fecha %s parseada con el formato %s", datetime_str, fmt)
                 return result
             except ValueError:
                 continue
@@ -180,7 +517,7 @@ def parse_datetime_safe(datetime_str: str) -> datetime:
         # Si ningún formato funciona, intentar fromisoformat
         try:
             result = datetime.fromisoformat(clean_str)
-            print(f"Successfully parsed with fromisoformat: {result}")
+            logger.debug("Fecha %s parseada con fromisoformat", datetime_str)
             return result
         except ValueError:
             pass
@@ -188,31 +525,408 @@ def parse_datetime_safe(datetime_str: str) -> datetime:
         raise ValueError(f"No se pudo parsear el formato de fecha: {datetime_str}")
         
     except Exception as e:
-        print(f"Error parsing datetime: {datetime_str}, error: {e}")
+        logger.info("Fecha inválida %r: %s", datetime_str, e)
         raise ValueError(f"Formato de fecha inválido: {datetime_str}")
 
-def asignar_estilista_automatico(servicio_id: int, fecha_hora: datetime, db: Session) -> Optional[int]:
+def duracion_maxima_citas(db: Session) -> int:
+    """Duración de la cita más larga guardada, usada como cota inferior del rango de búsqueda
+
+    Sale de las citas y no del catálogo: acortar un servicio no cambia las
+    citas que ya se reservaron con la duración anterior.
+    """
+    return db.query(DuracionMaximaCita.minutos).filter(DuracionMaximaCita.id == 1).scalar() or 0
+
+def buscar_conflicto(db: Session, estilista_id: int, inicio: datetime, fin: datetime) -> Optional[int]:
+    """Devuelve el id de una cita activa del estilista que se solape con [inicio, fin)
+
+    Una cita solapada debe empezar antes de `fin` y no antes de
+    `inicio - duración máxima`, así que la consulta es un único rango sobre
+    idx_citas_estilista_rango (estilista_id, fecha_hora, fecha_fin).
+    """
+    limite = inicio - timedelta(minutes=duracion_maxima_citas(db))
+    return db.query(Cita.id).filter(
+        and_(
+            Cita.estilista_id == estilista_id,
+            Cita.fecha_hora > limite,
+            Cita.fecha_hora < fin,
+            Cita.fecha_fin > inicio,
+            Cita.estado.in_(["pendiente", "confirmada"])
+        )
+    ).limit(1).scalar()
+
+def buscar_estilista_libre(db: Session, inicio: datetime, fin: datetime, excluir: List[int] = ()) -> Optional[int]:
+    """Primer estilista activo sin citas activas que se solapen con [inicio, fin), según la base de datos"""
+    limite = inicio - timedelta(minutes=duracion_maxima_citas(db))
+    ocupados = db.query(Cita.id).filter(
+        and_(
+            Cita.estilista_id == Estilista.id,
+            Cita.fecha_hora > limite,
+            Cita.fecha_hora < fin,
+            Cita.fecha_fin > inicio,
+            Cita.estado.in_(["pendiente", "confirmada"])
+        )
+    ).exists()
+    return db.query(Estilista.id).filter(
+        Estilista.activo == True, Estilista.id.notin_(list(excluir)), ~ocupados
+    ).order_by(Estilista.id).limit(1).scalar()
+
+class IndiceDisponibilidad:
+    """Índice en memoria de la ocupación de cada estilista por día.
+
+    Se construye una sola vez a partir de la base de datos y se actualiza al
+    crear o cambiar de estado las citas. Cada agenda diaria es una lista de
+    intervalos (inicio, fin, cita_id) ordenada por inicio, de modo que saber
+    si un estilista está libre cuesta una búsqueda binaria en memoria.
+    Los intervalos son los (fecha_hora, fecha_fin) guardados, y las agendas
+    de días pasados se descartan al cambiar de día. El índice es local al proceso.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lock_carga = threading.Lock()
+        self._cargado = False
+        self._version = 0
+        self._hoy = date.today()
+        self._estilistas: List[int] = []
+        self._agenda: Dict[Tuple[int, date], List[Tuple[datetime, datetime, int]]] = {}
+        self._por_cita: Dict[int, Tuple[int, date]] = {}
+        self._duracion_maxima = timedelta(0)
+
+    def asegurar_cargado(self, db: Session):
+        # Varios workers del threadpool pueden llegar a la vez: carga uno solo
+        if not self._cargado:
+            with self._lock_carga:
+                if not self._cargado:
+                    self.cargar(db)
+
+    def cargar(self, db: Session):
+        """Reconstruye el índice con las citas activas desde hoy"""
+        with self._lock:
+            version = self._version
+        hoy = datetime.combine(date.today(), datetime.min.time())
+        estilistas = db.query(Estilista.id).filter(Estilista.activo == True).order_by(Estilista.id).all()
+        citas = db.query(Cita.id, Cita.estilista_id, Cita.fecha_hora, Cita.fecha_fin).filter(
+            and_(
+                Cita.estilista_id.isnot(None),
+                Cita.fecha_hora >= hoy,
+                Cita.estado.in_(["pendiente", "confirmada"])
+            )
+        ).all()
+
+        with self._lock:
+            self._estilistas = [e.id for e in estilistas]
+            self._agenda = {}
+            self._por_cita = {}
+            self._duracion_maxima = timedelta(0)
+            self._hoy = hoy.date()
+            for cita in citas:
+                self._agregar(cita.id, cita.estilista_id, cita.fecha_hora, cita.fecha_fin)
+            # Una invalidación durante la consulta deja el índice sin cargar
+            self._cargado = version == self._version
+
+    def invalidar(self):
+        with self._lock:
+            self._cargado = False
+            self._version += 1
+
+    def agregar(self, cita_id: int, estilista_id: int, inicio: datetime, fin: Optional[datetime]):
+        with self._lock:
+            if self._cargado:
+                self._agregar(cita_id, estilista_id, inicio, fin)
+
+    def quitar(self, cita_id: int):
+        with self._lock:
+            clave = self._por_cita.pop(cita_id, None)
+            if clave is None:
+                return
+            agenda = self._agenda[clave]
+            agenda[:] = [intervalo for intervalo in agenda if intervalo[2] != cita_id]
+            if not agenda:
+                del self._agenda[clave]
+
+    def estilistas_libres(self, inicio: datetime, fin: datetime) -> List[int]:
+        """Estilistas activos sin citas que se solapen con [inicio, fin)"""
+        with self._lock:
+            self._descartar_pasados()
+            return [e for e in self._estilistas if not self._choca(e, inicio, fin)]
+
+    def esta_libre(self, estilista_id: int, inicio: datetime, fin: datetime) -> bool:
+        with self._lock:
+            self._descartar_pasados()
+            return not self._choca(estilista_id, inicio, fin)
+
+    def _agregar(self, cita_id: int, estilista_id: int, inicio: datetime, fin: Optional[datetime]):
+        fin = fin or inicio
+        clave = (estilista_id, inicio.date())
+        bisect.insort(self._agenda.setdefault(clave, []), (inicio, fin, cita_id))
+        self._por_cita[cita_id] = clave
+        if fin - inicio > self._duracion_maxima:
+            self._duracion_maxima = fin - inicio
+
+    def _descartar_pasados(self):
+        # Como en cargar, solo se guardan las agendas desde hoy
+        hoy = date.today()
+        if hoy == self._hoy:
+            return
+        self._hoy = hoy
+        for clave in [clave for clave in self._agenda if clave[1] < hoy]:
+            for intervalo in self._agenda.pop(clave):
+                self._por_cita.pop(intervalo[2], None)
+
+    def _choca(self, estilista_id: int, inicio: datetime, fin: datetime) -> bool:
+        # Solo pueden solaparse las citas que empiezan antes de `fin` y no
+        # antes de `inicio - duracion_maxima`; si ese rango cruza la
+        # medianoche se miran las agendas de todos los días que toca
+        limite = inicio - self._duracion_maxima
+        dia = limite.date()
+        while dia <= max(fin - timedelta(microseconds=1), inicio).date():
+            agenda = self._agenda.get((estilista_id, dia))
+            dia += timedelta(days=1)
+            if not agenda:
+                continue
+            i = bisect.bisect_left(agenda, (fin,)) - 1
+            while i >= 0 and agenda[i][0] >= limite:
+                if agenda[i][1] > inicio or agenda[i][0] == inicio:
+                    return True
+                i -= 1
+        return False
+
+indice_disponibilidad = IndiceDisponibilidad()
+
+def asignar_estilista_automatico(servicio_id: int, fecha_hora: datetime, db: Session, duracion_minutos: Optional[int] = None) -> Optional[int]:
     """Asigna automáticamente un estilista disponible para el servicio"""
     try:
-        estilistas = db.query(Estilista).filter(Estilista.activo == True).all()
-        
-        for estilista in estilistas:
-            conflicto = db.query(Cita).filter(
-                and_(
-                    Cita.estilista_id == estilista.id,
-                    Cita.fecha_hora == fecha_hora,
-                    Cita.estado.in_(["pendiente", "confirmada"])
-                )
-            ).first()
-            
-            if not conflicto:
-                return estilista.id
-        
-        return None
+        if duracion_minutos is None:
+            servicio = db.query(Servicio).filter(Servicio.id == servicio_id).first()
+            duracion_minutos = servicio.duracion_minutos if servicio else 0
+
+        fin = fecha_hora + timedelta(minutes=duracion_minutos)
+        indice_disponibilidad.asegurar_cargado(db)
+        # El índice es local al proceso; se confirma el candidato contra la base de datos
+        candidatos = indice_disponibilidad.estilistas_libres(fecha_hora, fin)
+        for estilista_id in candidatos:
+            if not buscar_conflicto(db, estilista_id, fecha_hora, fin):
+                return estilista_id
+        # Otro proceso (u otro worker, scripts, SQL directo) pudo liberar
+        # huecos que el índice aún da por ocupados: la base de datos decide
+        estilista_id = buscar_estilista_libre(db, fecha_hora, fin, excluir=candidatos)
+        if estilista_id is not None:
+            logger.info("Índice de disponibilidad desactualizado, se recargará", extra={"campos": {
+                "estilista_id": estilista_id, "fecha_hora": fecha_hora.isoformat()
+            }})
+            indice_disponibilidad.invalidar()
+        return estilista_id
     except Exception as e:
-        print(f"Error asignando estilista: {e}")
+        logger.exception("Error asignando estilista")
         return None
 
+class CacheCatalogo:
+    """Cache en proceso de los catálogos (servicios, estilistas, productos) ya serializados.
+
+    Cada entrada guarda el cuerpo JSON y su ETag fuerte. Se invalida
+    explícitamente cuando una sesión confirma cambios en Servicio,
+    Estilista o Producto; el TTL solo cubre cambios hechos fuera de este
+    proceso (scripts de instalación, otros workers).
+    """
+
+    def __init__(self, ttl_segundos: float):
+        self.ttl_segundos = ttl_segundos
+        self._lock = threading.Lock()
+        self._entradas: Dict[str, Tuple[bytes, str, float]] = {}
+        self._generacion = 0
+
+    def obtener(self, clave: str, cargar: Callable[[], list]) -> Tuple[bytes, str]:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            generacion = self._generacion
+        if entrada and time.monotonic() - entrada[2] < self.ttl_segundos:
+            return entrada[0], entrada[1]
+
+        cuerpo = json.dumps(cargar(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        etag = '"' + hashlib.sha256(cuerpo).hexdigest()[:32] + '"'
+        with self._lock:
+            # Si se invalidó mientras se cargaba, el cuerpo puede ser anterior
+            # al cambio: se devuelve pero no se guarda
+            if generacion == self._generacion:
+                self._entradas[clave] = (cuerpo, etag, time.monotonic())
+        return cuerpo, etag
+
+    def invalidar(self, *claves: str):
+        with self._lock:
+            self._generacion += 1
+            for clave in claves or list(self._entradas):
+                self._entradas.pop(clave, None)
+
+cache_catalogo = CacheCatalogo(ttl_segundos=float(os.getenv("PARIS_STYLE_CACHE_CATALOGO_TTL", "300")))
+CACHE_CONTROL_CATALOGO = "public, max-age=60, must-revalidate"
+
+@event.listens_for(Session, "after_flush")
+def _registrar_cambios_catalogo(session, flush_context):
+    modificados = session.info.setdefault("catalogo_modificado", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Servicio):
+            modificados.add("servicios")
+        elif isinstance(obj, Estilista):
+            modificados.add("estilistas")
+        elif isinstance(obj, Producto):
+            modificados.add("productos")
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_catalogo_tras_commit(session):
+    modificados = session.info.pop("catalogo_modificado", None)
+    if modificados:
+        invalidar_catalogo(*modificados)
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_cambios_catalogo(session):
+    session.info.pop("catalogo_modificado", None)
+
+def invalidar_catalogo(*claves: str):
+    """Invalida el cache HTTP del catálogo y los datos derivados en memoria"""
+    cache_catalogo.invalidar(*claves)
+    if not claves or "estilistas" in claves:
+        indice_disponibilidad.invalidar()
+
+def respuesta_catalogo(request: Request, cuerpo: bytes, etag: str) -> Response:
+    cabeceras = {"ETag": etag, "Cache-Control": CACHE_CONTROL_CATALOGO}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etiquetas = [e.strip().removeprefix("W/") for e in if_none_match.split(",")]
+        if etag in etiquetas or "*" in etiquetas:
+            return Response(status_code=304, headers=cabeceras)
+    return Response(content=cuerpo, media_type="application/json", headers=cabeceras)
+
+def columnas_a_dict(obj) -> dict:
+    return {columna.name: getattr(obj, columna.name) for columna in obj.__table__.columns}
+
+class BusEventosCitas:
+    """Difunde los cambios de estado de las citas a las conexiones SSE abiertas.
+
+    Cada suscriptor es una cola asyncio atada al event loop de su conexión;
+    los endpoints síncronos publican desde el threadpool con
+    call_soon_threadsafe, así que una conexión inactiva no ocupa ningún hilo,
+    solo una cola vacía. Un suscriptor que no consume a tiempo se desconecta
+    en lugar de acumular memoria sin límite. El bus es local al proceso.
+    """
+
+    def __init__(self, max_pendientes: int = 100):
+        self.max_pendientes = max_pendientes
+        self._lock = threading.Lock()
+        self._suscriptores: Dict[int, Tuple[asyncio.AbstractEventLoop, asyncio.Queue, Callable[[dict], bool]]] = {}
+        self._siguiente = 0
+        self._secuencia = 0
+
+    def suscribir(self, filtro: Callable[[dict], bool]) -> Tuple[int, asyncio.Queue]:
+        cola = asyncio.Queue(maxsize=self.max_pendientes)
+        with self._lock:
+            self._siguiente += 1
+            self._suscriptores[self._siguiente] = (asyncio.get_running_loop(), cola, filtro)
+            return self._siguiente, cola
+
+    def cancelar(self, suscripcion: int):
+        with self._lock:
+            self._suscriptores.pop(suscripcion, None)
+
+    @property
+    def conexiones(self) -> int:
+        return len(self._suscriptores)
+
+    def publicar(self, evento: dict):
+        with self._lock:
+            self._secuencia += 1
+            evento = {**evento, "secuencia": self._secuencia}
+            destinos = [(s, loop, cola) for s, (loop, cola, filtro) in self._suscriptores.items() if filtro(evento)]
+        for suscripcion, loop, cola in destinos:
+            try:
+                loop.call_soon_threadsafe(self._entregar, suscripcion, cola, evento)
+            except RuntimeError:
+                # El loop de esa conexión ya se cerró
+                self.cancelar(suscripcion)
+
+    def _entregar(self, suscripcion: int, cola: asyncio.Queue, evento: dict):
+        try:
+            cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Se descarta lo pendiente y se cierra el stream; el cliente reconecta
+            self.cancelar(suscripcion)
+            while not cola.empty():
+                cola.get_nowait()
+            cola.put_nowait(None)
+
+bus_citas = BusEventosCitas(max_pendientes=int(os.getenv("PARIS_STYLE_SSE_MAX_PENDIENTES", "100")))
+SSE_LATIDO_SEGUNDOS = float(os.getenv("PARIS_STYLE_SSE_LATIDO", "15"))
+SSE_TOKEN_SEGUNDOS = int(os.getenv("PARIS_STYLE_SSE_TOKEN_SEGUNDOS", "60"))
+ALCANCE_EVENTOS = "eventos"
+
+def evento_cita(tipo: str, cita_id: int, cliente_id: int, estilista_id: Optional[int], fecha_hora: datetime, estado: str) -> dict:
+    return {
+        "tipo": tipo,
+        "cita_id": cita_id,
+        "cliente_id": cliente_id,
+        "estilista_id": estilista_id,
+        "fecha_hora": fecha_hora.isoformat(),
+        "estado": estado,
+    }
+
+def filtro_eventos(usuario: UsuarioActual) -> Callable[[dict], bool]:
+    """Mismas reglas de visibilidad que GET /api/citas"""
+    if usuario.es_admin:
+        return lambda evento: True
+    if usuario.es_estilista:
+        return lambda evento: evento["estilista_id"] == usuario.estilista_id
+    return lambda evento: evento["cliente_id"] == usuario.id
+
+def cambio_cita(tipo: str, cita_id: int, cliente_id: int, estilista_id: Optional[int]) -> CambioCita:
+    """Fila del registro de cambios; se añade a la misma transacción que modifica la cita"""
+    return CambioCita(cita_id=cita_id, cliente_id=cliente_id, estilista_id=estilista_id, tipo=tipo, fecha=datetime.now())
+
+# Email que recibe el cliente por cada cambio de estado
+NOTIFICACION_POR_ESTADO = {
+    "pendiente": "confirmacion",
+    "confirmada": "cita_confirmada",
+    "cancelada": "cancelacion",
+}
+
+def notificacion_salida(tipo: str, cita_id: int, usuario_id: int) -> NotificacionSalida:
+    """Email en la bandeja de salida, en la misma transacción que la cita: se envía si y solo si se confirma"""
+    ahora = datetime.now()
+    return NotificacionSalida(
+        cita_id=cita_id, usuario_id=usuario_id, tipo=tipo, estado="pendiente",
+        intentos=0, disponible_en=ahora, fecha_creacion=ahora
+    )
+
+# Resúmenes diarios: una fila por movimiento (+1 al entrar en un estado, -1 al salir)
+ACUMULAR_RESUMENES = [
+    text(f"""
+        INSERT INTO {tabla} (dia, {columna}, estado, citas, ingresos, minutos)
+        VALUES (:dia, :{columna}, :estado, :citas, :ingresos, :minutos)
+        ON CONFLICT (dia, {columna}, estado) DO UPDATE SET
+            citas = citas + excluded.citas,
+            ingresos = ingresos + excluded.ingresos,
+            minutos = minutos + excluded.minutos
+    """).bindparams(bindparam("dia", type_=Date))
+    for tabla, columna in (("resumen_diario_estilista", "estilista_id"), ("resumen_diario_servicio", "servicio_id"))
+]
+
+def minutos_cita(fecha_hora: datetime, fecha_fin: Optional[datetime], duracion_minutos: Optional[int] = None) -> int:
+    """Mismo cálculo que resumenes.MINUTOS_CITA"""
+    if fecha_fin is not None:
+        return round((fecha_fin - fecha_hora).total_seconds() / 60)
+    return duracion_minutos or 0
+
+def movimiento_resumen(fecha_hora: datetime, estilista_id: Optional[int], servicio_id: int, estado: str,
+                       precio_total: Optional[int], minutos: int, signo: int) -> dict:
+    return {
+        "dia": fecha_hora.date(), "estilista_id": estilista_id or 0, "servicio_id": servicio_id, "estado": estado,
+        "citas": signo, "ingresos": signo * (precio_total or 0), "minutos": signo * minutos,
+    }
+
+def acumular_resumenes(db: Session, movimientos: List[dict]):
+    """Aplica los movimientos en la transacción de la cita; los resúmenes nunca ven un cambio a medias"""
+    if movimientos:
+        for consulta in ACUMULAR_RESUMENES:
+            db.execute(consulta, movimientos)
+
 # Endpoints
 @app.get("/")
 def read_root():
@@ -248,7 +962,7 @@ def register_user(user: UsuarioCreate, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         db.rollback()
-        print(f"Error en registro: {e}")
+        logger.exception("Error en registro")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 @app.post("/api/auth/login")
@@ -265,6 +979,7 @@ def login_user(user: UsuarioLogin, db: Session = Depends(get_db)):
             "es_admin": db_user.es_admin,
             "es_estilista": db_user.es_estilista
         })
+        cache_usuarios.guardar(db_user.id, usuario_actual(db_user))
         
         return {
             "access_token": access_token,
@@ -282,32 +997,43 @@ def login_user(user: UsuarioLogin, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error en login: {e}")
+        logger.exception("Error en login")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
+def cargar_servicios_activos(db: Session) -> List[dict]:
+    return [
+        columnas_a_dict(servicio)
+        for servicio in db.query(Servicio).filter(Servicio.activo == True).order_by(Servicio.id).all()
+    ]
+
 @app.get("/api/servicios")
-def get_servicios(db: Session = Depends(get_db)):
+def get_servicios(request: Request, db: Session = Depends(get_db)):
     try:
-        servicios = db.query(Servicio).filter(Servicio.activo == True).all()
-        return servicios
+        cuerpo, etag = cache_catalogo.obtener("servicios", lambda: cargar_servicios_activos(db))
+        return respuesta_catalogo(request, cuerpo, etag)
     except Exception as e:
-        print(f"Error obteniendo servicios: {e}")
+        logger.exception("Error obteniendo servicios")
         raise HTTPException(status_code=500, detail="Error obteniendo servicios")
 
+def cargar_estilistas_activos(db: Session) -> List[dict]:
+    return [
+        columnas_a_dict(estilista)
+        for estilista in db.query(Estilista).filter(Estilista.activo == True).order_by(Estilista.id).all()
+    ]
+
 @app.get("/api/estilistas")
-def get_estilistas(db: Session = Depends(get_db)):
+def get_estilistas(request: Request, db: Session = Depends(get_db)):
     try:
-        estilistas = db.query(Estilista).filter(Estilista.activo == True).all()
-        return estilistas
+        cuerpo, etag = cache_catalogo.obtener("estilistas", lambda: cargar_estilistas_activos(db))
+        return respuesta_catalogo(request, cuerpo, etag)
     except Exception as e:
-        print(f"Error obteniendo estilistas: {e}")
+        logger.exception("Error obteniendo estilistas")
         raise HTTPException(status_code=500, detail="Error obteniendo estilistas")
 
 @app.post("/api/citas")
-def create_cita(cita: CitaCreate, current_user: Usuario = Depends(get_current_user), db: Session = Depends(get_db)):
+def create_cita(cita: CitaCreate, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
-        print(f"Creando cita para usuario: {current_user.nombre}")
-        print(f"Datos recibidos: {cita}")
+        logger.debug("Creando cita para el usuario %s: %s", current_user.id, cita)
         
         # Verificar servicio
         servicio = db.query(Servicio).filter(Servicio.id == cita.servicio_id).first()
@@ -317,18 +1043,16 @@ def create_cita(cita: CitaCreate, current_user: Usuario = Depends(get_current_us
         # Convertir fecha de forma segura
         try:
             fecha_hora = parse_datetime_safe(cita.fecha_hora)
-            print(f"Fecha convertida exitosamente: {fecha_hora}")
         except ValueError as e:
-            print(f"Error en conversión de fecha: {e}")
             raise HTTPException(status_code=400, detail=str(e))
         
         # Verificar que no sea en el pasado
         ahora = datetime.now()
-        print(f"Comparando: {fecha_hora} > {ahora}")
         if fecha_hora <= ahora:
             raise HTTPException(status_code=400, detail="No puedes agendar citas en el pasado")
         
         estilista_id = cita.estilista_id
+        fecha_fin = fecha_hora + timedelta(minutes=servicio.duracion_minutos)
         
         # Si se especificó estilista, verificar disponibilidad
         if estilista_id and estilista_id > 0:
@@ -336,14 +1060,8 @@ def create_cita(cita: CitaCreate, current_user: Usuario = Depends(get_current_us
             if not estilista:
                 raise HTTPException(status_code=404, detail="Estilista no encontrado")
             
-            # Verificar conflictos
-            conflicto = db.query(Cita).filter(
-                and_(
-                    Cita.estilista_id == estilista_id,
-                    Cita.fecha_hora == fecha_hora,
-                    Cita.estado.in_(["pendiente", "confirmada"])
-                )
-            ).first()
+            # Verificar conflictos considerando la duración del servicio
+            conflicto = buscar_conflicto(db, estilista_id, fecha_hora, fecha_fin)
             
             if conflicto:
                 raise HTTPException(
@@ -352,7 +1070,7 @@ def create_cita(cita: CitaCreate, current_user: Usuario = Depends(get_current_us
                 )
         else:
             # Asignar estilista automáticamente
-            estilista_id = asignar_estilista_automatico(cita.servicio_id, fecha_hora, db)
+            estilista_id = asignar_estilista_automatico(cita.servicio_id, fecha_hora, db, servicio.duracion_minutos)
             if not estilista_id:
                 raise HTTPException(
                     status_code=400, 
@@ -365,19 +1083,31 @@ def create_cita(cita: CitaCreate, current_user: Usuario = Depends(get_current_us
             estilista_id=estilista_id,
             servicio_id=cita.servicio_id,
             fecha_hora=fecha_hora,
+            fecha_fin=fecha_fin,
             notas=cita.notas,
             precio_total=servicio.precio,
             estado="pendiente"
         )
         
         db.add(db_cita)
+        db.flush()
+        db.add(cambio_cita("creada", db_cita.id, current_user.id, estilista_id))
+        db.add(notificacion_salida(NOTIFICACION_POR_ESTADO["pendiente"], db_cita.id, current_user.id))
+        acumular_resumenes(db, [movimiento_resumen(
+            fecha_hora, estilista_id, servicio.id, "pendiente", servicio.precio, servicio.duracion_minutos, 1
+        )])
         db.commit()
         db.refresh(db_cita)
+        indice_disponibilidad.agregar(db_cita.id, estilista_id, fecha_hora, db_cita.fecha_fin)
+        bus_citas.publicar(evento_cita("creada", db_cita.id, current_user.id, estilista_id, fecha_hora, "pendiente"))
         
         # Obtener nombre del estilista asignado
         estilista_asignado = db.query(Estilista).filter(Estilista.id == estilista_id).first()
         
-        print(f"Cita creada exitosamente: ID {db_cita.id}")
+        logger.info("Cita creada", extra={"campos": {
+            "cita_id": db_cita.id, "cliente_id": current_user.id, "estilista_id": estilista_id,
+            "fecha_hora": fecha_hora.isoformat()
+        }})
         
         return {
             "message": "Cita creada exitosamente",
@@ -393,67 +1123,435 @@ def create_cita(cita: CitaCreate, current_user: Usuario = Depends(get_current_us
         raise
     except Exception as e:
         db.rollback()
-        print(f"Error creando cita: {e}")
+        logger.exception("Error creando cita")
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
+
+MAX_CITAS_LOTE = 50
+
+def ventanas_ocupacion(intervalos: List[Tuple[datetime, datetime]], margen: timedelta) -> List[Tuple[datetime, datetime]]:
+    """Une los rangos [inicio - margen, fin) que se solapan para consultarlos de una vez"""
+    ventanas = []
+    for inicio, fin in sorted(intervalos):
+        inicio -= margen
+        if ventanas and inicio <= ventanas[-1][1]:
+            ventanas[-1] = (ventanas[-1][0], max(ventanas[-1][1], fin))
+        else:
+            ventanas.append((inicio, fin))
+    return ventanas
+
+def solapa(ocupados: List[Tuple[datetime, datetime]], inicio: datetime, fin: datetime) -> bool:
+    return any(o_inicio < fin and (o_fin > inicio or o_inicio == inicio) for o_inicio, o_fin in ocupados)
+
+@app.post("/api/citas/batch")
+def create_citas_lote(lote: CitaLoteCreate, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Crear varias citas (grupos, eventos) con una sola transacción.
+
+    Los servicios, estilistas y citas existentes se leen con una consulta
+    cada uno; la asignación se hace en memoria teniendo en cuenta también
+    las citas del propio lote. Cada elemento se responde por separado: los
+    que no se pueden reservar no impiden crear el resto.
+    """
+    if not lote.citas:
+        raise HTTPException(status_code=400, detail="El lote no contiene citas")
+    if len(lote.citas) > MAX_CITAS_LOTE:
+        raise HTTPException(status_code=400, detail=f"Un lote admite como máximo {MAX_CITAS_LOTE} citas")
+
+    try:
+        resultados: List[Optional[dict]] = [None] * len(lote.citas)
+
+        def rechazar(indice: int, status_code: int, detail: str):
+            resultados[indice] = {"indice": indice, "status_code": status_code, "error": detail}
+
+        servicios = {
+            servicio.id: servicio
+            for servicio in db.query(Servicio).filter(Servicio.id.in_({c.servicio_id for c in lote.citas})).all()
+        }
+        estilistas = db.query(Estilista.id, Estilista.nombre, Estilista.activo).order_by(Estilista.id).all()
+        nombres_estilistas = {e.id: e.nombre for e in estilistas}
+        activos = [e.id for e in estilistas if e.activo]
+
+        # Validación de cada elemento, sin tocar la base de datos
+        ahora = datetime.now()
+        pendientes = []
+        for indice, cita in enumerate(lote.citas):
+            servicio = servicios.get(cita.servicio_id)
+            if not servicio:
+                rechazar(indice, 404, "Servicio no encontrado")
+                continue
+            try:
+                fecha_hora = parse_datetime_safe(cita.fecha_hora)
+            except ValueError as e:
+                rechazar(indice, 400, str(e))
+                continue
+            if fecha_hora <= ahora:
+                rechazar(indice, 400, "No puedes agendar citas en el pasado")
+                continue
+            if cita.estilista_id and cita.estilista_id > 0 and cita.estilista_id not in nombres_estilistas:
+                rechazar(indice, 404, "Estilista no encontrado")
+                continue
+            pendientes.append((indice, cita, servicio, fecha_hora, fecha_hora + timedelta(minutes=servicio.duracion_minutos)))
+
+        # Citas activas que pueden solaparse con algún elemento del lote
+        ocupados: Dict[int, List[Tuple[datetime, datetime]]] = {}
+        if pendientes:
+            margen = timedelta(minutes=duracion_maxima_citas(db))
+            ventanas = ventanas_ocupacion([(p[3], p[4]) for p in pendientes], margen)
+            existentes = db.query(Cita.estilista_id, Cita.fecha_hora, Cita.fecha_fin).filter(
+                and_(
+                    or_(*[and_(Cita.fecha_hora > desde, Cita.fecha_hora < hasta) for desde, hasta in ventanas]),
+                    Cita.estilista_id.isnot(None),
+                    Cita.estado.in_(["pendiente", "confirmada"])
+                )
+            ).all()
+            for existente in existentes:
+                ocupados.setdefault(existente.estilista_id, []).append(
+                    (existente.fecha_hora, existente.fecha_fin or existente.fecha_hora)
+                )
+
+        # Asignación en el orden del lote
+        nuevas = []
+        for indice, cita, servicio, fecha_hora, fecha_fin in pendientes:
+            if cita.estilista_id and cita.estilista_id > 0:
+                estilista_id = cita.estilista_id
+                if solapa(ocupados.get(estilista_id, []), fecha_hora, fecha_fin):
+                    rechazar(indice, 400, f"El estilista {nombres_estilistas[estilista_id]} ya tiene una cita en ese horario")
+                    continue
+            else:
+                estilista_id = next(
+                    (e for e in activos if not solapa(ocupados.get(e, []), fecha_hora, fecha_fin)), None
+                )
+                if not estilista_id:
+                    rechazar(indice, 400, "No hay estilistas disponibles en ese horario")
+                    continue
+            ocupados.setdefault(estilista_id, []).append((fecha_hora, fecha_fin))
+            # Datos del servicio copiados ahora: el commit expira los objetos
+            nuevas.append((indice, servicio.nombre, servicio.duracion_minutos, {
+                "cliente_id": current_user.id,
+                "estilista_id": estilista_id,
+                "servicio_id": servicio.id,
+                "fecha_hora": fecha_hora,
+                "fecha_fin": fecha_fin,
+                "notas": cita.notas,
+                "precio_total": servicio.precio,
+                "estado": "pendiente"
+            }))
+
+        if nuevas:
+            # Un solo INSERT multi-fila. RETURNING no garantiza el orden de las
+            # filas, así que cada id se empareja por (estilista_id, fecha_hora),
+            # único dentro del lote porque las citas aceptadas no se solapan.
+            insertadas = db.execute(
+                insert(Cita).returning(Cita.id, Cita.estilista_id, Cita.fecha_hora),
+                [fila for *_, fila in nuevas]
+            ).all()
+            ids = {(fila.estilista_id, fila.fecha_hora): fila.id for fila in insertadas}
+            db.execute(insert(CambioCita), [
+                {"cita_id": fila.id, "cliente_id": current_user.id, "estilista_id": fila.estilista_id,
+                 "tipo": "creada", "fecha": datetime.now()}
+                for fila in insertadas
+            ])
+            ahora = datetime.now()
+            db.execute(insert(NotificacionSalida), [
+                {"cita_id": fila.id, "usuario_id": current_user.id, "tipo": NOTIFICACION_POR_ESTADO["pendiente"],
+                 "estado": "pendiente", "intentos": 0, "disponible_en": ahora, "fecha_creacion": ahora}
+                for fila in insertadas
+            ])
+            acumular_resumenes(db, [
+                movimiento_resumen(fila["fecha_hora"], fila["estilista_id"], fila["servicio_id"], "pendiente",
+                                   fila["precio_total"], duracion_minutos, 1)
+                for _, _, duracion_minutos, fila in nuevas
+            ])
+            db.commit()
+            for indice, nombre_servicio, duracion_minutos, fila in nuevas:
+                cita_id = ids[(fila["estilista_id"], fila["fecha_hora"])]
+                indice_disponibilidad.agregar(cita_id, fila["estilista_id"], fila["fecha_hora"], fila["fecha_fin"])
+                bus_citas.publicar(evento_cita(
+                    "creada", cita_id, current_user.id, fila["estilista_id"], fila["fecha_hora"], "pendiente"
+                ))
+                resultados[indice] = {
+                    "indice": indice,
+                    "status_code": 200,
+                    "cita_id": cita_id,
+                    "fecha_hora": fila["fecha_hora"].isoformat(),
+                    "servicio": nombre_servicio,
+                    "estilista": nombres_estilistas.get(fila["estilista_id"], "No asignado"),
+                    "precio": fila["precio_total"],
+                    "estado": "pendiente"
+                }
+
+        logger.info("Lote de citas creado", extra={"campos": {
+            "cliente_id": current_user.id, "creadas": len(nuevas), "rechazadas": len(lote.citas) - len(nuevas)
+        }})
+        return {
+            "message": f"{len(nuevas)} de {len(lote.citas)} citas creadas",
+            "creadas": len(nuevas),
+            "rechazadas": len(lote.citas) - len(nuevas),
+            "resultados": resultados
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error creando lote de citas")
         raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
 
+LIMITE_CITAS_DEFECTO = 100
+LIMITE_CITAS_MAXIMO = 500
+
+def proyeccion_citas(db: Session):
+    """Columnas de la cita y los nombres relacionados que serializa cita_a_dict"""
+    return db.query(
+        Cita.id,
+        Cita.cliente_id,
+        Cita.estilista_id,
+        Cita.fecha_hora,
+        Cita.estado,
+        Cita.notas,
+        Cita.precio_total,
+        Cita.fecha_creacion,
+        Usuario.nombre.label("cliente_nombre"),
+        Usuario.email.label("cliente_email"),
+        Usuario.telefono.label("cliente_telefono"),
+        Estilista.nombre.label("estilista_nombre"),
+        Servicio.nombre.label("servicio_nombre")
+    ).join(Usuario, Cita.cliente_id == Usuario.id).join(
+        Servicio, Cita.servicio_id == Servicio.id
+    ).outerjoin(Estilista, Cita.estilista_id == Estilista.id)
+
+def consulta_citas(db: Session, current_user: UsuarioActual, desde: Optional[date] = None, hasta: Optional[date] = None):
+    """Proyección de columnas de las citas visibles para el usuario, en una sola consulta"""
+    query = proyeccion_citas(db)
+    if current_user.es_admin:
+        pass
+    elif current_user.es_estilista:
+        query = query.filter(Cita.estilista_id == current_user.estilista_id)
+    else:
+        query = query.filter(Cita.cliente_id == current_user.id)
+
+    if desde:
+        query = query.filter(Cita.fecha_hora >= datetime.combine(desde, datetime.min.time()))
+    if hasta:
+        query = query.filter(Cita.fecha_hora < datetime.combine(hasta, datetime.min.time()) + timedelta(days=1))
+
+    return query.order_by(Cita.fecha_hora, Cita.id)
+
+def cita_a_dict(cita, current_user: UsuarioActual) -> dict:
+    """Serializa una fila de consulta_citas con los permisos del usuario"""
+    puede_confirmar = False
+    puede_cancelar = False
+    puede_completar = False
+    
+    if current_user.es_estilista and cita.estilista_id == current_user.estilista_id:
+        puede_confirmar = cita.estado == "pendiente"
+        puede_completar = cita.estado == "confirmada"
+    elif current_user.es_admin:
+        puede_confirmar = cita.estado == "pendiente"
+        puede_cancelar = cita.estado in ["pendiente", "confirmada"]
+        puede_completar = cita.estado == "confirmada"
+    elif cita.cliente_id == current_user.id:
+        puede_cancelar = cita.estado in ["pendiente", "confirmada"]
+    
+    return {
+        "id": cita.id,
+        "cliente_nombre": cita.cliente_nombre,
+        "cliente_email": cita.cliente_email,
+        "cliente_telefono": cita.cliente_telefono,
+        "estilista_nombre": cita.estilista_nombre,
+        "servicio_nombre": cita.servicio_nombre,
+        "fecha_hora": cita.fecha_hora.isoformat(),
+        "estado": cita.estado,
+        "notas": cita.notas,
+        "precio_total": cita.precio_total,
+        "fecha_creacion": cita.fecha_creacion.isoformat() if cita.fecha_creacion else None,
+        "puede_confirmar": puede_confirmar,
+        "puede_cancelar": puede_cancelar,
+        "puede_completar": puede_completar
+    }
+
+def parse_fecha_filtro(valor: Optional[str], nombre: str) -> Optional[date]:
+    if not valor:
+        return None
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Parámetro {nombre} inválido, use YYYY-MM-DD")
+
+def parse_cursor(cursor: str) -> Tuple[datetime, int]:
+    """El cursor es "<fecha_hora ISO>,<id>" de la última cita de la página anterior"""
+    try:
+        fecha, cita_id = cursor.rsplit(",", 1)
+        return datetime.fromisoformat(fecha), int(cita_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
 @app.get("/api/citas")
-def get_citas(current_user: Usuario = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_citas(
+    response: Response,
+    desde: Optional[str] = None,
+    hasta: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limite: int = LIMITE_CITAS_DEFECTO,
+    current_user: UsuarioActual = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Citas visibles para el usuario, paginadas por (fecha_hora, id).
+
+    El cursor de la página siguiente se devuelve en la cabecera
+    X-Siguiente-Cursor; si no está presente no hay más resultados.
+    """
     try:
-        query = db.query(Cita).join(Usuario, Cita.cliente_id == Usuario.id).join(Servicio, Cita.servicio_id == Servicio.id)
+        limite = max(1, min(limite, LIMITE_CITAS_MAXIMO))
+        query = consulta_citas(
+            db, current_user,
+            parse_fecha_filtro(desde, "desde"),
+            parse_fecha_filtro(hasta, "hasta")
+        )
+        if cursor:
+            query = query.filter(tuple_(Cita.fecha_hora, Cita.id) > tuple_(*parse_cursor(cursor)))
         
-        if current_user.es_admin:
-            citas = query.all()
-        elif current_user.es_estilista:
-            citas = query.filter(Cita.estilista_id == current_user.estilista_id).all()
-        else:
-            citas = query.filter(Cita.cliente_id == current_user.id).all()
+        citas = query.limit(limite + 1).all()
+        if len(citas) > limite:
+            citas = citas[:limite]
+            ultima = citas[-1]
+            response.headers["X-Siguiente-Cursor"] = f"{ultima.fecha_hora.isoformat()},{ultima.id}"
         
-        result = []
-        for cita in citas:
-            estilista_nombre = None
-            if cita.estilista:
-                estilista_nombre = cita.estilista.nombre
-            
-            # Determinar permisos
-            puede_confirmar = False
-            puede_cancelar = False
-            puede_completar = False
-            
-            if current_user.es_estilista and cita.estilista_id == current_user.estilista_id:
-                puede_confirmar = cita.estado == "pendiente"
-                puede_completar = cita.estado == "confirmada"
-            elif current_user.es_admin:
-                puede_confirmar = cita.estado == "pendiente"
-                puede_cancelar = cita.estado in ["pendiente", "confirmada"]
-                puede_completar = cita.estado == "confirmada"
-            elif cita.cliente_id == current_user.id:
-                puede_cancelar = cita.estado in ["pendiente", "confirmada"]
-            
-            result.append({
-                "id": cita.id,
-                "cliente_nombre": cita.cliente.nombre,
-                "cliente_email": cita.cliente.email,
-                "cliente_telefono": cita.cliente.telefono,
-                "estilista_nombre": estilista_nombre,
-                "servicio_nombre": cita.servicio.nombre,
-                "fecha_hora": cita.fecha_hora.isoformat(),
-                "estado": cita.estado,
-                "notas": cita.notas,
-                "precio_total": cita.precio_total,
-                "fecha_creacion": cita.fecha_creacion.isoformat(),
-                "puede_confirmar": puede_confirmar,
-                "puede_cancelar": puede_cancelar,
-                "puede_completar": puede_completar
-            })
-        
-        return result
+        return [cita_a_dict(cita, current_user) for cita in citas]
     
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error obteniendo citas: {e}")
+        logger.exception("Error obteniendo citas")
         raise HTTPException(status_code=500, detail="Error obteniendo citas")
 
+LIMITE_CAMBIOS_DEFECTO = 200
+LIMITE_CAMBIOS_MAXIMO = 1000
+
+def parse_cursor_cambios(cursor: str) -> int:
+    try:
+        valor = int(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if valor < 0:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return valor
+
+@app.get("/api/citas/cambios")
+def get_cambios_citas(
+    cursor: Optional[str] = None,
+    limite: int = LIMITE_CAMBIOS_DEFECTO,
+    current_user: UsuarioActual = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Citas visibles para el usuario que cambiaron después del cursor.
+
+    Sin cursor solo se devuelve el cursor actual: el cliente lo pide antes
+    de descargar GET /api/citas y a partir de ahí refresca con este
+    endpoint. Cada cita aparece una vez, con su estado actual, aunque haya
+    cambiado varias veces. SQLite serializa las escrituras, así que un id
+    del registro nunca se confirma después de otro mayor y el cursor no
+    salta cambios. Si "hay_mas" es verdadero se vuelve a llamar con el
+    cursor devuelto.
+    """
+    try:
+        if cursor is None:
+            return {"cursor": str(db.query(func.max(CambioCita.id)).scalar() or 0), "hay_mas": False, "citas": []}
+
+        limite = max(1, min(limite, LIMITE_CAMBIOS_MAXIMO))
+        query = db.query(CambioCita.id, CambioCita.cita_id).filter(CambioCita.id > parse_cursor_cambios(cursor))
+        if current_user.es_admin:
+            pass
+        elif current_user.es_estilista:
+            query = query.filter(CambioCita.estilista_id == current_user.estilista_id)
+        else:
+            query = query.filter(CambioCita.cliente_id == current_user.id)
+        cambios = query.order_by(CambioCita.id).limit(limite + 1).all()
+
+        hay_mas = len(cambios) > limite
+        cambios = cambios[:limite]
+        if not cambios:
+            return {"cursor": cursor, "hay_mas": False, "citas": []}
+
+        # Último cambio de cada cita, en el orden en que ocurrieron. El registro
+        # ya está filtrado por cliente/estilista (no cambian en una cita), así
+        # que las citas se leen por clave primaria sin repetir el filtro, que
+        # llevaría a SQLite a recorrer todas las citas del estilista.
+        ultimo = {cambio.cita_id: cambio.id for cambio in cambios}
+        filas = proyeccion_citas(db).filter(Cita.id.in_(ultimo)).all()
+        filas.sort(key=lambda fila: ultimo[fila.id])
+        return {
+            "cursor": str(cambios[-1].id),
+            "hay_mas": hay_mas,
+            "citas": [cita_a_dict(fila, current_user) for fila in filas]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error obteniendo cambios de citas")
+        raise HTTPException(status_code=500, detail="Error obteniendo cambios de citas")
+
+TAMANO_LOTE_EXPORTACION = 1000
+
+def formatear_lote_exportacion(lote: List[str], formato: str, primero: bool) -> str:
+    if formato == "ndjson":
+        return "\n".join(lote) + "\n"
+    return ("" if primero else ",") + ",".join(lote)
+
+def generar_exportacion_citas(current_user: UsuarioActual, desde: Optional[date], hasta: Optional[date], formato: str):
+    """Recorre el cursor por lotes y emite el JSON de forma incremental.
+
+    Usa su propia sesión porque la respuesta se sigue enviando después de
+    que termina la función del endpoint.
+    """
+    db = SessionLocal()
+    try:
+        query = consulta_citas(db, current_user, desde, hasta).yield_per(TAMANO_LOTE_EXPORTACION)
+        if formato == "json":
+            yield "["
+        primero = True
+        lote = []
+        for cita in query:
+            lote.append(json.dumps(cita_a_dict(cita, current_user), ensure_ascii=False))
+            if len(lote) >= TAMANO_LOTE_EXPORTACION:
+                yield formatear_lote_exportacion(lote, formato, primero)
+                primero = False
+                lote = []
+        if lote:
+            yield formatear_lote_exportacion(lote, formato, primero)
+        if formato == "json":
+            yield "]"
+    except Exception:
+        # Las cabeceras 200 ya se enviaron: relanzar corta la conexión para
+        # que el cliente no tome un cuerpo truncado por una exportación completa
+        logger.exception("Error exportando citas")
+        raise
+    finally:
+        db.close()
+
+@app.get("/api/citas/exportar")
+def exportar_citas(
+    formato: str = "ndjson",
+    desde: Optional[str] = None,
+    hasta: Optional[str] = None,
+    current_user: UsuarioActual = Depends(get_current_user)
+):
+    """Todas las citas visibles para el usuario, sin paginar y con memoria acotada"""
+    if formato not in ["json", "ndjson"]:
+        raise HTTPException(status_code=400, detail="Formato no válido, use json o ndjson")
+    
+    return StreamingResponse(
+        generar_exportacion_citas(
+            current_user,
+            parse_fecha_filtro(desde, "desde"),
+            parse_fecha_filtro(hasta, "hasta"),
+            formato
+        ),
+        media_type="application/json" if formato == "json" else "application/x-ndjson"
+    )
+
 @app.put("/api/citas/{cita_id}")
-def update_cita(cita_id: int, cita_update: CitaUpdate, current_user: Usuario = Depends(get_current_user), db: Session = Depends(get_db)):
+def update_cita(cita_id: int, cita_update: CitaUpdate, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
         cita = db.query(Cita).filter(Cita.id == cita_id).first()
         if not cita:
@@ -485,14 +1583,39 @@ def update_cita(cita_id: int, cita_update: CitaUpdate, current_user: Usuario = D
         else:
             raise HTTPException(status_code=400, detail="Estado no válido")
         
-        # Actualizar estado
-        cita.estado = nuevo_estado
-        cita.fecha_actualizacion = datetime.now()
+        # Actualizar estado solo si nadie lo cambió desde que se leyó: el
+        # movimiento de los resúmenes sale del estado anterior
+        estado_anterior = cita.estado
+        ahora = datetime.now()
+        # notification_service.py encola el recordatorio cuando llega recordatorio_en;
+        # si se confirma con menos antelación, en cuanto lo vea
+        recordatorio_en = max(cita.fecha_hora - ANTELACION_RECORDATORIO, ahora) if nuevo_estado == "confirmada" else None
+        actualizadas = db.query(Cita).filter(Cita.id == cita_id, Cita.estado == estado_anterior).update(
+            {Cita.estado: nuevo_estado, Cita.fecha_actualizacion: ahora, Cita.recordatorio_en: recordatorio_en},
+            synchronize_session=False
+        )
+        if not actualizadas:
+            db.rollback()
+            raise HTTPException(status_code=409, detail="La cita cambió mientras se actualizaba, inténtalo de nuevo")
+        minutos = minutos_cita(
+            cita.fecha_hora, cita.fecha_fin, cita.servicio.duracion_minutos if cita.fecha_fin is None else None
+        )
+        acumular_resumenes(db, [
+            movimiento_resumen(cita.fecha_hora, cita.estilista_id, cita.servicio_id, estado, cita.precio_total, minutos, signo)
+            for estado, signo in ((estado_anterior, -1), (nuevo_estado, 1))
+        ])
+        evento = evento_cita(nuevo_estado, cita.id, cita.cliente_id, cita.estilista_id, cita.fecha_hora, nuevo_estado)
+        db.add(cambio_cita(nuevo_estado, cita.id, cita.cliente_id, cita.estilista_id))
+        if nuevo_estado in NOTIFICACION_POR_ESTADO:
+            db.add(notificacion_salida(NOTIFICACION_POR_ESTADO[nuevo_estado], cita.id, cita.cliente_id))
         db.commit()
+        if nuevo_estado in ["cancelada", "completada"]:
+            indice_disponibilidad.quitar(cita_id)
+        bus_citas.publicar(evento)
         
         return {
             "message": f"Cita {nuevo_estado} exitosamente",
-            "cita_id": cita.id,
+            "cita_id": cita_id,
             "nuevo_estado": nuevo_estado
         }
     
@@ -500,11 +1623,75 @@ def update_cita(cita_id: int, cita_update: CitaUpdate, current_user: Usuario = D
         raise
     except Exception as e:
         db.rollback()
-        print(f"Error actualizando cita: {e}")
+        logger.exception("Error actualizando cita")
         raise HTTPException(status_code=500, detail="Error actualizando cita")
 
+def create_token_eventos(user_id: int) -> str:
+    """Token de un minuto que solo sirve para abrir GET /api/citas/eventos"""
+    expira = int(time.time()) + SSE_TOKEN_SEGUNDOS
+    return jwt.encode({"user_id": user_id, "scope": ALCANCE_EVENTOS, "exp": expira}, SECRET_KEY, algorithm=ALGORITHM)
+
+def verify_token_eventos(token: str) -> int:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Token inválido")
+    if payload.get("scope") != ALCANCE_EVENTOS or payload.get("user_id") is None:
+        raise HTTPException(status_code=401, detail="Token inválido")
+    return payload["user_id"]
+
+def get_usuario_eventos(
+    token: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+) -> UsuarioActual:
+    """EventSource no permite cabeceras: sin Authorization se acepta ?token=, pero solo
+    un token de POST /api/citas/eventos/token, nunca el token de sesión (quedaría en
+    los logs de acceso y en el historial del navegador)"""
+    if credentials is not None:
+        return get_current_user(verify_token(credentials))
+    if not token:
+        raise HTTPException(status_code=401, detail="Token requerido")
+    return get_current_user(verify_token_eventos(token))
+
+async def generar_eventos_citas(request: Request, usuario: UsuarioActual):
+    suscripcion, cola = bus_citas.suscribir(filtro_eventos(usuario))
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                evento = await asyncio.wait_for(cola.get(), timeout=SSE_LATIDO_SEGUNDOS)
+            except asyncio.TimeoutError:
+                # El comentario mantiene viva la conexión a través de proxies
+                if await request.is_disconnected():
+                    break
+                yield ": latido\n\n"
+                continue
+            if evento is None:
+                break
+            yield f"id: {evento['secuencia']}\nevent: cita\ndata: {json.dumps(evento, ensure_ascii=False)}\n\n"
+    finally:
+        bus_citas.cancelar(suscripcion)
+
+@app.post("/api/citas/eventos/token")
+def create_token_eventos_citas(current_user: UsuarioActual = Depends(get_current_user)):
+    """Token para abrir el canal SSE con EventSource (?token=); caduca en SSE_TOKEN_SEGUNDOS.
+
+    Solo se comprueba al conectar: si el stream se corta después, el
+    cliente pide uno nuevo antes de reconectar.
+    """
+    return {"token": create_token_eventos(current_user.id), "expira_en_segundos": SSE_TOKEN_SEGUNDOS}
+
+@app.get("/api/citas/eventos")
+async def get_eventos_citas(request: Request, current_user: UsuarioActual = Depends(get_usuario_eventos)):
+    """Canal SSE con las citas creadas, confirmadas, canceladas y completadas que el usuario puede ver"""
+    return StreamingResponse(
+        generar_eventos_citas(request, current_user),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/user/profile")
-def get_user_profile(current_user: Usuario = Depends(get_current_user)):
+def get_user_profile(current_user: UsuarioActual = Depends(get_current_user)):
     return {
         "id": current_user.id,
         "nombre": current_user.nombre,
@@ -539,10 +1726,679 @@ def get_disponibilidad_estilista(estilista_id: int, fecha: str, db: Session = De
         }
     
     except Exception as e:
-        print(f"Error obteniendo disponibilidad: {e}")
+        logger.exception("Error obteniendo disponibilidad")
         raise HTTPException(status_code=500, detail="Error obteniendo disponibilidad")
 
+HORA_APERTURA = os.getenv("PARIS_STYLE_HORA_APERTURA", "08:00")
+HORA_CIERRE = os.getenv("PARIS_STYLE_HORA_CIERRE", "20:00")
+MINUTOS_FRANJA = int(os.getenv("PARIS_STYLE_MINUTOS_FRANJA", "15"))
+MAX_DIAS_DISPONIBILIDAD = 62
+
+def minutos_del_dia(hora: str) -> int:
+    horas, minutos = hora.split(":")
+    return int(horas) * 60 + int(minutos)
+
+def _marcar_tramos(marcas: np.ndarray, fila: np.ndarray, dia: np.ndarray, inicio: np.ndarray, fin: np.ndarray):
+    """Suma +1 en la primera franja de cada tramo y -1 tras la última.
+
+    `inicio` y `fin` son minutos relativos a la apertura de `dia`; los tramos
+    se recortan al horario y los que quedan fuera del rango se ignoran.
+    """
+    _, dias, limite = marcas.shape
+    franjas = limite - 1
+    primera = np.clip(np.floor(inicio / MINUTOS_FRANJA), 0, franjas).astype(int)
+    ultima = np.clip(np.ceil(fin / MINUTOS_FRANJA), 0, franjas).astype(int)
+    visibles = (dia >= 0) & (dia < dias) & (ultima > primera)
+    np.add.at(marcas, (fila[visibles], dia[visibles], primera[visibles]), 1)
+    np.add.at(marcas, (fila[visibles], dia[visibles], ultima[visibles]), -1)
+
+def matriz_ocupacion(citas: np.ndarray, estilistas: List[int], dias: int, apertura: int, franjas: int) -> np.ndarray:
+    """Matriz booleana [estilista, día, franja] con las franjas que tocan alguna cita.
+
+    `citas` tiene una fila (estilista_id, inicio, fin) por cita, en minutos
+    desde la medianoche del primer día. Las marcas de inicio y fin se
+    acumulan con np.add.at y una suma acumulada por día las convierte en
+    ocupación, sin recorrer las franjas en Python. Una cita que pasa de la
+    medianoche ocupa también el principio del día siguiente.
+    """
+    marcas = np.zeros((len(estilistas), dias, franjas + 1), dtype=np.int32)
+    ids = np.array(estilistas, dtype=np.int64)
+    if len(citas) and len(ids):
+        orden = np.argsort(ids)
+        posicion = np.clip(np.searchsorted(ids, citas[:, 0], sorter=orden), 0, len(ids) - 1)
+        conocidas = ids[orden[posicion]] == citas[:, 0]
+        fila = orden[posicion[conocidas]]
+        inicio, fin = citas[conocidas, 1], citas[conocidas, 2]
+        dia = np.floor_divide(inicio, 24 * 60).astype(int)
+        base = dia * 24 * 60 + apertura
+        _marcar_tramos(marcas, fila, dia, inicio - base, fin - base)
+        _marcar_tramos(marcas, fila, dia + 1, inicio - base - 24 * 60, fin - base - 24 * 60)
+    return np.cumsum(marcas, axis=2)[:, :, :franjas] > 0
+
+def inicios_libres(ocupacion: np.ndarray, franjas_servicio: int) -> np.ndarray:
+    """Matriz [estilista, día, franja] con True donde cabe el servicio completo"""
+    estilistas, dias, franjas = ocupacion.shape
+    libres = np.zeros((estilistas, dias, franjas), dtype=bool)
+    if franjas_servicio > franjas:
+        return libres
+    acumulado = np.zeros((estilistas, dias, franjas + 1), dtype=np.int32)
+    np.cumsum(ocupacion, axis=2, out=acumulado[:, :, 1:])
+    ocupadas = acumulado[:, :, franjas_servicio:] - acumulado[:, :, :-franjas_servicio]
+    libres[:, :, :franjas - franjas_servicio + 1] = ocupadas == 0
+    return libres
+
+@app.get("/api/estilistas/disponibilidad")
+def get_disponibilidad_estilistas(
+    desde: str,
+    hasta: str,
+    servicio_id: Optional[int] = None,
+    duracion_minutos: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Horas de inicio libres de todos los estilistas activos en un rango de días.
+
+    La duración se toma del servicio o del parámetro duracion_minutos. Todas
+    las citas del rango se leen con una sola consulta y la búsqueda de
+    huecos se hace sobre matrices de franjas de MINUTOS_FRANJA minutos.
+    """
+    fecha_desde = parse_fecha_filtro(desde, "desde")
+    fecha_hasta = parse_fecha_filtro(hasta, "hasta")
+    dias = (fecha_hasta - fecha_desde).days + 1
+    if dias < 1:
+        raise HTTPException(status_code=400, detail="El parámetro hasta debe ser igual o posterior a desde")
+    if dias > MAX_DIAS_DISPONIBILIDAD:
+        raise HTTPException(status_code=400, detail=f"El rango admite como máximo {MAX_DIAS_DISPONIBILIDAD} días")
+
+    try:
+        if servicio_id is not None:
+            cuerpo, _ = cache_catalogo.obtener("servicios", lambda: cargar_servicios_activos(db))
+            servicio = next((s for s in json.loads(cuerpo) if s["id"] == servicio_id), None)
+            if not servicio:
+                raise HTTPException(status_code=404, detail="Servicio no encontrado")
+            duracion_minutos = servicio["duracion_minutos"]
+        if not duracion_minutos or duracion_minutos <= 0:
+            raise HTTPException(status_code=400, detail="Indique servicio_id o duracion_minutos")
+
+        cuerpo, _ = cache_catalogo.obtener("estilistas", lambda: cargar_estilistas_activos(db))
+        estilistas = json.loads(cuerpo)
+
+        apertura = minutos_del_dia(HORA_APERTURA)
+        franjas = (minutos_del_dia(HORA_CIERRE) - apertura) // MINUTOS_FRANJA
+        inicio_rango = datetime.combine(fecha_desde, datetime.min.time())
+        fin_rango = inicio_rango + timedelta(days=dias)
+        margen = timedelta(minutes=duracion_maxima_citas(db))
+
+        # SQLite devuelve directamente los minutos desde el inicio del rango;
+        # convertir miles de filas a datetime en Python costaría más que la consulta
+        origen = func.julianday(inicio_rango.strftime("%Y-%m-%d %H:%M:%S"))
+        citas = db.query(
+            Cita.estilista_id,
+            func.round((func.julianday(Cita.fecha_hora) - origen) * 24 * 60 * 60) / 60,
+            func.round((func.julianday(Cita.fecha_fin) - origen) * 24 * 60 * 60) / 60
+        ).filter(
+            and_(
+                Cita.fecha_hora > inicio_rango - margen,
+                Cita.fecha_hora < fin_rango,
+                Cita.estilista_id.isnot(None),
+                Cita.fecha_fin.isnot(None),
+                Cita.estado.in_(["pendiente", "confirmada"])
+            )
+        ).all()
+
+        citas = np.fromiter(chain.from_iterable(citas), dtype=float, count=3 * len(citas)).reshape(-1, 3)
+        ocupacion = matriz_ocupacion(citas, [e["id"] for e in estilistas], dias, apertura, franjas)
+        libres = inicios_libres(ocupacion, -(-duracion_minutos // MINUTOS_FRANJA))
+
+        # No se ofrecen horas que ya pasaron (create_cita las rechaza)
+        transcurridos = (datetime.now() - inicio_rango).total_seconds() / 60
+        franja_actual = np.arange(dias)[:, None] * 24 * 60 + apertura + np.arange(franjas)[None, :] * MINUTOS_FRANJA
+        libres &= (franja_actual > transcurridos)[None, :, :]
+
+        etiquetas = [
+            f"{(apertura + i * MINUTOS_FRANJA) // 60:02d}:{(apertura + i * MINUTOS_FRANJA) % 60:02d}"
+            for i in range(franjas)
+        ]
+        fechas = [(fecha_desde + timedelta(days=d)).isoformat() for d in range(dias)]
+        return {
+            "desde": fecha_desde.isoformat(),
+            "hasta": fecha_hasta.isoformat(),
+            "duracion_minutos": duracion_minutos,
+            "franja_minutos": MINUTOS_FRANJA,
+            "estilistas": [
+                {
+                    "estilista_id": estilista["id"],
+                    "nombre": estilista["nombre"],
+                    "dias": {
+                        fechas[d]: [etiquetas[f] for f in np.flatnonzero(libres[i, d])]
+                        for d in range(dias)
+                    }
+                }
+                for i, estilista in enumerate(estilistas)
+            ]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error calculando disponibilidad")
+        raise HTTPException(status_code=500, detail="Error calculando disponibilidad")
+
+MAX_DIAS_REPORTE = int(os.getenv("PARIS_STYLE_MAX_DIAS_REPORTE", "731"))
+DIAS_REPORTE_DEFECTO = 30
+
+def metricas_reporte(por_estado: Dict[str, Tuple[int, int, int]], capacidad_minutos: Optional[int]) -> dict:
+    """Métricas de un grupo a partir de (citas, ingresos, minutos) por estado.
+
+    Los ingresos son los de citas completadas; los previstos, los de las
+    pendientes y confirmadas. Los minutos reservados y la ocupación cuentan
+    todas las citas no canceladas.
+    """
+    def suma(estados, campo):
+        return sum(por_estado.get(estado, (0, 0, 0))[campo] for estado in estados)
+
+    activas = ("pendiente", "confirmada", "completada")
+    minutos = suma(activas, 2)
+    return {
+        "citas": suma(activas, 0),
+        "pendientes": suma(("pendiente",), 0),
+        "confirmadas": suma(("confirmada",), 0),
+        "completadas": suma(("completada",), 0),
+        "canceladas": suma(("cancelada",), 0),
+        "ingresos": suma(("completada",), 1),
+        "ingresos_previstos": suma(("pendiente", "confirmada"), 1),
+        "minutos_reservados": minutos,
+        "ocupacion": round(minutos / capacidad_minutos, 4) if capacidad_minutos else None,
+    }
+
+def agrupar_resumen(filas) -> Dict:
+    """(clave, estado, citas, ingresos, minutos) -> {clave: {estado: (citas, ingresos, minutos)}}"""
+    grupos: Dict = {}
+    for clave, estado, citas, ingresos, minutos in filas:
+        grupos.setdefault(clave, {})[estado] = (citas or 0, ingresos or 0, minutos or 0)
+    return grupos
+
+@app.get("/api/admin/reportes")
+def get_reportes(
+    desde: Optional[str] = None,
+    hasta: Optional[str] = None,
+    current_user: UsuarioActual = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Ingresos, citas y ocupación del rango por estilista, servicio, categoría y día.
+
+    Se lee de los resúmenes diarios (ver resumenes.py): el coste depende de
+    los días del rango por estilistas y servicios, no del número de citas.
+    Por defecto, los últimos 30 días hasta hoy.
+    """
+    if not current_user.es_admin:
+        raise HTTPException(status_code=403, detail="Solo los administradores pueden ver los reportes")
+    fecha_hasta = parse_fecha_filtro(hasta, "hasta") or date.today()
+    fecha_desde = parse_fecha_filtro(desde, "desde") or fecha_hasta - timedelta(days=DIAS_REPORTE_DEFECTO - 1)
+    if fecha_desde > fecha_hasta:
+        raise HTTPException(status_code=400, detail="desde no puede ser posterior a hasta")
+    dias = (fecha_hasta - fecha_desde).days + 1
+    if dias > MAX_DIAS_REPORTE:
+        raise HTTPException(status_code=400, detail=f"El rango admite como máximo {MAX_DIAS_REPORTE} días")
+
+    try:
+        def sumas(modelo, *clave):
+            return db.query(
+                *clave, modelo.estado, func.sum(modelo.citas), func.sum(modelo.ingresos), func.sum(modelo.minutos)
+            ).filter(modelo.dia >= fecha_desde, modelo.dia <= fecha_hasta).group_by(*clave, modelo.estado).all()
+
+        por_estilista = agrupar_resumen(sumas(ResumenDiarioEstilista, ResumenDiarioEstilista.estilista_id))
+        por_dia = agrupar_resumen(sumas(ResumenDiarioEstilista, ResumenDiarioEstilista.dia))
+        por_servicio = agrupar_resumen(sumas(ResumenDiarioServicio, ResumenDiarioServicio.servicio_id))
+
+        estilistas = {e.id: e for e in db.query(Estilista.id, Estilista.nombre, Estilista.activo).all()}
+        servicios = {s.id: s for s in db.query(Servicio.id, Servicio.nombre, Servicio.categoria).all()}
+        activos = sum(1 for e in estilistas.values() if e.activo)
+        jornada = minutos_del_dia(HORA_CIERRE) - minutos_del_dia(HORA_APERTURA)
+
+        por_categoria: Dict[str, Dict[str, Tuple[int, int, int]]] = {}
+        for servicio_id, por_estado in por_servicio.items():
+            categoria = por_categoria.setdefault(getattr(servicios.get(servicio_id), "categoria", None) or "Sin categoría", {})
+            for estado, valores in por_estado.items():
+                categoria[estado] = tuple(a + b for a, b in zip(categoria.get(estado, (0, 0, 0)), valores))
+        totales: Dict[str, Tuple[int, int, int]] = {}
+        for por_estado in por_dia.values():
+            for estado, valores in por_estado.items():
+                totales[estado] = tuple(a + b for a, b in zip(totales.get(estado, (0, 0, 0)), valores))
+
+        return {
+            "desde": fecha_desde.isoformat(),
+            "hasta": fecha_hasta.isoformat(),
+            "totales": metricas_reporte(totales, dias * jornada * activos),
+            "por_estilista": [
+                {
+                    "estilista_id": estilista_id or None,
+                    "nombre": estilistas[estilista_id].nombre if estilista_id in estilistas else "Sin asignar",
+                    **metricas_reporte(por_estado, dias * jornada if estilista_id in estilistas else None)
+                }
+                for estilista_id, por_estado in sorted(por_estilista.items())
+            ],
+            "por_servicio": [
+                {
+                    "servicio_id": servicio_id,
+                    "nombre": getattr(servicios.get(servicio_id), "nombre", None),
+                    **metricas_reporte(por_estado, None)
+                }
+                for servicio_id, por_estado in sorted(por_servicio.items())
+            ],
+            "por_categoria": [
+                {"categoria": categoria, **metricas_reporte(por_estado, None)}
+                for categoria, por_estado in sorted(por_categoria.items())
+            ],
+            "por_dia": [
+                {"dia": dia.isoformat(), **metricas_reporte(por_estado, jornada * activos)}
+                for dia, por_estado in sorted(por_dia.items())
+            ],
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error generando reportes")
+        raise HTTPException(status_code=500, detail="Error generando reportes")
+
+# Tienda: catálogo de productos y ventas en caja
+MAX_LINEAS_VENTA = 50
+
+# Descuento atómico: si no queda stock suficiente no cambia ninguna fila y
+# no hace falta leer el stock antes (ni bloquear entre la lectura y la escritura)
+DESCONTAR_STOCK = text("""
+    UPDATE productos SET stock = stock - :cantidad
+    WHERE id = :producto_id AND activo = 1 AND stock >= :cantidad
+    RETURNING precio
+""")
+
+AJUSTAR_STOCK = text("""
+    UPDATE productos SET stock = stock + :cantidad
+    WHERE id = :producto_id AND stock + :cantidad >= 0
+    RETURNING stock
+""")
+
+def cargar_productos_activos(db: Session) -> List[dict]:
+    # Sin el stock: cambia con cada venta y se consulta en GET /api/productos/stock
+    return [
+        fila._asdict()
+        for fila in db.query(
+            Producto.id, Producto.nombre, Producto.descripcion, Producto.precio,
+            Producto.categoria, Producto.imagen_url
+        ).filter(Producto.activo == True).order_by(Producto.id).all()
+    ]
+
+@app.get("/api/productos")
+def get_productos(request: Request, db: Session = Depends(get_db)):
+    try:
+        cuerpo, etag = cache_catalogo.obtener("productos", lambda: cargar_productos_activos(db))
+        return respuesta_catalogo(request, cuerpo, etag)
+    except Exception as e:
+        logger.exception("Error obteniendo productos")
+        raise HTTPException(status_code=500, detail="Error obteniendo productos")
+
+@app.get("/api/productos/stock")
+def get_stock_productos(response: Response, db: Session = Depends(get_db)):
+    try:
+        response.headers["Cache-Control"] = "no-store"
+        return [
+            {"id": producto_id, "stock": stock}
+            for producto_id, stock in db.query(Producto.id, Producto.stock).filter(Producto.activo == True).order_by(Producto.id)
+        ]
+    except Exception as e:
+        logger.exception("Error obteniendo stock")
+        raise HTTPException(status_code=500, detail="Error obteniendo stock")
+
+@app.post("/api/productos")
+def create_producto(producto: ProductoCreate, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(get_db)):
+    if not current_user.es_admin:
+        raise HTTPException(status_code=403, detail="Solo los administradores pueden crear productos")
+    if producto.precio < 0 or producto.stock < 0:
+        raise HTTPException(status_code=400, detail="El precio y el stock no pueden ser negativos")
+    try:
+        db_producto = Producto(
+            nombre=producto.nombre,
+            descripcion=producto.descripcion,
+            precio=producto.precio,
+            stock=producto.stock,
+            categoria=producto.categoria,
+            imagen_url=producto.imagen_url
+        )
+        db.add(db_producto)
+        db.commit()
+        return columnas_a_dict(db_producto)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error creando producto")
+        raise HTTPException(status_code=500, detail="Error creando producto")
+
+@app.post("/api/productos/{producto_id}/stock")
+def ajustar_stock(producto_id: int, ajuste: AjusteStock, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Suma (reposición) o resta (mermas) unidades sin dejar el stock en negativo"""
+    if not current_user.es_admin:
+        raise HTTPException(status_code=403, detail="Solo los administradores pueden ajustar el stock")
+    try:
+        fila = db.execute(AJUSTAR_STOCK, {"producto_id": producto_id, "cantidad": ajuste.cantidad}).first()
+        if fila is None:
+            db.rollback()
+            if not db.query(Producto.id).filter(Producto.id == producto_id).first():
+                raise HTTPException(status_code=404, detail="Producto no encontrado")
+            raise HTTPException(status_code=409, detail="El ajuste dejaría el stock en negativo")
+        db.commit()
+        return {"producto_id": producto_id, "stock": fila.stock}
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error ajustando stock")
+        raise HTTPException(status_code=500, detail="Error ajustando stock")
+
+@app.post("/api/ventas")
+def create_venta(venta: VentaCreate, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Registra una venta en caja con todas sus líneas en una sola transacción.
+
+    Cada producto se descuenta con un único UPDATE condicional; si alguno no
+    tiene stock suficiente se revierte la venta entera y se responde 409.
+    """
+    if not (current_user.es_admin or current_user.es_estilista):
+        raise HTTPException(status_code=403, detail="Solo administradores y estilistas pueden registrar ventas")
+    if not venta.lineas:
+        raise HTTPException(status_code=400, detail="La venta no tiene líneas")
+    if len(venta.lineas) > MAX_LINEAS_VENTA:
+        raise HTTPException(status_code=400, detail=f"Una venta admite como máximo {MAX_LINEAS_VENTA} líneas")
+
+    # Un producto repetido en varias líneas se descuenta una sola vez
+    cantidades: Dict[int, int] = {}
+    for linea in venta.lineas:
+        if linea.cantidad <= 0:
+            raise HTTPException(status_code=400, detail="Las cantidades deben ser positivas")
+        cantidades[linea.producto_id] = cantidades.get(linea.producto_id, 0) + linea.cantidad
+
+    try:
+        # El cliente se valida antes de tocar el stock, como el servicio y el estilista en create_cita
+        if venta.cliente_id is not None:
+            cliente = db.query(Usuario.es_admin, Usuario.es_estilista).filter(Usuario.id == venta.cliente_id).first()
+            if not cliente:
+                raise HTTPException(status_code=404, detail="Cliente no encontrado")
+            if cliente.es_admin or cliente.es_estilista:
+                raise HTTPException(status_code=400, detail="La venta solo se puede asociar a un cliente")
+
+        lineas = []
+        for producto_id, cantidad in cantidades.items():
+            fila = db.execute(DESCONTAR_STOCK, {"producto_id": producto_id, "cantidad": cantidad}).first()
+            if fila is None:
+                db.rollback()
+                if not db.query(Producto.id).filter(Producto.id == producto_id, Producto.activo == True).first():
+                    raise HTTPException(status_code=404, detail=f"Producto {producto_id} no encontrado")
+                raise HTTPException(status_code=409, detail=f"Stock insuficiente para el producto {producto_id}")
+            lineas.append({"producto_id": producto_id, "cantidad": cantidad, "precio_unitario": fila.precio})
+
+        db_venta = Venta(
+            vendedor_id=current_user.id,
+            cliente_id=venta.cliente_id,
+            total=sum(l["cantidad"] * l["precio_unitario"] for l in lineas),
+            fecha=datetime.now()
+        )
+        db.add(db_venta)
+        db.flush()
+        db.execute(insert(VentaLinea), [{"venta_id": db_venta.id, **l} for l in lineas])
+        db.commit()
+
+        return {
+            "message": "Venta registrada exitosamente",
+            "venta_id": db_venta.id,
+            "total": db_venta.total,
+            "lineas": lineas
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error registrando venta")
+        raise HTTPException(status_code=500, detail="Error registrando venta")
+
+# Cursos de formación e inscripciones
+# Ocupa una plaza solo si queda alguna: la comprobación y el incremento son
+# la misma escritura, así que una avalancha de inscripciones no sobrevende
+OCUPAR_PLAZA = text("""
+    UPDATE cursos SET inscritos = inscritos + 1
+    WHERE id = :curso_id AND activo = 1 AND inscritos < cupo
+    RETURNING cupo - inscritos AS plazas_libres
+""")
+
+INSERTAR_INSCRIPCION = text("""
+    INSERT INTO inscripciones_cursos (curso_id, usuario_id, fecha_inscripcion)
+    VALUES (:curso_id, :usuario_id, :fecha)
+    ON CONFLICT (curso_id, usuario_id) DO NOTHING
+    RETURNING id
+""").bindparams(bindparam("fecha", type_=DateTime))
+
+LIBERAR_PLAZA = text("""
+    UPDATE cursos SET inscritos = inscritos - 1
+    WHERE id = :curso_id
+    RETURNING cupo - inscritos AS plazas_libres
+""")
+
+def curso_a_dict(curso) -> dict:
+    return {
+        "id": curso.id,
+        "nombre": curso.nombre,
+        "descripcion": curso.descripcion,
+        "precio": curso.precio,
+        "fecha": curso.fecha.isoformat(),
+        "horario": curso.horario,
+        "cupo": curso.cupo,
+        "inscritos": curso.inscritos,
+        "plazas_libres": curso.cupo - curso.inscritos,
+    }
+
+@app.get("/api/cursos")
+def get_cursos(desde: Optional[str] = None, db: Session = Depends(get_db)):
+    """Cursos activos desde la fecha indicada (por defecto hoy) con sus plazas libres.
+
+    Las plazas salen del contador del propio curso, sin contar inscripciones.
+    """
+    fecha_desde = parse_fecha_filtro(desde, "desde") or date.today()
+    try:
+        cursos = db.query(Curso).filter(Curso.activo == True, Curso.fecha >= fecha_desde).order_by(Curso.fecha, Curso.id).all()
+        return [curso_a_dict(curso) for curso in cursos]
+    except Exception as e:
+        logger.exception("Error obteniendo cursos")
+        raise HTTPException(status_code=500, detail="Error obteniendo cursos")
+
+@app.post("/api/cursos")
+def create_curso(curso: CursoCreate, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(get_db)):
+    if not current_user.es_admin:
+        raise HTTPException(status_code=403, detail="Solo los administradores pueden crear cursos")
+    fecha = parse_fecha_filtro(curso.fecha, "fecha")
+    if not fecha:
+        raise HTTPException(status_code=400, detail="La fecha del curso es obligatoria")
+    if curso.cupo <= 0 or curso.precio < 0:
+        raise HTTPException(status_code=400, detail="El cupo debe ser positivo y el precio no puede ser negativo")
+    try:
+        db_curso = Curso(
+            nombre=curso.nombre,
+            descripcion=curso.descripcion,
+            precio=curso.precio,
+            fecha=fecha,
+            horario=curso.horario,
+            cupo=curso.cupo,
+            inscritos=0
+        )
+        db.add(db_curso)
+        db.commit()
+        return curso_a_dict(db_curso)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error creando curso")
+        raise HTTPException(status_code=500, detail="Error creando curso")
+
+@app.post("/api/cursos/{curso_id}/inscripciones")
+def inscribir_curso(curso_id: int, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Inscribe al usuario actual; 409 si el curso está lleno o ya estaba inscrito"""
+    try:
+        fila = db.execute(OCUPAR_PLAZA, {"curso_id": curso_id}).first()
+        if fila is None:
+            db.rollback()
+            if not db.query(Curso.id).filter(Curso.id == curso_id, Curso.activo == True).first():
+                raise HTTPException(status_code=404, detail="Curso no encontrado")
+            # Un curso lleno también lo está para quien ya tiene plaza en él
+            if db.query(InscripcionCurso.id).filter(
+                InscripcionCurso.curso_id == curso_id, InscripcionCurso.usuario_id == current_user.id
+            ).first():
+                raise HTTPException(status_code=409, detail="Ya estás inscrito en este curso")
+            raise HTTPException(status_code=409, detail="El curso no tiene plazas libres")
+        inscripcion_id = db.execute(
+            INSERTAR_INSCRIPCION, {"curso_id": curso_id, "usuario_id": current_user.id, "fecha": datetime.now()}
+        ).scalar()
+        if inscripcion_id is None:
+            # Devuelve la plaza ocupada arriba
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Ya estás inscrito en este curso")
+        db.commit()
+        return {
+            "message": "Inscripción realizada exitosamente",
+            "inscripcion_id": inscripcion_id,
+            "curso_id": curso_id,
+            "plazas_libres": fila.plazas_libres
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error inscribiendo en curso")
+        raise HTTPException(status_code=500, detail="Error inscribiendo en curso")
+
+@app.delete("/api/cursos/{curso_id}/inscripciones")
+def cancelar_inscripcion_curso(curso_id: int, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(get_db)):
+    try:
+        borradas = db.query(InscripcionCurso).filter(
+            InscripcionCurso.curso_id == curso_id, InscripcionCurso.usuario_id == current_user.id
+        ).delete(synchronize_session=False)
+        if not borradas:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="No estás inscrito en este curso")
+        fila = db.execute(LIBERAR_PLAZA, {"curso_id": curso_id}).first()
+        db.commit()
+        return {"message": "Inscripción cancelada", "curso_id": curso_id, "plazas_libres": fila.plazas_libres}
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error cancelando inscripción")
+        raise HTTPException(status_code=500, detail="Error cancelando inscripción")
+
+@app.get("/api/cursos/{curso_id}/inscripciones")
+def get_inscripciones_curso(curso_id: int, current_user: UsuarioActual = Depends(get_current_user), db: Session = Depends(get_db)):
+    if not current_user.es_admin:
+        raise HTTPException(status_code=403, detail="Solo los administradores pueden ver las inscripciones")
+    try:
+        inscripciones = db.query(
+            InscripcionCurso.id, InscripcionCurso.usuario_id, Usuario.nombre, Usuario.email, InscripcionCurso.fecha_inscripcion
+        ).join(Usuario, Usuario.id == InscripcionCurso.usuario_id).filter(
+            InscripcionCurso.curso_id == curso_id
+        ).order_by(InscripcionCurso.id).all()
+        return [
+            {
+                "inscripcion_id": i.id,
+                "usuario_id": i.usuario_id,
+                "nombre": i.nombre,
+                "email": i.email,
+                "fecha_inscripcion": i.fecha_inscripcion.isoformat()
+            }
+            for i in inscripciones
+        ]
+    except Exception as e:
+        logger.exception("Error obteniendo inscripciones")
+        raise HTTPException(status_code=500, detail="Error obteniendo inscripciones")
+
+# Búsqueda de texto (ver busqueda.py)
+TIPOS_BUSQUEDA = ("servicios", "estilistas", "clientes")
+LIMITE_BUSQUEDA_DEFECTO = 10
+LIMITE_BUSQUEDA_MAXIMO = 50
+
+# Mayor puntuación, más relevante; bm25 da más peso al nombre que a la descripción o las especialidades
+BUSCAR_SERVICIOS = text("""
+    SELECT s.id, s.nombre, s.descripcion, s.precio, s.duracion_minutos, s.categoria,
+           -bm25(servicios_fts, 10.0, 1.0, 5.0) AS puntuacion
+    FROM servicios_fts JOIN servicios s ON s.id = servicios_fts.rowid
+    WHERE servicios_fts MATCH :consulta AND s.activo = 1
+    ORDER BY puntuacion DESC LIMIT :limite
+""")
+
+BUSCAR_ESTILISTAS = text("""
+    SELECT e.id, e.nombre, e.especialidades, -bm25(estilistas_fts, 10.0, 1.0) AS puntuacion
+    FROM estilistas_fts JOIN estilistas e ON e.id = estilistas_fts.rowid
+    WHERE estilistas_fts MATCH :consulta AND e.activo = 1
+    ORDER BY puntuacion DESC LIMIT :limite
+""")
+
+BUSCAR_CLIENTES = text("""
+    SELECT u.id, u.nombre, u.email, u.telefono, -bm25(usuarios_fts, 10.0, 1.0) AS puntuacion
+    FROM usuarios_fts JOIN usuarios u ON u.id = usuarios_fts.rowid
+    WHERE usuarios_fts MATCH :consulta AND NOT COALESCE(u.es_admin, 0) AND NOT COALESCE(u.es_estilista, 0)
+    ORDER BY puntuacion DESC LIMIT :limite
+""")
+
+BUSCAR_CLIENTES_TELEFONO = text("""
+    SELECT u.id, u.nombre, u.email, u.telefono, -bm25(usuarios_telefono_fts) AS puntuacion
+    FROM usuarios_telefono_fts JOIN usuarios u ON u.id = usuarios_telefono_fts.rowid
+    WHERE usuarios_telefono_fts MATCH :consulta AND NOT COALESCE(u.es_admin, 0) AND NOT COALESCE(u.es_estilista, 0)
+    ORDER BY puntuacion DESC LIMIT :limite
+""")
+
+@app.get("/api/buscar")
+def buscar(
+    q: str,
+    tipo: Optional[str] = None,
+    limite: int = LIMITE_BUSQUEDA_DEFECTO,
+    current_user: Optional[UsuarioActual] = Depends(get_usuario_opcional),
+    db: Session = Depends(get_db)
+):
+    """Busca servicios, estilistas y, para administradores y estilistas, clientes.
+
+    Cada palabra de q se busca como prefijo y sin distinguir tildes
+    ("luc" encuentra a Lucía); las de un solo carácter se ignoran. Un q
+    de solo cifras busca además ese fragmento en los teléfonos de los
+    clientes. Los resultados de cada tipo vienen ordenados por relevancia.
+    """
+    if tipo is not None and tipo not in TIPOS_BUSQUEDA:
+        raise HTTPException(status_code=400, detail=f"tipo debe ser uno de: {', '.join(TIPOS_BUSQUEDA)}")
+    if limite < 1 or limite > LIMITE_BUSQUEDA_MAXIMO:
+        raise HTTPException(status_code=400, detail=f"limite debe estar entre 1 y {LIMITE_BUSQUEDA_MAXIMO}")
+    consulta = expresion_fts(q)
+    if consulta is None:
+        raise HTTPException(status_code=400, detail="La búsqueda necesita al menos una palabra de 2 caracteres")
+
+    personal = current_user is not None and (current_user.es_admin or current_user.es_estilista)
+    if tipo == "clientes" and not personal:
+        raise HTTPException(status_code=403, detail="Solo administradores y estilistas pueden buscar clientes")
+    tipos = [tipo] if tipo else [t for t in TIPOS_BUSQUEDA if t != "clientes" or personal]
+
+    try:
+        parametros = {"consulta": consulta, "limite": limite}
+        resultados = {"q": q}
+        if "servicios" in tipos:
+            resultados["servicios"] = [fila._asdict() for fila in db.execute(BUSCAR_SERVICIOS, parametros)]
+        if "estilistas" in tipos:
+            resultados["estilistas"] = [fila._asdict() for fila in db.execute(BUSCAR_ESTILISTAS, parametros)]
+        if "clientes" in tipos:
+            telefono = expresion_telefono(q)
+            if telefono:
+                filas = db.execute(BUSCAR_CLIENTES_TELEFONO, {"consulta": telefono, "limite": limite}).all()
+            else:
+                filas = db.execute(BUSCAR_CLIENTES, parametros).all()
+            resultados["clientes"] = [fila._asdict() for fila in filas]
+        return resultados
+
+    except Exception as e:
+        logger.exception("Error en la búsqueda")
+        raise HTTPException(status_code=500, detail="Error en la búsqueda")
+
 if __name__ == "__main__":
+    if MODO_DB == "async" and not aiosqlite_disponible():
+        raise SystemExit("❌ PARIS_STYLE_MODO_DB=async necesita aiosqlite: pip install aiosqlite (o usa el modo sync)")
     print("🚀 Iniciando Paris Style API Enhanced v3 Fixed...")
     print("📋 Documentación: http://127.0.0.1:8000/docs")
     print("🌐 API: http://127.0.0.1:8000")
@@ -552,5 +2408,11 @@ if __name__ == "__main__":
     print("✅ Citas asignadas por estilista")
     print("✅ Clientes pueden cancelar citas")
     print("✅ Validación de horarios ocupados")
-    print("✅ Mejor logging para debugging")
-    uvicorn.run("__main__:app", host="127.0.0.1", port=8000, reload=True)
+    print("✅ Logging estructurado en JSON fuera del hilo de la petición")
+    print("✅ Ventas en caja con descuento atómico de stock")
+    print("✅ Inscripción a cursos con contador de plazas atómico")
+    print("✅ Búsqueda de texto sin tildes ni palabras completas (FTS5)")
+    print(f"✅ Modo de base de datos: {MODO_DB}")
+    uvicorn.run("backend_async:app" if MODO_DB == "async" else "__main__:app", host="127.0.0.1", port=8000, reload=True,
+                # Sin configuración propia, los logs de uvicorn también pasan por la cola
+                log_config=None)
@@ -0,0 +1,114 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import backend_enhanced_v3_fixed as backend
+from sqlalchemy import and_, insert
+
+def asignar_legacy(fecha_hora, db):
+    """Versión anterior: una consulta por estilista (N+1)"""
+    estilistas = db.query(backend.Estilista).filter(backend.Estilista.activo == True).all()
+    for estilista in estilistas:
+        conflicto = db.query(backend.Cita).filter(
+            and_(
+                backend.Cita.estilista_id == estilista.id,
+                backend.Cita.fecha_hora == fecha_hora,
+                backend.Cita.estado.in_(["pendiente", "confirmada"])
+            )
+        ).first()
+        if not conflicto:
+            return estilista.id
+    return None
+
+def sembrar(db, num_estilistas, num_citas, reservas):
+    """Crea estilistas y citas; en cada horario objetivo solo el último estilista queda libre"""
+    backend.Base.metadata.drop_all(bind=backend.engine)
+    backend.Base.metadata.create_all(bind=backend.engine)
+
+    db.execute(insert(backend.Estilista), [
+        {"nombre": f"Estilista {i}", "especialidades": "Corte", "activo": True}
+        for i in range(num_estilistas)
+    ])
+    db.execute(insert(backend.Servicio), [
+        {"nombre": "Corte de Cabello", "precio": 2500000, "duracion_minutos": 45, "categoria": "Cabello", "activo": True}
+    ])
+    db.execute(insert(backend.Usuario), [
+        {"nombre": "Cliente", "email": "cliente@bench.com", "telefono": "0", "password_hash": "x"}
+    ])
+
+    base = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+    objetivos = [base + timedelta(days=k, hours=10) for k in range(reservas)]
+
+    citas = []
+    for objetivo in objetivos:
+        for estilista_id in range(1, num_estilistas):
+            citas.append((estilista_id, objetivo))
+    # Historial de relleno en horarios que no interfieren con los objetivos
+    k = 0
+    while len(citas) < num_citas:
+        dia = base + timedelta(days=k // (num_estilistas * 8))
+        hora = 12 + (k % 8)
+        citas.append(((k % num_estilistas) + 1, dia.replace(hour=hora)))
+        k += 1
+
+    db.execute(insert(backend.Cita), [
+        {"cliente_id": 1, "estilista_id": e, "servicio_id": 1, "fecha_hora": f,
+         "fecha_fin": f + timedelta(minutes=45), "estado": "confirmada", "precio_total": 2500000}
+        for e, f in citas
+    ])
+    db.commit()
+    return objetivos
+
+def medir(funcion, objetivos):
+    tiempos = []
+    for objetivo in objetivos:
+        inicio = time.perf_counter()
+        funcion(objetivo)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+def ejecutar(escenarios, reservas):
+    print(f"{'estilistas':>10} {'citas':>8} {'legacy ms':>10} {'índice ms':>10} {'POST ms':>9} {'carga ms':>9}")
+    for num_estilistas, num_citas in escenarios:
+        db = backend.SessionLocal()
+        try:
+            objetivos = sembrar(db, num_estilistas, num_citas, reservas)
+            cliente = db.query(backend.Usuario).first()
+
+            legacy = medir(lambda f: asignar_legacy(f, db), objetivos)
+
+            backend.indice_disponibilidad.invalidar()
+            inicio = time.perf_counter()
+            backend.indice_disponibilidad.cargar(db)
+            carga = (time.perf_counter() - inicio) * 1000
+
+            indice = medir(lambda f: backend.asignar_estilista_automatico(1, f, db, 45), objetivos)
+
+            post = medir(lambda f: backend.create_cita(
+                backend.CitaCreate(servicio_id=1, fecha_hora=f.isoformat()), cliente, db
+            ), objetivos)
+
+            print(f"{num_estilistas:>10} {num_citas:>8} {legacy:>10.3f} {indice:>10.3f} {post:>9.3f} {carga:>9.1f}")
+        finally:
+            db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latencia de asignación automática de estilista")
+    parser.add_argument("--reservas", type=int, default=50, help="reservas medidas por escenario")
+    args = parser.parse_args()
+
+    print("📊 Benchmark de asignación automática (mediana por reserva)")
+    ejecutar([(4, 1000), (16, 10000), (64, 50000), (128, 100000)], args.reservas)
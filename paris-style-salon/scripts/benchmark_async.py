@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import httpx
+import backend_async
+import backend_enhanced_v3_fixed as backend
+from sqlalchemy import insert
+
+def sembrar(num_estilistas, num_clientes, num_citas):
+    db = backend.SessionLocal()
+    try:
+        db.execute(insert(backend.Estilista), [{"nombre": f"Estilista {i}", "activo": True} for i in range(num_estilistas)])
+        db.execute(insert(backend.Servicio), [
+            {"nombre": f"Servicio {i}", "precio": 2500000, "duracion_minutos": 30, "activo": True} for i in range(15)
+        ])
+        password_hash = hashlib.sha256("cliente123".encode()).hexdigest()
+        db.execute(insert(backend.Usuario), [
+            {"nombre": f"Cliente {i}", "email": f"cliente{i}@bench.com", "telefono": "0", "password_hash": password_hash}
+            for i in range(num_clientes)
+        ])
+        base = datetime.combine(datetime.now().date() - timedelta(days=30), datetime.min.time())
+        db.execute(insert(backend.Cita), [
+            {"cliente_id": (i % num_clientes) + 1, "estilista_id": (i % num_estilistas) + 1, "servicio_id": 1,
+             "fecha_hora": base + timedelta(minutes=30 * i), "fecha_fin": base + timedelta(minutes=30 * i + 30),
+             "estado": "completada", "precio_total": 2500000, "fecha_creacion": base}
+            for i in range(num_citas)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+async def ejecutar_modo(app, nombre, peticiones, concurrencia, num_clientes, semilla):
+    rng = random.Random(semilla)
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        tokens = []
+        for i in range(num_clientes):
+            r = await cliente.post("/api/auth/login", json={"email": f"cliente{i}@bench.com", "password": "cliente123"})
+            tokens.append(r.json()["access_token"])
+
+        # Cada modo reserva en su propia franja de fechas para no chocar con el otro
+        base = datetime.combine(datetime.now().date() + timedelta(days=1 + semilla * 400), datetime.min.time())
+        contador = {"reserva": 0}
+
+        def siguiente_peticion():
+            cabeceras = {"Authorization": f"Bearer {rng.choice(tokens)}"}
+            tipo = rng.random()
+            if tipo < 0.4:
+                return "GET", "/api/servicios", None, cabeceras
+            if tipo < 0.8:
+                return "GET", "/api/citas", None, cabeceras
+            contador["reserva"] += 1
+            fecha = base + timedelta(minutes=30 * contador["reserva"])
+            return "POST", "/api/citas", {"servicio_id": 1, "fecha_hora": fecha.isoformat()}, cabeceras
+
+        cola = asyncio.Queue()
+        for _ in range(peticiones):
+            cola.put_nowait(siguiente_peticion())
+        latencias = []
+        errores = 0
+
+        async def trabajador():
+            nonlocal errores
+            while not cola.empty():
+                metodo, ruta, cuerpo, cabeceras = cola.get_nowait()
+                t0 = time.perf_counter()
+                r = await cliente.request(metodo, ruta, json=cuerpo, headers=cabeceras)
+                latencias.append((time.perf_counter() - t0) * 1000)
+                if r.status_code >= 500:
+                    errores += 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+        total = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "modo": nombre,
+        "req_s": round(len(latencias) / total, 1),
+        "p50_ms": round(latencias[len(latencias) // 2], 2),
+        "p99_ms": round(latencias[int(len(latencias) * 0.99) - 1], 2),
+        "errores": errores,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Comparación de concurrencia entre los modos sync y async")
+    parser.add_argument("--peticiones", type=int, default=2000)
+    parser.add_argument("--concurrencia", type=int, default=64)
+    parser.add_argument("--clientes", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    sembrar(num_estilistas=8, num_clientes=args.clientes, num_citas=5000)
+    resultados = [
+        asyncio.run(ejecutar_modo(backend.app, "sync", args.peticiones, args.concurrencia, args.clientes, 0)),
+        asyncio.run(ejecutar_modo(backend_async.app, "async", args.peticiones, args.concurrencia, args.clientes, 1)),
+    ]
+
+    if args.json:
+        print(json.dumps(resultados))
+    else:
+        print(f"📊 {args.peticiones} peticiones, concurrencia {args.concurrencia}")
+        print(f"{'modo':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errores':>8}")
+        for r in resultados:
+            print(f"{r['modo']:<6} {r['req_s']:>8} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['errores']:>8}")
@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import httpx
+import backend_enhanced_v3_fixed as backend
+from sqlalchemy import event, insert
+
+class ContadorConsultas:
+    def __init__(self, engine):
+        self.total = 0
+        event.listen(engine, "before_cursor_execute", self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+def sembrar(num_clientes):
+    db = backend.SessionLocal()
+    try:
+        password_hash = hashlib.sha256("cliente123".encode()).hexdigest()
+        db.execute(insert(backend.Usuario), [
+            {"nombre": f"Cliente {i}", "email": f"cliente{i}@bench.com", "telefono": "0", "password_hash": password_hash}
+            for i in range(num_clientes)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+def configurar_cache(activo: bool):
+    for cache in (backend.cache_tokens, backend.cache_usuarios):
+        cache.ttl_segundos = backend.CACHE_AUTENTICACION_TTL if activo else 0
+        cache.invalidar()
+
+async def ejecutar_modo(nombre, tokens, peticiones, concurrencia, contador):
+    transporte = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        cabeceras = [{"Authorization": f"Bearer {token}"} for token in tokens]
+        # Una vuelta de calentamiento para llenar el cache (si está activo)
+        for c in cabeceras:
+            await cliente.get("/api/user/profile", headers=c)
+
+        consultas_antes = contador.total
+        errores = 0
+
+        async def trabajador(inicio):
+            nonlocal errores
+            for i in range(inicio, peticiones, concurrencia):
+                r = await cliente.get("/api/user/profile", headers=cabeceras[i % len(cabeceras)])
+                if r.status_code != 200:
+                    errores += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(trabajador(i) for i in range(concurrencia)))
+        total = time.perf_counter() - t0
+
+    return {
+        "modo": nombre,
+        "req_s": round(peticiones / total, 1),
+        "consultas_por_peticion": round((contador.total - consultas_antes) / peticiones, 2),
+        "errores": errores,
+    }
+
+async def iniciar_sesiones(num_clientes):
+    transporte = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        tokens = []
+        for i in range(num_clientes):
+            r = await cliente.post("/api/auth/login", json={"email": f"cliente{i}@bench.com", "password": "cliente123"})
+            tokens.append(r.json()["access_token"])
+        return tokens
+
+def verificar_invalidacion(token):
+    """Un cambio de rol confirmado debe verse en la siguiente petición, sin esperar al TTL"""
+    async def perfil():
+        transporte = httpx.ASGITransport(app=backend.app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+            r = await cliente.get("/api/user/profile", headers={"Authorization": f"Bearer {token}"})
+            return r.json()
+
+    antes = asyncio.run(perfil())
+    db = backend.SessionLocal()
+    try:
+        db.get(backend.Usuario, antes["id"]).es_admin = True
+        db.commit()
+    finally:
+        db.close()
+    return not antes["es_admin"] and asyncio.run(perfil())["es_admin"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Coste de autenticar cada petición con y sin el cache de usuarios")
+    parser.add_argument("--peticiones", type=int, default=4000)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--clientes", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    sembrar(args.clientes)
+    tokens = asyncio.run(iniciar_sesiones(args.clientes))
+    contador = ContadorConsultas(backend.engine)
+
+    configurar_cache(False)
+    resultados = [asyncio.run(ejecutar_modo("sin cache", tokens, args.peticiones, args.concurrencia, contador))]
+    configurar_cache(True)
+    resultados.append(asyncio.run(ejecutar_modo("con cache", tokens, args.peticiones, args.concurrencia, contador)))
+    invalidacion = verificar_invalidacion(tokens[0])
+
+    if args.json:
+        print(json.dumps({"resultados": resultados, "invalidacion_correcta": invalidacion}))
+    else:
+        print(f"📊 {args.peticiones} peticiones a /api/user/profile, {args.clientes} usuarios, concurrencia {args.concurrencia}")
+        print(f"{'modo':<10} {'req/s':>8} {'consultas/petición':>20} {'errores':>8}")
+        for r in resultados:
+            print(f"{r['modo']:<10} {r['req_s']:>8} {r['consultas_por_peticion']:>20} {r['errores']:>8}")
+        print(f"\n{'✅' if invalidacion else '❌'} Invalidación del usuario tras cambiar su rol")
+    if not invalidacion:
+        sys.exit(1)
@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+import unicodedata
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import backend_enhanced_v3_fixed as backend
+from busqueda import expresion_fts, expresion_telefono
+from db_config import conectar_sqlite, ruta_sqlite
+
+NOMBRES = ["Sofía", "Lucía", "María", "Valentina", "Camila", "Isabella", "Mariana", "Daniela", "Ángela", "Inés",
+           "José", "Andrés", "Martín", "Sebastián", "Nicolás", "Julián", "Óscar", "Lucas", "Samuel", "Tomás"]
+APELLIDOS = ["García", "Rodríguez", "Martínez", "Gómez", "López", "Pérez", "Sánchez", "Ramírez", "Díaz", "Torres",
+             "Muñoz", "Hernández", "Núñez", "Jiménez", "Álvarez", "Castaño", "Ríos", "Herrera", "Vásquez", "Peña"]
+
+# (texto, patrones LIKE equivalentes a mano: lo que se escribiría sin FTS)
+BUSQUEDAS = [
+    ("sof", ["%sof%"]),
+    ("lucia", ["%lucia%"]),
+    ("Lucía", ["%Lucía%"]),
+    ("garc mart", ["%garc%", "%mart%"]),
+    ("nuñez", ["%nuñez%"]),
+    ("valentina castaño rí", ["%valentina%", "%castaño%", "%rí%"]),
+    ("4567", ["%4567%"]),
+    ("300 12", ["%300 12%"]),
+    ("3001234", ["%3001234%"]),
+]
+
+def sin_tildes(texto: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c)).lower()
+
+def sembrar(num_clientes, rng):
+    """Clientes con nombre y dos apellidos; los triggers llenan los índices FTS en la misma transacción"""
+    conexion = conectar_sqlite(ruta_sqlite(backend.DATABASE_URL))
+    try:
+        t0 = time.perf_counter()
+        conexion.executemany(
+            "INSERT INTO usuarios (nombre, email, telefono, password_hash) VALUES (?, ?, ?, 'x')",
+            ((f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}", f"cliente{i}@bench.com",
+              f"+57 3{rng.randrange(10)}{rng.randrange(10)} {rng.randrange(1000):03d} {rng.randrange(10000):04d}")
+             for i in range(num_clientes))
+        )
+        conexion.commit()
+        segundos = time.perf_counter() - t0
+        conexion.execute("ANALYZE")
+        conexion.commit()
+        filas = conexion.execute("SELECT id, nombre, email, telefono FROM usuarios").fetchall()
+        return segundos, filas
+    finally:
+        conexion.close()
+
+def esperados(texto, filas) -> set:
+    """Lo que debe devolver FTS, calculado en Python sobre todas las filas"""
+    telefono = expresion_telefono(texto)
+    if telefono:
+        digitos = telefono.strip('"')
+        return {i for i, _, _, tel in filas if digitos in re.sub(r"\D", "", tel)}
+    palabras = [sin_tildes(p) for p in re.findall(r"\w+", texto)]
+    resultado = set()
+    for i, nombre, email, _ in filas:
+        tokens = re.findall(r"[^\W_]+", sin_tildes(f"{nombre} {email}"))
+        if all(any(t.startswith(p) for t in tokens) for p in palabras):
+            resultado.add(i)
+    return resultado
+
+def mediana_ms(conexion, sql, parametros, repeticiones):
+    tiempos, filas = [], []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        filas = conexion.execute(sql, parametros).fetchall()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tiempos), filas
+
+def medir(texto, patrones, repeticiones) -> dict:
+    conexion = conectar_sqlite(ruta_sqlite(backend.DATABASE_URL))
+    try:
+        telefono = expresion_telefono(texto)
+        if telefono:
+            sql_like = "SELECT id FROM usuarios WHERE " + " AND ".join("telefono LIKE ?" for _ in patrones)
+            sql_fts = "SELECT rowid FROM usuarios_telefono_fts WHERE usuarios_telefono_fts MATCH ?"
+            consulta, top = telefono, backend.BUSCAR_CLIENTES_TELEFONO
+        else:
+            sql_like = "SELECT id FROM usuarios WHERE " + " AND ".join("(nombre LIKE ? OR email LIKE ?)" for _ in patrones)
+            patrones = [p for p in patrones for _ in range(2)]
+            sql_fts = "SELECT rowid FROM usuarios_fts WHERE usuarios_fts MATCH ?"
+            consulta, top = expresion_fts(texto), backend.BUSCAR_CLIENTES
+        like_ms, filas_like = mediana_ms(conexion, sql_like, patrones, repeticiones)
+        fts_ms, filas_fts = mediana_ms(conexion, sql_fts, (consulta,), repeticiones)
+        # La consulta del endpoint: las 20 más relevantes con sus datos
+        top_ms, _ = mediana_ms(conexion, str(top), {"consulta": consulta, "limite": 20}, repeticiones)
+        return {
+            "texto": texto,
+            "like_ms": round(like_ms, 2),
+            "fts_ms": round(fts_ms, 2),
+            "fts_top20_ms": round(top_ms, 2),
+            "like_resultados": len(filas_like),
+            "fts_resultados": len(filas_fts),
+            "ids_fts": {f[0] for f in filas_fts},
+        }
+    finally:
+        conexion.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Búsqueda de clientes con FTS5 frente a LIKE '%x%'")
+    parser.add_argument("--clientes", type=int, default=500000)
+    parser.add_argument("--repeticiones", type=int, default=5, help="se toma la mediana")
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    segundos_carga, filas = sembrar(args.clientes, random.Random(23))
+    resultados, correcto = [], True
+    for texto, patrones in BUSQUEDAS:
+        medida = medir(texto, patrones, args.repeticiones)
+        medida["correcto"] = medida.pop("ids_fts") == esperados(texto, filas)
+        medida["mas_rapido"] = medida["fts_top20_ms"] < medida["like_ms"]
+        correcto &= medida["correcto"] and medida["mas_rapido"]
+        resultados.append(medida)
+
+    if args.json:
+        print(json.dumps({"clientes": args.clientes, "carga_s": round(segundos_carga, 1), "busquedas": resultados,
+                          "correcto": correcto}))
+    else:
+        print(f"📊 {args.clientes} clientes (carga con triggers FTS: {segundos_carga:.1f} s)")
+        print(f"{'búsqueda':<22} {'LIKE ms':>9} {'FTS ms':>8} {'FTS top20 ms':>13} {'LIKE filas':>11} {'FTS filas':>10}")
+        for r in resultados:
+            print(f"{r['texto']:<22} {r['like_ms']:>9} {r['fts_ms']:>8} {r['fts_top20_ms']:>13} "
+                  f"{r['like_resultados']:>11} {r['fts_resultados']:>10}")
+        print(f"\n{'✅' if all(r['correcto'] for r in resultados) else '❌'} "
+              f"FTS encuentra exactamente los prefijos esperados, con y sin tildes")
+        print(f"{'✅' if all(r['mas_rapido'] for r in resultados) else '❌'} "
+              f"Las 20 más relevantes con FTS llegan antes que LIKE '%x%'")
+    if not correcto:
+        sys.exit(1)
@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import httpx
+import backend_enhanced_v3_fixed as backend
+from sqlalchemy import event, insert
+
+NUM_ESTILISTAS = 8
+
+class ContadorConsultas:
+    def __init__(self, engine):
+        self.total = 0
+        event.listen(engine, "before_cursor_execute", self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+def sembrar(num_citas):
+    db = backend.SessionLocal()
+    try:
+        password = hashlib.sha256("bench123".encode()).hexdigest()
+        db.execute(insert(backend.Estilista), [{"nombre": f"Estilista {i}", "activo": True} for i in range(NUM_ESTILISTAS)])
+        db.execute(insert(backend.Servicio), [{"nombre": "Corte", "precio": 350000, "duracion_minutos": 45, "activo": True}])
+        db.execute(insert(backend.Usuario), [
+            {"nombre": "Admin", "email": "admin@bench.com", "telefono": "0", "password_hash": password, "es_admin": True},
+            {"nombre": "Estilista", "email": "estilista@bench.com", "telefono": "0", "password_hash": password,
+             "es_estilista": True, "estilista_id": 1},
+            {"nombre": "Cliente", "email": "cliente@bench.com", "telefono": "0", "password_hash": password},
+        ])
+        base = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time()) + timedelta(hours=8)
+        db.execute(insert(backend.Cita), [
+            {"cliente_id": 3, "estilista_id": (i % NUM_ESTILISTAS) + 1, "servicio_id": 1,
+             "fecha_hora": base + timedelta(days=i // (NUM_ESTILISTAS * 12), minutes=45 * ((i // NUM_ESTILISTAS) % 12)),
+             "fecha_fin": base + timedelta(days=i // (NUM_ESTILISTAS * 12), minutes=45 * ((i // NUM_ESTILISTAS) % 12 + 1)),
+             "estado": "pendiente", "precio_total": 350000, "fecha_creacion": base}
+            for i in range(num_citas)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+async def login(cliente, email):
+    r = await cliente.post("/api/auth/login", json={"email": email, "password": "bench123"})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+async def refresco_completo(cliente, cabeceras):
+    """Lo que hace hoy un cliente sin SSE: volver a descargar todas las páginas"""
+    ids, bytes_totales, peticiones, cursor = [], 0, 0, None
+    while True:
+        params = {"limite": backend.LIMITE_CITAS_MAXIMO}
+        if cursor:
+            params["cursor"] = cursor
+        r = await cliente.get("/api/citas", params=params, headers=cabeceras)
+        bytes_totales += len(r.content)
+        peticiones += 1
+        ids.extend(c["id"] for c in r.json())
+        cursor = r.headers.get("X-Siguiente-Cursor")
+        if not cursor:
+            return ids, bytes_totales, peticiones
+
+async def refresco_incremental(cliente, cabeceras, cursor):
+    citas, bytes_totales, peticiones = [], 0, 0
+    while True:
+        r = await cliente.get("/api/citas/cambios", params={"cursor": cursor}, headers=cabeceras)
+        bytes_totales += len(r.content)
+        peticiones += 1
+        datos = r.json()
+        citas.extend(datos["citas"])
+        cursor = datos["cursor"]
+        if not datos["hay_mas"]:
+            return citas, bytes_totales, peticiones, cursor
+
+async def medir(num_citas, cambios, contador):
+    transporte = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        admin = await login(cliente, "admin@bench.com")
+        estilista = await login(cliente, "estilista@bench.com")
+
+        cursores = {}
+        for nombre, cabeceras in (("admin", admin), ("estilista", estilista)):
+            r = await cliente.get("/api/citas/cambios", headers=cabeceras)
+            cursores[nombre] = r.json()["cursor"]
+
+        # Cambios desde el último refresco: confirmaciones y alguna cita
+        # confirmada y completada (dos cambios, una sola fila en la respuesta)
+        rng = random.Random(7)
+        modificadas = rng.sample(range(1, num_citas + 1), cambios)
+        esperado = {}
+        for i, cita_id in enumerate(modificadas):
+            await cliente.put(f"/api/citas/{cita_id}", json={"estado": "confirmada"}, headers=admin)
+            esperado[cita_id] = "confirmada"
+            if i % 5 == 0:
+                await cliente.put(f"/api/citas/{cita_id}", json={"estado": "completada"}, headers=admin)
+                esperado[cita_id] = "completada"
+        visibles_estilista = {c: e for c, e in esperado.items() if (c - 1) % NUM_ESTILISTAS == 0}
+
+        resultados, correcto = [], True
+        for nombre, cabeceras, visibles in (("admin", admin, esperado), ("estilista", estilista, visibles_estilista)):
+            t0 = time.perf_counter()
+            ids, bytes_completo, peticiones_completo = await refresco_completo(cliente, cabeceras)
+            ms_completo = (time.perf_counter() - t0) * 1000
+
+            antes = contador.total
+            t0 = time.perf_counter()
+            citas, bytes_incremental, peticiones_incremental, cursor = await refresco_incremental(
+                cliente, cabeceras, cursores[nombre]
+            )
+            ms_incremental = (time.perf_counter() - t0) * 1000
+            consultas = contador.total - antes
+
+            recibido = {c["id"]: c["estado"] for c in citas}
+            correcto &= recibido == visibles and len(citas) == len(visibles)
+            # Con el cursor nuevo no queda nada pendiente
+            r = await cliente.get("/api/citas/cambios", params={"cursor": cursor}, headers=cabeceras)
+            correcto &= r.json()["citas"] == []
+
+            resultados.append({
+                "usuario": nombre,
+                "citas_visibles": len(ids),
+                "completo_filas": len(ids),
+                "completo_bytes": bytes_completo,
+                "completo_peticiones": peticiones_completo,
+                "completo_ms": round(ms_completo, 1),
+                "incremental_filas": len(citas),
+                "incremental_bytes": bytes_incremental,
+                "incremental_peticiones": peticiones_incremental,
+                "incremental_ms": round(ms_incremental, 1),
+                "incremental_consultas": consultas,
+            })
+        return resultados, correcto
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresco con GET /api/citas/cambios frente a volver a descargar GET /api/citas")
+    parser.add_argument("--citas", type=int, default=20000)
+    parser.add_argument("--cambios", type=int, default=25, help="citas modificadas entre dos refrescos")
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    sembrar(args.citas)
+    contador = ContadorConsultas(backend.engine)
+    resultados, correcto = asyncio.run(medir(args.citas, args.cambios, contador))
+
+    if args.json:
+        print(json.dumps({"resultados": resultados, "cambios_correctos": correcto}))
+    else:
+        print(f"📊 {args.citas} citas, {args.cambios} modificadas desde el último refresco")
+        print(f"{'usuario':<10} {'modo':<12} {'filas':>7} {'bytes':>11} {'peticiones':>11} {'ms':>9}")
+        for r in resultados:
+            print(f"{r['usuario']:<10} {'completo':<12} {r['completo_filas']:>7} {r['completo_bytes']:>11} "
+                  f"{r['completo_peticiones']:>11} {r['completo_ms']:>9}")
+            print(f"{'':<10} {'incremental':<12} {r['incremental_filas']:>7} {r['incremental_bytes']:>11} "
+                  f"{r['incremental_peticiones']:>11} {r['incremental_ms']:>9}   ({r['incremental_consultas']} consultas)")
+        print(f"\n{'✅' if correcto else '❌'} El refresco incremental devuelve exactamente las citas modificadas con su estado actual")
+    if not correcto:
+        sys.exit(1)
@@ -0,0 +1,338 @@
+"""Prueba de carga de la API de citas con una mezcla de peticiones reproducible.
+
+Genera una base de datos con generar_datos.py (o usa una existente con
+--ruta) y reproduce sobre ella una mezcla ponderada de lo que hacen los
+clientes y los estilistas: iniciar sesión, leer el catálogo, consultar
+disponibilidad, crear citas, confirmarlas o cancelarlas y listar las
+propias. La secuencia de peticiones y sus parámetros salen de la semilla y
+de la fecha de referencia, así que dos ejecuciones con las mismas opciones
+envían exactamente lo mismo y sus resultados se pueden comparar:
+
+    python scripts/benchmark_carga.py --json > antes.json
+    python scripts/benchmark_carga.py --app async --concurrencia 64 --json > despues.json
+
+Por defecto las peticiones van a la aplicación en el mismo proceso
+(httpx.ASGITransport); con --url se envían a un servidor ya arrancado
+(uvicorn) que use la base de datos de --ruta.
+
+Se informa del rendimiento, p50/p95/p99 y la tasa de errores, en total y
+por escenario. Las respuestas esperables bajo carga (horario ya ocupado al
+crear una cita, cita cambiada por otra petición) cuentan como rechazadas;
+cualquier otro código, y todos los 5xx, como errores.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Contraseñas con las que generar_datos.py crea cada tipo de usuario
+PASSWORD_CLIENTE = "cliente123"
+PASSWORD_ESTILISTA = "estilista123"
+
+# escenario -> peso en la mezcla
+MEZCLA = {
+    "login": 5,
+    "servicios": 15,
+    "estilistas": 10,
+    "disponibilidad": 15,
+    "disponibilidad_estilista": 5,
+    "crear_cita": 15,
+    "confirmar_cita": 5,
+    "cancelar_cita": 5,
+    "listar_citas": 25,
+}
+
+# escenario -> códigos que se cuentan como rechazo esperable y no como error
+RECHAZOS_ESPERADOS = {
+    "crear_cita": {400},
+    "confirmar_cita": {409},
+    "cancelar_cita": {409},
+}
+
+DIAS_RESERVA = 14
+DIAS_DISPONIBILIDAD = 3
+CALENTAMIENTO = ("servicios", "estilistas", "disponibilidad", "listar_citas")
+
+def parse_mezcla(valor: str) -> dict:
+    """"login=5,listar_citas=30" sobre los pesos por defecto; peso 0 quita el escenario"""
+    mezcla = dict(MEZCLA)
+    for parte in filter(None, valor.split(",")):
+        nombre, _, peso = parte.partition("=")
+        if nombre.strip() not in MEZCLA:
+            raise argparse.ArgumentTypeError(f"Escenario desconocido: {nombre}")
+        mezcla[nombre.strip()] = float(peso)
+    return {nombre: peso for nombre, peso in mezcla.items() if peso > 0}
+
+def preparar_entorno(ruta):
+    """Apunta el backend a la base de datos de la prueba antes de importarlo"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{ruta}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+
+def leer_base(ruta, referencia: datetime) -> dict:
+    """Usuarios, servicios y citas futuras de la base sobre los que se construye la mezcla"""
+    conexion = sqlite3.connect(ruta)
+    try:
+        clientes = conexion.execute("""
+            SELECT id, email FROM usuarios WHERE es_admin = 0 AND estilista_id IS NULL ORDER BY id
+        """).fetchall()
+        estilistas = conexion.execute("""
+            SELECT estilista_id, email FROM usuarios WHERE estilista_id IS NOT NULL ORDER BY estilista_id
+        """).fetchall()
+        servicios = [fila[0] for fila in conexion.execute("SELECT id FROM servicios WHERE activo = 1 ORDER BY id")]
+        citas = conexion.execute("""
+            SELECT id, cliente_id, estilista_id, estado FROM citas
+            WHERE fecha_hora > ? AND estado IN ('pendiente', 'confirmada') ORDER BY id
+        """, (referencia.isoformat(sep=" "),)).fetchall()
+    finally:
+        conexion.close()
+    return {"clientes": clientes, "estilistas": estilistas, "servicios": servicios, "citas": citas}
+
+def planificar(base, mezcla, num_peticiones, num_clientes, referencia: datetime, semilla) -> list:
+    """Lista de (escenario, actor, método, ruta, cuerpo) fijada por la semilla.
+
+    Los clientes activos son los num_clientes primeros; cada cita se
+    confirma o cancela como mucho una vez, así que las transiciones no
+    chocan entre sí y se pueden repetir sobre una base recién generada.
+    """
+    from generar_datos import HORA_APERTURA, HORA_CIERRE
+
+    rng = random.Random(semilla)
+    clientes = base["clientes"][:num_clientes]
+    correos = dict(base["clientes"])
+    estilistas = base["estilistas"]
+    correos_estilistas = dict(estilistas)
+    pendientes = [c for c in base["citas"] if c[3] == "pendiente"]
+    cambiables = list(base["citas"])
+    rng.shuffle(pendientes)
+    rng.shuffle(cambiables)
+    usadas = set()
+    hoy = referencia.date()
+
+    def siguiente_cita(candidatas):
+        while candidatas:
+            cita = candidatas.pop()
+            if cita[0] not in usadas:
+                usadas.add(cita[0])
+                return cita
+        return None
+
+    def dia_laborable(desde, hasta) -> date:
+        while True:
+            dia = hoy + timedelta(days=rng.randint(desde, hasta))
+            if dia.weekday() != 6:
+                return dia
+
+    nombres, pesos = zip(*mezcla.items())
+    plan = []
+    for escenario in rng.choices(nombres, pesos, k=num_peticiones):
+        cliente = ("cliente", rng.choice(clientes)[1])
+        if escenario == "login":
+            plan.append((escenario, None, "POST", "/api/auth/login",
+                         {"email": cliente[1], "password": PASSWORD_CLIENTE}))
+        elif escenario in ("servicios", "estilistas"):
+            plan.append((escenario, None, "GET", f"/api/{escenario}", None))
+        elif escenario == "disponibilidad":
+            desde = dia_laborable(1, DIAS_RESERVA)
+            hasta = desde + timedelta(days=rng.randint(0, DIAS_DISPONIBILIDAD - 1))
+            plan.append((escenario, None, "GET", f"/api/estilistas/disponibilidad?desde={desde}&hasta={hasta}"
+                         f"&servicio_id={rng.choice(base['servicios'])}", None))
+        elif escenario == "disponibilidad_estilista":
+            plan.append((escenario, None, "GET", f"/api/estilistas/{rng.choice(estilistas)[0]}/disponibilidad"
+                         f"?fecha={dia_laborable(1, DIAS_RESERVA)}", None))
+        elif escenario == "crear_cita":
+            minuto = HORA_APERTURA + 15 * rng.randrange((HORA_CIERRE - HORA_APERTURA - 60) // 15)
+            fecha_hora = datetime.combine(dia_laborable(1, DIAS_RESERVA), datetime.min.time()) + timedelta(minutes=minuto)
+            cuerpo = {"servicio_id": rng.choice(base["servicios"]), "fecha_hora": fecha_hora.isoformat(timespec="minutes")}
+            # La mitad elige estilista; la otra mitad deja que se asigne uno libre
+            if rng.random() < 0.5:
+                cuerpo["estilista_id"] = rng.choice(estilistas)[0]
+            plan.append((escenario, cliente, "POST", "/api/citas", cuerpo))
+        elif escenario == "confirmar_cita":
+            cita = siguiente_cita(pendientes)
+            if cita:
+                estilista = ("estilista", correos_estilistas[cita[2]])
+                plan.append((escenario, estilista, "PUT", f"/api/citas/{cita[0]}", {"estado": "confirmada"}))
+        elif escenario == "cancelar_cita":
+            cita = siguiente_cita(cambiables)
+            if cita:
+                plan.append((escenario, ("cliente", correos[cita[1]]), "PUT", f"/api/citas/{cita[0]}",
+                             {"estado": "cancelada"}))
+        elif escenario == "listar_citas":
+            if rng.random() < 0.7:
+                plan.append((escenario, cliente, "GET", "/api/citas", None))
+            else:
+                desde = hoy + timedelta(days=rng.randint(0, DIAS_RESERVA))
+                plan.append((escenario, ("estilista", rng.choice(estilistas)[1]), "GET",
+                             f"/api/citas?desde={desde}&hasta={desde + timedelta(days=6)}", None))
+    return plan
+
+def percentil(latencias, p):
+    return round(latencias[max(int(len(latencias) * p) - 1, 0)], 2)
+
+def resumir(medidas, segundos) -> dict:
+    """Rendimiento, latencias y errores de una lista de (latencia ms, código, escenario)"""
+    latencias = sorted(m[0] for m in medidas)
+    aceptadas = sum(1 for m in medidas if 200 <= m[1] < 400)
+    rechazadas = sum(1 for m in medidas if m[1] in RECHAZOS_ESPERADOS.get(m[2], ()))
+    errores = len(medidas) - aceptadas - rechazadas
+    return {
+        "peticiones": len(medidas),
+        "req_s": round(len(medidas) / segundos, 1),
+        "p50_ms": percentil(latencias, 0.50),
+        "p95_ms": percentil(latencias, 0.95),
+        "p99_ms": percentil(latencias, 0.99),
+        "aceptadas": aceptadas,
+        "rechazadas": rechazadas,
+        "errores": errores,
+        "errores_5xx": sum(1 for m in medidas if m[1] >= 500),
+        "tasa_errores": round(errores / len(medidas), 4),
+    }
+
+def crear_cliente_http(app, url):
+    import httpx
+
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=60)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://carga", timeout=60)
+
+async def iniciar_sesiones(cliente, plan, concurrencia) -> dict:
+    """Un token por actor del plan, obtenido antes de medir"""
+    actores = sorted({p[1] for p in plan if p[1]})
+    tokens = {}
+    cola = asyncio.Queue()
+    for actor in actores:
+        cola.put_nowait(actor)
+
+    async def trabajador():
+        while not cola.empty():
+            rol, email = cola.get_nowait()
+            password = PASSWORD_ESTILISTA if rol == "estilista" else PASSWORD_CLIENTE
+            r = await cliente.post("/api/auth/login", json={"email": email, "password": password})
+            r.raise_for_status()
+            tokens[(rol, email)] = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    return tokens
+
+async def ejecutar(app, url, plan, calentamiento, concurrencia):
+    async with crear_cliente_http(app, url) as cliente:
+        tokens = await iniciar_sesiones(cliente, plan + calentamiento, concurrencia)
+        medidas = []
+
+        async def recorrer(peticiones, registrar):
+            cola = asyncio.Queue()
+            for peticion in peticiones:
+                cola.put_nowait(peticion)
+
+            async def trabajador():
+                while not cola.empty():
+                    escenario, actor, metodo, ruta, cuerpo = cola.get_nowait()
+                    t0 = time.perf_counter()
+                    r = await cliente.request(metodo, ruta, json=cuerpo, headers=tokens.get(actor))
+                    if registrar:
+                        medidas.append(((time.perf_counter() - t0) * 1000, r.status_code, escenario))
+
+            inicio = time.perf_counter()
+            await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+            return time.perf_counter() - inicio
+
+        # Sin medir: llena las cachés del catálogo y el índice de disponibilidad
+        await recorrer(calentamiento, registrar=False)
+        segundos = await recorrer(plan, registrar=True)
+    return medidas, segundos
+
+def cargar_app(modo):
+    import backend_async
+    import backend_enhanced_v3_fixed as backend
+    from logging_config import configurar_logging
+
+    # Los errores del backend siguen a la vista sin mezclarse con la salida --json
+    configurar_logging(stream=sys.stderr)
+    return backend_async.app if modo == "async" else backend.app
+
+def _referencia(valor: str) -> datetime:
+    return datetime.strptime(valor, "%Y-%m-%d %H:%M")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de citas con una mezcla reproducible")
+    parser.add_argument("--peticiones", type=int, default=5000)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--calentamiento", type=int, default=200, help="peticiones de lectura sin medir antes de empezar")
+    parser.add_argument("--mezcla", type=parse_mezcla, default=dict(MEZCLA),
+                        help="pesos de los escenarios, p. ej. 'listar_citas=40,login=0'")
+    parser.add_argument("--clientes-activos", type=int, default=500, help="clientes distintos que hacen peticiones")
+    parser.add_argument("--app", choices=("sync", "async"), default="sync", help="backend síncrono o backend_async.py")
+    parser.add_argument("--url", default=None, help="servidor ya arrancado sobre --ruta en lugar de la app en proceso")
+    parser.add_argument("--ruta", default=None, help="base de datos SQLite; si no existe se genera (se modifica)")
+    parser.add_argument("--clientes", type=int, default=20000, help="clientes de la base generada")
+    parser.add_argument("--estilistas", type=int, default=30, help="estilistas de la base generada")
+    parser.add_argument("--anios", type=float, default=1, help="años de historial de la base generada")
+    parser.add_argument("--semilla", type=int, default=25, help="semilla de la base generada y de la mezcla")
+    parser.add_argument("--referencia", type=_referencia,
+                        default=datetime.combine(date.today(), datetime.min.time()),
+                        help="'ahora' de los datos (YYYY-MM-DD HH:MM); por defecto hoy a las 00:00")
+    parser.add_argument("--max-errores", type=float, default=0.0, help="tasa de errores admitida (0-1)")
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+    if args.url and not (args.ruta and os.path.exists(args.ruta)):
+        parser.error("--url requiere --ruta con la base de datos que usa el servidor")
+
+    ruta = args.ruta or os.path.join(tempfile.mkdtemp(prefix="paris_bench_"), "carga.db")
+    preparar_entorno(ruta)
+    generacion = None
+    if not os.path.exists(ruta):
+        from generar_datos import generar
+        if not args.json:
+            print(f"🔧 Generando {ruta} ({args.clientes} clientes, {args.estilistas} estilistas, semilla {args.semilla})...")
+        generacion = generar(ruta, args.clientes, args.estilistas, args.anios, args.semilla, 0.85, args.referencia)
+
+    base = leer_base(ruta, args.referencia)
+    plan = planificar(base, args.mezcla, args.peticiones, args.clientes_activos, args.referencia, args.semilla)
+    calentamiento = planificar(base, {e: MEZCLA[e] for e in CALENTAMIENTO}, args.calentamiento,
+                               args.clientes_activos, args.referencia, args.semilla + 1)
+    app = None if args.url else cargar_app(args.app)
+    medidas, segundos = asyncio.run(ejecutar(app, args.url, plan, calentamiento, args.concurrencia))
+
+    total = resumir(medidas, segundos)
+    escenarios = {
+        nombre: resumir([m for m in medidas if m[2] == nombre], segundos)
+        for nombre in args.mezcla if any(m[2] == nombre for m in medidas)
+    }
+    correcto = total["errores_5xx"] == 0 and total["tasa_errores"] <= args.max_errores
+    resultado = {
+        "base": {"ruta": ruta, "clientes": len(base["clientes"]), "estilistas": len(base["estilistas"]),
+                 "citas_futuras": len(base["citas"]), "generacion_s": generacion["total_s"] if generacion else None},
+        "app": args.url or args.app,
+        "semilla": args.semilla,
+        "referencia": args.referencia.isoformat(sep=" "),
+        "mezcla": args.mezcla,
+        "concurrencia": args.concurrencia,
+        "duracion_s": round(segundos, 2),
+        **total,
+        "escenarios": escenarios,
+        "correcto": correcto,
+    }
+
+    if args.json:
+        print(json.dumps(resultado))
+    else:
+        print(f"📊 {total['peticiones']} peticiones contra {resultado['app']}, concurrencia {args.concurrencia}, "
+              f"{len(base['clientes'])} clientes y {len(base['citas'])} citas futuras en la base")
+        print(f"{'escenario':<26} {'peticiones':>10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'rechazadas':>10} {'errores':>8}")
+        for nombre, e in list(escenarios.items()) + [("total", total)]:
+            print(f"{nombre:<26} {e['peticiones']:>10} {e['req_s']:>8} {e['p50_ms']:>8} {e['p95_ms']:>8} "
+                  f"{e['p99_ms']:>8} {e['rechazadas']:>10} {e['errores']:>8}")
+        print(f"\n{'✅' if total['errores_5xx'] == 0 else '❌'} Sin errores 5xx")
+        print(f"{'✅' if total['tasa_errores'] <= args.max_errores else '❌'} "
+              f"Tasa de errores {total['tasa_errores']:.2%} (máximo {args.max_errores:.2%})")
+    if not correcto:
+        sys.exit(1)
@@ -0,0 +1,108 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import httpx
+import backend_enhanced_v3_fixed as backend
+from sqlalchemy import insert
+
+def sembrar(num_servicios, num_estilistas):
+    db = backend.SessionLocal()
+    try:
+        db.execute(insert(backend.Servicio), [
+            {"nombre": f"Servicio {i}", "descripcion": "Descripción del servicio " * 4, "precio": 2500000,
+             "duracion_minutos": 30 + i % 4 * 15, "categoria": "Cabello", "activo": True}
+            for i in range(num_servicios)
+        ])
+        db.execute(insert(backend.Estilista), [
+            {"nombre": f"Estilista {i}", "especialidades": "Corte, Color, Peinado", "activo": True}
+            for i in range(num_estilistas)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+async def ejecutar_modo(nombre, peticiones, concurrencia, condicional):
+    transporte = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        etags = {}
+        for ruta in ("/api/servicios", "/api/estilistas"):
+            etags[ruta] = (await cliente.get(ruta)).headers["etag"]
+
+        rutas = ["/api/servicios", "/api/estilistas"] * (peticiones // 2)
+        estados = {}
+
+        async def trabajador(inicio):
+            for ruta in rutas[inicio::concurrencia]:
+                cabeceras = {"If-None-Match": etags[ruta]} if condicional else {}
+                r = await cliente.get(ruta, headers=cabeceras)
+                estados[r.status_code] = estados.get(r.status_code, 0) + 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(trabajador(i) for i in range(concurrencia)))
+        total = time.perf_counter() - t0
+
+    return {"modo": nombre, "req_s": round(len(rutas) / total, 1), "estados": estados}
+
+def benchmark_catalogo(peticiones, concurrencia):
+    resultados = []
+    # TTL 0: cada petición vuelve a consultar y serializar, como antes del cache
+    backend.cache_catalogo.ttl_segundos = 0
+    resultados.append(asyncio.run(ejecutar_modo("sin cache", peticiones, concurrencia, False)))
+    backend.cache_catalogo.ttl_segundos = 300
+    resultados.append(asyncio.run(ejecutar_modo("cache 200", peticiones, concurrencia, False)))
+    resultados.append(asyncio.run(ejecutar_modo("cache 304", peticiones, concurrencia, True)))
+    return resultados
+
+def verificar_invalidacion():
+    """Un cambio confirmado en un servicio debe cambiar el ETag en la siguiente petición"""
+    async def comprobar():
+        transporte = httpx.ASGITransport(app=backend.app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+            antes = (await cliente.get("/api/servicios")).headers["etag"]
+            db = backend.SessionLocal()
+            try:
+                db.get(backend.Servicio, 1).precio += 1
+                db.commit()
+            finally:
+                db.close()
+            r = await cliente.get("/api/servicios", headers={"If-None-Match": antes})
+            return r.status_code == 200 and r.headers["etag"] != antes
+    return asyncio.run(comprobar())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="req/s de /api/servicios y /api/estilistas con y sin cache")
+    parser.add_argument("--peticiones", type=int, default=4000)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--servicios", type=int, default=40)
+    parser.add_argument("--estilistas", type=int, default=30)
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    sembrar(args.servicios, args.estilistas)
+    resultados = benchmark_catalogo(args.peticiones, args.concurrencia)
+    invalidacion = verificar_invalidacion()
+
+    if args.json:
+        print(json.dumps({"resultados": resultados, "invalidacion_correcta": invalidacion}))
+    else:
+        print(f"📊 {args.peticiones} peticiones de catálogo, concurrencia {args.concurrencia}")
+        print(f"{'modo':<10} {'req/s':>8}  estados")
+        for r in resultados:
+            print(f"{r['modo']:<10} {r['req_s']:>8}  {r['estados']}")
+        print(f"\n{'✅' if invalidacion else '❌'} Invalidación del ETag tras modificar un servicio")
+    if not invalidacion:
+        sys.exit(1)
@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import httpx
+import backend_enhanced_v3_fixed as backend
+from sqlalchemy import event, insert
+
+DURACIONES = [30, 45, 60, 90, 120]
+
+class ContadorConsultas:
+    def __init__(self, engine):
+        self.total = 0
+        event.listen(engine, "before_cursor_execute", self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+def sembrar(num_estilistas, dias, semilla):
+    """Agenda realista: citas sin solaparse por estilista, algunas canceladas y alguna que pasa de la medianoche"""
+    rng = random.Random(semilla)
+    db = backend.SessionLocal()
+    try:
+        db.execute(insert(backend.Estilista), [{"nombre": f"Estilista {i}", "activo": True} for i in range(num_estilistas)])
+        db.execute(insert(backend.Servicio), [
+            {"nombre": f"Servicio {d}", "precio": 2500000, "duracion_minutos": d, "activo": True} for d in DURACIONES
+        ])
+        db.execute(insert(backend.Usuario), [{"nombre": "Cliente", "email": "c@bench.com", "telefono": "0", "password_hash": "x"}])
+        inicio = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+        citas = []
+        for estilista in range(1, num_estilistas + 1):
+            momento = inicio + timedelta(hours=7, minutes=rng.randrange(0, 120, 5))
+            fin_rango = inicio + timedelta(days=dias)
+            while momento < fin_rango:
+                servicio = rng.randrange(len(DURACIONES))
+                duracion = DURACIONES[servicio]
+                citas.append({
+                    "cliente_id": 1, "estilista_id": estilista, "servicio_id": servicio + 1,
+                    "fecha_hora": momento, "fecha_fin": momento + timedelta(minutes=duracion),
+                    "estado": rng.choices(["pendiente", "confirmada", "cancelada"], [4, 4, 1])[0],
+                    "precio_total": 2500000, "fecha_creacion": inicio
+                })
+                momento += timedelta(minutes=duracion + rng.randrange(0, 180, 5))
+        db.execute(insert(backend.Cita), citas)
+        db.commit()
+        return inicio.date(), citas
+    finally:
+        db.close()
+
+def referencia(citas, num_estilistas, desde, dias, duracion):
+    """Huecos calculados franja a franja en Python puro, para validar el endpoint"""
+    apertura = backend.minutos_del_dia(backend.HORA_APERTURA)
+    cierre = backend.minutos_del_dia(backend.HORA_CIERRE)
+    por_estilista = {}
+    for c in citas:
+        if c["estado"] != "cancelada":
+            por_estilista.setdefault(c["estilista_id"], []).append((c["fecha_hora"], c["fecha_fin"]))
+    resultado = {}
+    for estilista in range(1, num_estilistas + 1):
+        ocupadas = por_estilista.get(estilista, [])
+        for d in range(dias):
+            dia = datetime.combine(desde + timedelta(days=d), datetime.min.time())
+            libres = []
+            for minuto in range(apertura, cierre - duracion + 1, backend.MINUTOS_FRANJA):
+                inicio = dia + timedelta(minutes=minuto)
+                fin = inicio + timedelta(minutes=duracion)
+                if not any(o_inicio < fin and o_fin > inicio for o_inicio, o_fin in ocupadas):
+                    libres.append(f"{minuto // 60:02d}:{minuto % 60:02d}")
+            resultado[(estilista, (desde + timedelta(days=d)).isoformat())] = libres
+    return resultado
+
+async def medir(num_estilistas, desde, dias, servicio_id, contador):
+    transporte = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        hasta = desde + timedelta(days=dias - 1)
+        # En un servidor en marcha el catálogo ya está en cache
+        await cliente.get("/api/estilistas")
+        await cliente.get("/api/servicios")
+
+        antes = contador.total
+        t0 = time.perf_counter()
+        for estilista in range(1, num_estilistas + 1):
+            for d in range(dias):
+                fecha = (desde + timedelta(days=d)).isoformat()
+                await cliente.get(f"/api/estilistas/{estilista}/disponibilidad", params={"fecha": fecha})
+        individual = {"ms": (time.perf_counter() - t0) * 1000, "peticiones": num_estilistas * dias,
+                      "consultas": contador.total - antes}
+
+        antes = contador.total
+        t0 = time.perf_counter()
+        r = await cliente.get("/api/estilistas/disponibilidad", params={
+            "desde": desde.isoformat(), "hasta": hasta.isoformat(), "servicio_id": servicio_id
+        })
+        cuadricula = {"ms": (time.perf_counter() - t0) * 1000, "peticiones": 1, "consultas": contador.total - antes}
+        return individual, cuadricula, r.json()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cuadrícula de disponibilidad frente a una llamada por estilista y día")
+    parser.add_argument("--estilistas", type=int, default=30)
+    parser.add_argument("--dias", type=int, default=60)
+    parser.add_argument("--servicio", type=int, default=3, help="servicio_id (1..5 = 30, 45, 60, 90, 120 min)")
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    desde, citas = sembrar(args.estilistas, args.dias, args.semilla)
+    contador = ContadorConsultas(backend.engine)
+    individual, cuadricula, respuesta = asyncio.run(medir(args.estilistas, desde, args.dias, args.servicio, contador))
+
+    esperado = referencia(citas, args.estilistas, desde, args.dias, DURACIONES[args.servicio - 1])
+    obtenido = {
+        (e["estilista_id"], fecha): horas for e in respuesta["estilistas"] for fecha, horas in e["dias"].items()
+    }
+    correcto = obtenido == esperado
+
+    resultados = {"citas": len(citas), "por_estilista_y_dia": individual, "cuadricula": cuadricula,
+                  "coincide_con_referencia": correcto}
+    if args.json:
+        print(json.dumps(resultados))
+    else:
+        print(f"📊 {args.estilistas} estilistas x {args.dias} días, {len(citas)} citas, "
+              f"servicio de {DURACIONES[args.servicio - 1]} min")
+        print(f"{'modo':<22} {'peticiones':>10} {'consultas':>10} {'ms':>10}")
+        for nombre, r in (("por estilista y día", individual), ("cuadrícula", cuadricula)):
+            print(f"{nombre:<22} {r['peticiones']:>10} {r['consultas']:>10} {r['ms']:>10.1f}")
+        print(f"\n{'✅' if correcto else '❌'} Huecos idénticos a la referencia en Python puro")
+    if not correcto:
+        sys.exit(1)
@@ -0,0 +1,219 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import httpx
+import uvicorn
+import backend_enhanced_v3_fixed as backend
+from sqlalchemy import event, insert
+
+class ContadorConsultas:
+    def __init__(self, engine):
+        self.total = 0
+        event.listen(engine, "before_cursor_execute", self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+def sembrar(num_estilistas, num_clientes, citas_historicas):
+    db = backend.SessionLocal()
+    try:
+        password_hash = backend.hash_password("clave123")
+        db.execute(insert(backend.Estilista), [{"nombre": f"Estilista {i}", "activo": True} for i in range(num_estilistas)])
+        db.execute(insert(backend.Servicio), [{"nombre": "Corte", "precio": 2500000, "duracion_minutos": 30, "activo": True}])
+        db.execute(insert(backend.Usuario), [
+            {"nombre": f"Estilista {i}", "email": f"estilista{i}@bench.com", "telefono": "0",
+             "password_hash": password_hash, "es_estilista": True, "estilista_id": i + 1}
+            for i in range(num_estilistas)
+        ] + [
+            {"nombre": f"Cliente {i}", "email": f"cliente{i}@bench.com", "telefono": "0", "password_hash": password_hash}
+            for i in range(num_clientes)
+        ])
+        base = datetime.combine(datetime.now().date() - timedelta(days=365), datetime.min.time())
+        db.execute(insert(backend.Cita), [
+            {"cliente_id": num_estilistas + 1 + i % num_clientes, "estilista_id": (i % num_estilistas) + 1,
+             "servicio_id": 1, "fecha_hora": base + timedelta(minutes=30 * i),
+             "fecha_fin": base + timedelta(minutes=30 * i + 30), "estado": "completada",
+             "precio_total": 2500000, "fecha_creacion": base}
+            for i in range(citas_historicas)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+def iniciar_servidor():
+    """Servidor real en un hilo: ASGITransport no entrega respuestas en streaming"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        puerto = s.getsockname()[1]
+    servidor = uvicorn.Server(uvicorn.Config(
+        backend.app, host="127.0.0.1", port=puerto, log_config=None, timeout_graceful_shutdown=1
+    ))
+    threading.Thread(target=servidor.run, daemon=True).start()
+    while not servidor.started:
+        time.sleep(0.05)
+    return servidor, f"http://127.0.0.1:{puerto}"
+
+async def iniciar_sesion(cliente, email):
+    r = await cliente.post("/api/auth/login", json={"email": email, "password": "clave123"})
+    return r.json()["access_token"]
+
+async def escritor(cliente, token, reservas, duracion, dia, creadas):
+    """Reservas repartidas a lo largo de la prueba, con asignación automática de estilista"""
+    cabeceras = {"Authorization": f"Bearer {token}"}
+    for i in range(reservas):
+        await asyncio.sleep(duracion / (reservas + 1))
+        fecha = dia + timedelta(minutes=30 * i)
+        enviada = time.perf_counter()
+        r = await cliente.post("/api/citas", json={"servicio_id": 1, "fecha_hora": fecha.isoformat()}, headers=cabeceras)
+        creadas[r.json()["cita_id"]] = enviada
+
+async def modo_polling(url, tokens, token_cliente, reservas, duracion, intervalo, dia, contador):
+    limites = httpx.Limits(max_connections=len(tokens) + 8)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=30) as cliente:
+        creadas = {}
+        vistos = {}
+        peticiones = 0
+
+        async def sondear(token):
+            nonlocal peticiones
+            cabeceras = {"Authorization": f"Bearer {token}"}
+            fin = time.perf_counter() + duracion
+            while time.perf_counter() < fin:
+                r = await cliente.get("/api/citas", params={"desde": dia.date().isoformat()}, headers=cabeceras)
+                peticiones += 1
+                for cita in r.json():
+                    vistos.setdefault(cita["id"], time.perf_counter())
+                await asyncio.sleep(intervalo)
+
+        antes = contador.total
+        await asyncio.gather(
+            escritor(cliente, token_cliente, reservas, duracion, dia, creadas),
+            *(sondear(token) for token in tokens)
+        )
+        latencias = [vistos[c] - t for c, t in creadas.items() if c in vistos]
+        return {"modo": "polling", "consultas": contador.total - antes, "peticiones_lectura": peticiones,
+                "eventos_recibidos": len(latencias), "latencia_media_ms": media_ms(latencias)}
+
+async def modo_sse(url, tokens, token_cliente, reservas, duracion, dia, contador):
+    limites = httpx.Limits(max_connections=len(tokens) + 8)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=None) as cliente:
+        creadas = {}
+        recibidos = {}
+        entregas = 0
+
+        async def escuchar(token, listo):
+            nonlocal entregas
+            # Como EventSource en el navegador: token de un minuto en la URL
+            r = await cliente.post("/api/citas/eventos/token", headers={"Authorization": f"Bearer {token}"})
+            async with cliente.stream("GET", "/api/citas/eventos", params={"token": r.json()["token"]}) as r:
+                listo.set()
+                async for linea in r.aiter_lines():
+                    if linea.startswith("data: "):
+                        recibidos[json.loads(linea[6:])["cita_id"]] = time.perf_counter()
+                        entregas += 1
+
+        listos = [asyncio.Event() for _ in tokens]
+        oyentes = [asyncio.create_task(escuchar(token, listo)) for token, listo in zip(tokens, listos)]
+        await asyncio.gather(*(listo.wait() for listo in listos))
+
+        antes = contador.total
+        await escritor(cliente, token_cliente, reservas, duracion, dia, creadas)
+        await asyncio.sleep(0.5)
+        consultas = contador.total - antes
+        for oyente in oyentes:
+            oyente.cancel()
+        await asyncio.gather(*oyentes, return_exceptions=True)
+
+        latencias = [recibidos[c] - t for c, t in creadas.items() if c in recibidos]
+        return {"modo": "sse", "consultas": consultas, "peticiones_lectura": len(tokens),
+                "eventos_recibidos": len(latencias), "latencia_media_ms": media_ms(latencias),
+                # Cada cita solo debe llegar a su estilista
+                "filtrado_correcto": entregas == len(creadas)}
+
+async def conexiones_inactivas(url, tokens, total):
+    """Abre `total` conexiones SSE sin tráfico y mide los hilos del servidor"""
+    hilos_antes = threading.active_count()
+    limites = httpx.Limits(max_connections=total + 8)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=None) as cliente:
+        listos = [asyncio.Event() for _ in range(total)]
+
+        async def abrir(token, listo):
+            async with cliente.stream("GET", "/api/citas/eventos", headers={"Authorization": f"Bearer {token}"}) as r:
+                listo.set()
+                async for _ in r.aiter_lines():
+                    pass
+
+        tareas = [asyncio.create_task(abrir(tokens[i % len(tokens)], listo)) for i, listo in enumerate(listos)]
+        await asyncio.gather(*(listo.wait() for listo in listos))
+        await asyncio.sleep(0.5)
+        resultado = {"conexiones": backend.bus_citas.conexiones, "hilos_extra": threading.active_count() - hilos_antes}
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        return resultado
+
+def media_ms(valores):
+    return round(sum(valores) / len(valores) * 1000, 1) if valores else None
+
+async def ejecutar(args, url, contador):
+    async with httpx.AsyncClient(base_url=url, timeout=30) as cliente:
+        tokens = [await iniciar_sesion(cliente, f"estilista{i}@bench.com") for i in range(args.estilistas)]
+        token_cliente = await iniciar_sesion(cliente, "cliente0@bench.com")
+        tokens_clientes = [await iniciar_sesion(cliente, f"cliente{i}@bench.com") for i in range(args.clientes)]
+
+    dia = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+    polling = await modo_polling(url, tokens, token_cliente, args.reservas, args.duracion, args.intervalo, dia, contador)
+    sse = await modo_sse(url, tokens, token_cliente, args.reservas, args.duracion, dia + timedelta(days=2), contador)
+    inactivas = await conexiones_inactivas(url, tokens_clientes, args.inactivas)
+    return [polling, sse], inactivas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consultas a la base de datos: polling de GET /api/citas frente a SSE")
+    parser.add_argument("--estilistas", type=int, default=30, help="estilistas conectados a la vez")
+    parser.add_argument("--clientes", type=int, default=50)
+    parser.add_argument("--reservas", type=int, default=20, help="citas creadas durante la prueba")
+    parser.add_argument("--duracion", type=float, default=10, help="segundos de prueba por modo")
+    parser.add_argument("--intervalo", type=float, default=1, help="segundos entre sondeos en modo polling")
+    parser.add_argument("--historicas", type=int, default=20000)
+    parser.add_argument("--inactivas", type=int, default=500, help="conexiones SSE inactivas a sostener")
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    sembrar(args.estilistas, args.clientes, args.historicas)
+    servidor, url = iniciar_servidor()
+    contador = ContadorConsultas(backend.engine)
+    try:
+        resultados, inactivas = asyncio.run(ejecutar(args, url, contador))
+    finally:
+        servidor.should_exit = True
+    if not resultados[1]["filtrado_correcto"]:
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps({"resultados": resultados, "inactivas": inactivas}))
+    else:
+        print(f"📊 {args.estilistas} estilistas durante {args.duracion:.0f} s, {args.reservas} reservas, "
+              f"polling cada {args.intervalo} s")
+        print(f"{'modo':<8} {'consultas':>10} {'lecturas':>9} {'eventos':>8} {'latencia ms':>12}")
+        for r in resultados:
+            print(f"{r['modo']:<8} {r['consultas']:>10} {r['peticiones_lectura']:>9} {r['eventos_recibidos']:>8} "
+                  f"{r['latencia_media_ms']!s:>12}")
+        print(f"\n{'✅' if resultados[1]['filtrado_correcto'] else '❌'} Cada evento llegó solo al estilista asignado")
+        print(f"🔌 {inactivas['conexiones']} conexiones SSE inactivas, {inactivas['hilos_extra']} hilos extra en el servidor")
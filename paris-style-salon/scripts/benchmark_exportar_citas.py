@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def preparar_entorno(db_path=None):
+    """Apunta el backend a la base de datos del benchmark antes de importarlo"""
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="paris_bench_"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    return db_path
+
+def sembrar(db_path, filas):
+    """Inserta `filas` citas con el driver sqlite3 en una sola transacción"""
+    preparar_entorno(db_path)
+    import backend_enhanced_v3_fixed as backend
+
+    conn = backend.engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany("INSERT INTO estilistas (nombre, activo) VALUES (?, 1)", [(f"Estilista {i}",) for i in range(10)])
+        cursor.execute("INSERT INTO servicios (nombre, precio, duracion_minutos, activo) VALUES ('Corte', 2500000, 45, 1)")
+        cursor.execute("""
+            INSERT INTO usuarios (nombre, email, telefono, password_hash, es_admin, es_estilista)
+            VALUES ('Administrador', 'admin@bench.com', '0', 'x', 1, 0)
+        """)
+        base = datetime(2020, 1, 1, 8)
+        formato = "%Y-%m-%d %H:%M:%S.%f"
+        cursor.executemany("""
+            INSERT INTO citas (cliente_id, estilista_id, servicio_id, fecha_hora, fecha_fin, estado,
+                               notas, precio_total, fecha_creacion, fecha_actualizacion)
+            VALUES (1, ?, 1, ?, ?, 'completada', 'Cliente frecuente', 2500000, ?, ?)
+        """, (
+            ((i % 10) + 1,
+             (base + timedelta(minutes=15 * i)).strftime(formato),
+             (base + timedelta(minutes=15 * i + 45)).strftime(formato),
+             base.strftime(formato), base.strftime(formato))
+            for i in range(filas)
+        ))
+        conn.commit()
+    finally:
+        conn.close()
+
+def medir_modo(db_path, modo):
+    """Se ejecuta en un proceso aparte para que el pico de memoria sea solo de este modo"""
+    preparar_entorno(db_path)
+    import backend_enhanced_v3_fixed as backend
+
+    db = backend.SessionLocal()
+    admin = db.query(backend.Usuario).filter(backend.Usuario.es_admin == True).first()
+    rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    inicio = time.perf_counter()
+    bytes_emitidos = 0
+    if modo == "lista":
+        # Lo que hacía la rama de administrador: materializar todo y serializar
+        citas = backend.consulta_citas(db, admin).all()
+        resultado = [backend.cita_a_dict(c, admin) for c in citas]
+        bytes_emitidos = len(json.dumps(resultado, ensure_ascii=False))
+    else:
+        for fragmento in backend.generar_exportacion_citas(admin, None, None, modo):
+            bytes_emitidos += len(fragmento)
+    segundos = time.perf_counter() - inicio
+    db.close()
+
+    rss_final = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "modo": modo,
+        "segundos": round(segundos, 2),
+        "mb_emitidos": round(bytes_emitidos / 1e6, 1),
+        "pico_rss_mb": round(rss_final / 1024, 1),
+        "crecimiento_rss_mb": round((rss_final - rss_inicial) / 1024, 1),
+    }))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memoria y tiempo de la exportación de citas")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--modo", choices=["lista", "json", "ndjson"])
+    parser.add_argument("--db")
+    args = parser.parse_args()
+
+    if args.modo:
+        medir_modo(args.db, args.modo)
+        sys.exit(0)
+
+    db_path = preparar_entorno()
+    print(f"🌱 Sembrando {args.filas} citas en {db_path}...")
+    inicio = time.perf_counter()
+    sembrar(db_path, args.filas)
+    print(f"✅ Sembrado en {time.perf_counter() - inicio:.1f}s")
+
+    print(f"{'modo':<8} {'segundos':>9} {'MB JSON':>8} {'pico RSS MB':>12} {'crecimiento MB':>15}")
+    for modo in ["lista", "json", "ndjson"]:
+        salida = subprocess.run(
+            [sys.executable, __file__, "--modo", modo, "--db", db_path],
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        r = json.loads(salida)
+        print(f"{r['modo']:<8} {r['segundos']:>9} {r['mb_emitidos']:>8} {r['pico_rss_mb']:>12} {r['crecimiento_rss_mb']:>15}")
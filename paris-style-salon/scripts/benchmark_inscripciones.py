@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import httpx
+import backend_enhanced_v3_fixed as backend
+from sqlalchemy import insert, text
+
+def sembrar(num_usuarios, num_cursos, cupo):
+    db = backend.SessionLocal()
+    try:
+        db.execute(insert(backend.Usuario), [{
+            "nombre": f"Alumna {i}", "email": f"alumna{i}@bench.com", "telefono": "0",
+            "password_hash": hashlib.sha256("alumna123".encode()).hexdigest()
+        } for i in range(num_usuarios)])
+        db.execute(insert(backend.Curso), [
+            {"nombre": f"Curso {i}", "precio": 20000000, "fecha": date.today() + timedelta(days=30),
+             "horario": "09:00-13:00", "cupo": cupo, "inscritos": 0, "activo": True}
+            for i in range(num_cursos)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+def verificar(cursos, aceptadas) -> dict:
+    """Ningún curso por encima del cupo y el contador igual a las inscripciones guardadas"""
+    db = backend.SessionLocal()
+    try:
+        filas = db.execute(text("""
+            SELECT c.id, c.cupo, c.inscritos,
+                   (SELECT COUNT(*) FROM inscripciones_cursos i WHERE i.curso_id = c.id) AS guardadas
+            FROM cursos c WHERE c.id IN (SELECT value FROM json_each(:ids))
+        """), {"ids": json.dumps(cursos)}).all()
+        sobrevendidos = sum(1 for f in filas if f.inscritos > f.cupo or f.guardadas > f.cupo)
+        descuadrados = sum(1 for f in filas if f.inscritos != f.guardadas)
+        guardadas = sum(f.guardadas for f in filas)
+        return {
+            "cursos_llenos": sum(1 for f in filas if f.inscritos == f.cupo),
+            "cursos_sobrevendidos": sobrevendidos,
+            "contadores_descuadrados": descuadrados,
+            "inscripciones_guardadas": guardadas,
+            "correcto": sobrevendidos == 0 and descuadrados == 0 and guardadas == aceptadas,
+        }
+    finally:
+        db.close()
+
+def percentil(latencias, p):
+    return round(latencias[max(int(len(latencias) * p) - 1, 0)], 2)
+
+async def avalancha(num_usuarios, cursos, concurrencia, reintentos, semilla) -> dict:
+    """Cada usuaria intenta inscribirse en un curso; una parte repite la petición (doble clic)"""
+    rng = random.Random(semilla)
+    transporte = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        tokens = []
+        for i in range(num_usuarios):
+            r = await cliente.post("/api/auth/login", json={"email": f"alumna{i}@bench.com", "password": "alumna123"})
+            tokens.append(r.json()["access_token"])
+
+        peticiones = [(token, rng.choice(cursos)) for token in tokens]
+        peticiones += rng.sample(peticiones, int(len(peticiones) * reintentos))
+        rng.shuffle(peticiones)
+        cola = asyncio.Queue()
+        for peticion in peticiones:
+            cola.put_nowait(peticion)
+        latencias, codigos = [], {}
+
+        async def trabajador():
+            while not cola.empty():
+                token, curso_id = cola.get_nowait()
+                t0 = time.perf_counter()
+                r = await cliente.post(f"/api/cursos/{curso_id}/inscripciones", headers={"Authorization": f"Bearer {token}"})
+                latencias.append((time.perf_counter() - t0) * 1000)
+                codigos[r.status_code] = codigos.get(r.status_code, 0) + 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+        total = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "peticiones": len(latencias),
+        "req_s": round(len(latencias) / total, 1),
+        "p50_ms": percentil(latencias, 0.50),
+        "p95_ms": percentil(latencias, 0.95),
+        "p99_ms": percentil(latencias, 0.99),
+        "aceptadas": codigos.get(200, 0),
+        "rechazadas": codigos.get(409, 0),
+        "errores": sum(n for codigo, n in codigos.items() if codigo not in (200, 409)),
+    }
+
+def inscribir_contando(num_usuarios, curso_id, hilos) -> int:
+    """La forma ingenua (COUNT(*) de inscripciones, comparar con el cupo e insertar) desde varios hilos.
+
+    Devuelve cuántas inscripciones quedaron guardadas en el curso.
+    """
+    def trabajador(indice):
+        db = backend.SessionLocal()
+        try:
+            for usuario_id in range(indice + 1, num_usuarios + 1, hilos):
+                ocupadas = db.execute(text("SELECT COUNT(*) FROM inscripciones_cursos WHERE curso_id = :curso_id"),
+                                      {"curso_id": curso_id}).scalar()
+                cupo = db.execute(text("SELECT cupo FROM cursos WHERE id = :curso_id"), {"curso_id": curso_id}).scalar()
+                if ocupadas < cupo:
+                    db.execute(text("""
+                        INSERT INTO inscripciones_cursos (curso_id, usuario_id, fecha_inscripcion)
+                        VALUES (:curso_id, :usuario_id, :fecha)
+                    """), {"curso_id": curso_id, "usuario_id": usuario_id, "fecha": datetime.now().isoformat(" ")})
+                    db.commit()
+        finally:
+            db.close()
+
+    trabajadores = [threading.Thread(target=trabajador, args=(i,)) for i in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    db = backend.SessionLocal()
+    try:
+        return db.execute(text("SELECT COUNT(*) FROM inscripciones_cursos WHERE curso_id = :curso_id"),
+                          {"curso_id": curso_id}).scalar()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Avalancha de inscripciones a cursos: sin sobreventa y latencia p99")
+    parser.add_argument("--usuarios", type=int, default=1000)
+    parser.add_argument("--cursos", type=int, default=4)
+    parser.add_argument("--cupo", type=int, default=40)
+    parser.add_argument("--concurrencia", type=int, default=64)
+    parser.add_argument("--reintentos", type=float, default=0.2, help="fracción de peticiones repetidas por la misma usuaria")
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    # El último curso queda para la referencia ingenua
+    sembrar(args.usuarios, args.cursos + 1, args.cupo)
+    cursos = list(range(1, args.cursos + 1))
+    medida = asyncio.run(avalancha(args.usuarios, cursos, args.concurrencia, args.reintentos, semilla=22))
+    medida.update(verificar(cursos, medida["aceptadas"]))
+    # Con bastantes más usuarias que plazas, todos los cursos deben llenarse
+    llenos = medida["cursos_llenos"] == args.cursos or args.usuarios < 2 * args.cupo * args.cursos
+    guardadas_contando = inscribir_contando(args.usuarios, args.cursos + 1, args.concurrencia)
+
+    correcto = medida["correcto"] and medida["errores"] == 0
+    resultado = {
+        "usuarios": args.usuarios, "cursos": args.cursos, "cupo": args.cupo, "concurrencia": args.concurrencia,
+        **medida,
+        "contando_inscripciones": {"cupo": args.cupo, "guardadas": guardadas_contando},
+    }
+
+    if args.json:
+        print(json.dumps(resultado))
+    else:
+        print(f"📊 {medida['peticiones']} inscripciones de {args.usuarios} usuarias a {args.cursos} cursos "
+              f"de {args.cupo} plazas, concurrencia {args.concurrencia}")
+        print(f"   {medida['req_s']} req/s, p50 {medida['p50_ms']} ms, p95 {medida['p95_ms']} ms, p99 {medida['p99_ms']} ms")
+        print(f"   {medida['aceptadas']} aceptadas, {medida['rechazadas']} rechazadas (curso lleno o repetida), "
+              f"{medida['errores']} errores")
+        print(f"\n   Contando inscripciones antes de insertar: {guardadas_contando} guardadas para {args.cupo} plazas")
+        print(f"\n{'✅' if medida['cursos_sobrevendidos'] == 0 else '❌'} Ningún curso supera su cupo")
+        print(f"{'✅' if medida['contadores_descuadrados'] == 0 and medida['correcto'] else '❌'} "
+              f"Los contadores coinciden con las inscripciones guardadas y aceptadas")
+        print(f"{'✅' if llenos else '❌'} {medida['cursos_llenos']} de {args.cursos} cursos llenos")
+        print(f"{'✅' if medida['errores'] == 0 else '❌'} Sin errores bajo concurrencia")
+    if not (correcto and llenos):
+        sys.exit(1)
@@ -0,0 +1,146 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    return directorio
+
+DIRECTORIO = preparar_entorno()
+
+import httpx
+import backend_enhanced_v3_fixed as backend
+import logging_config
+from sqlalchemy import insert
+
+def sembrar(num_estilistas):
+    db = backend.SessionLocal()
+    try:
+        db.execute(insert(backend.Estilista), [{"nombre": f"Estilista {i}", "activo": True} for i in range(num_estilistas)])
+        db.execute(insert(backend.Servicio), [{"nombre": "Corte", "precio": 2500000, "duracion_minutos": 30, "activo": True}])
+        db.execute(insert(backend.Usuario), [{
+            "nombre": "Cliente", "email": "cliente@bench.com", "telefono": "0",
+            "password_hash": hashlib.sha256("cliente123".encode()).hexdigest()
+        }])
+        db.commit()
+    finally:
+        db.close()
+
+class SalidaLenta:
+    """Archivo que tarda un poco en aceptar cada escritura, como un terminal o un pipe con el lector atrasado"""
+
+    def __init__(self, archivo, latencia_ms):
+        self.archivo = archivo
+        self.latencia = latencia_ms / 1000
+
+    def write(self, texto):
+        time.sleep(self.latencia)
+        return self.archivo.write(texto)
+
+    def flush(self):
+        self.archivo.flush()
+
+def configurar_sincrono(archivo):
+    """Equivalente a los print() anteriores: cada mensaje DEBUG se escribe en el hilo de la petición"""
+    logging_config.detener_logging()
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    handler = logging.StreamHandler(archivo)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    raiz.addHandler(handler)
+    raiz.setLevel(logging.DEBUG)
+
+MODOS = {
+    "sin logging": lambda archivo: logging_config.configurar_logging(nivel="CRITICAL", niveles={}, stream=archivo),
+    "síncrono DEBUG": configurar_sincrono,
+    "cola JSON INFO": lambda archivo: logging_config.configurar_logging(nivel="INFO", niveles={}, stream=archivo),
+    "cola JSON DEBUG 1%": lambda archivo: logging_config.configurar_logging(
+        nivel="DEBUG", niveles={}, muestreo_debug=0.01, stream=archivo),
+}
+
+async def ejecutar_modo(peticiones, base):
+    transporte = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        r = await cliente.post("/api/auth/login", json={"email": "cliente@bench.com", "password": "cliente123"})
+        cabeceras = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        latencias = []
+        errores = 0
+        for i in range(peticiones):
+            fecha = base + timedelta(minutes=30 * i)
+            t0 = time.perf_counter()
+            r = await cliente.post("/api/citas", json={"servicio_id": 1, "fecha_hora": fecha.isoformat()}, headers=cabeceras)
+            latencias.append((time.perf_counter() - t0) * 1000)
+            if r.status_code != 200:
+                errores += 1
+    return latencias, errores
+
+def benchmark_logging(peticiones, rondas, latencia_escritura_ms):
+    """Alterna los modos en varias rondas para que el calentamiento y el
+    crecimiento de la base de datos afecten a todos por igual"""
+    latencias = {nombre: [] for nombre in MODOS}
+    errores = {nombre: 0 for nombre in MODOS}
+    base = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+    with open(os.devnull, "w") as nulo:
+        MODOS["sin logging"](nulo)
+        asyncio.run(ejecutar_modo(50, base))  # calentamiento
+        logging_config.detener_logging()
+    base += timedelta(minutes=30 * 50)
+
+    for ronda in range(rondas):
+        for i, (nombre, configurar) in enumerate(MODOS.items()):
+            with open(os.path.join(DIRECTORIO, f"log_{i}.txt"), "a") as archivo:
+                configurar(SalidaLenta(archivo, latencia_escritura_ms))
+                lat, err = asyncio.run(ejecutar_modo(peticiones, base))
+                logging_config.detener_logging()
+            latencias[nombre].extend(lat)
+            errores[nombre] += err
+            base += timedelta(minutes=30 * peticiones)
+
+    resultados = []
+    for nombre, valores in latencias.items():
+        valores.sort()
+        resultados.append({
+            "modo": nombre,
+            "media_ms": round(statistics.fmean(valores), 3),
+            "p50_ms": round(valores[len(valores) // 2], 3),
+            "p99_ms": round(valores[int(len(valores) * 0.99) - 1], 3),
+            "errores": errores[nombre],
+        })
+    for r in resultados:
+        r["sobrecoste_ms"] = round(r["media_ms"] - resultados[0]["media_ms"], 3)
+    return resultados
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sobrecoste del logging por petición en POST /api/citas")
+    parser.add_argument("--peticiones", type=int, default=300, help="peticiones por modo y ronda")
+    parser.add_argument("--rondas", type=int, default=4)
+    parser.add_argument("--latencia-escritura-ms", type=float, default=0.2,
+                        help="retardo de cada escritura en la salida (0 = archivo local)")
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    sembrar(num_estilistas=1)
+    resultados = benchmark_logging(args.peticiones, args.rondas, args.latencia_escritura_ms)
+
+    if args.json:
+        print(json.dumps(resultados))
+    else:
+        print(f"📊 {args.peticiones * args.rondas} peticiones secuenciales a POST /api/citas por modo, "
+              f"{args.latencia_escritura_ms} ms por escritura en la salida")
+        print(f"{'modo':<20} {'media ms':>9} {'p50 ms':>8} {'p99 ms':>8} {'sobrecoste':>11} {'errores':>8}")
+        for r in resultados:
+            print(f"{r['modo']:<20} {r['media_ms']:>9} {r['p50_ms']:>8} {r['p99_ms']:>8} "
+                  f"{r['sobrecoste_ms']:>+10.3f} {r['errores']:>8}")
@@ -0,0 +1,139 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import httpx
+import backend_enhanced_v3_fixed as backend
+from sqlalchemy import event, insert
+
+class ContadorConsultas:
+    def __init__(self, engine):
+        self.total = 0
+        event.listen(engine, "before_cursor_execute", self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+def sembrar(num_estilistas, citas_por_dia, dias):
+    db = backend.SessionLocal()
+    try:
+        db.execute(insert(backend.Estilista), [{"nombre": f"Estilista {i}", "activo": True} for i in range(num_estilistas)])
+        db.execute(insert(backend.Servicio), [
+            {"nombre": "Peinado", "precio": 2500000, "duracion_minutos": 60, "activo": True},
+            {"nombre": "Maquillaje", "precio": 1800000, "duracion_minutos": 45, "activo": True},
+        ])
+        db.execute(insert(backend.Usuario), [{
+            "nombre": "Recepción", "email": "recepcion@bench.com", "telefono": "0",
+            "password_hash": hashlib.sha256("recepcion123".encode()).hexdigest()
+        }])
+        # Agenda ya ocupada en parte para que la detección de conflictos tenga trabajo
+        base = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+        db.execute(insert(backend.Cita), [
+            {"cliente_id": 1, "estilista_id": (i % num_estilistas) + 1, "servicio_id": 1,
+             "fecha_hora": base + timedelta(days=d, hours=13 + (i // num_estilistas) * 2),
+             "fecha_fin": base + timedelta(days=d, hours=14 + (i // num_estilistas) * 2),
+             "estado": "confirmada", "precio_total": 2500000, "fecha_creacion": base}
+            for d in range(dias) for i in range(citas_por_dia)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+def elementos_lote(dia: datetime, n: int):
+    """Un grupo (p. ej. una boda): peinado y maquillaje escalonados cada 30 minutos"""
+    return [
+        {"servicio_id": 1 + i % 2, "fecha_hora": (dia + timedelta(hours=9, minutes=30 * (i // 4))).isoformat()}
+        for i in range(n)
+    ]
+
+async def medir(tamanos, repeticiones, contador):
+    transporte = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        r = await cliente.post("/api/auth/login", json={"email": "recepcion@bench.com", "password": "recepcion123"})
+        cabeceras = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        dia = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+
+        resultados = []
+        for n in tamanos:
+            fila = {"n": n}
+            for modo in ("secuencial", "lote"):
+                tiempos, consultas, creadas = [], 0, 0
+                for _ in range(repeticiones):
+                    elementos = elementos_lote(dia, n)
+                    dia += timedelta(days=1)
+                    antes = contador.total
+                    t0 = time.perf_counter()
+                    if modo == "secuencial":
+                        for elemento in elementos:
+                            r = await cliente.post("/api/citas", json=elemento, headers=cabeceras)
+                            creadas += r.status_code == 200
+                    else:
+                        r = await cliente.post("/api/citas/batch", json={"citas": elementos}, headers=cabeceras)
+                        creadas += r.json()["creadas"]
+                    tiempos.append((time.perf_counter() - t0) * 1000)
+                    consultas += contador.total - antes
+                tiempos.sort()
+                fila[f"{modo}_ms"] = round(tiempos[len(tiempos) // 2], 2)
+                fila[f"{modo}_consultas"] = round(consultas / repeticiones, 1)
+                fila[f"{modo}_creadas"] = round(creadas / repeticiones, 1)
+            resultados.append(fila)
+        return resultados
+
+async def verificar_resultados_por_elemento():
+    """Un lote con elementos inválidos crea los válidos y explica el resto"""
+    transporte = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        r = await cliente.post("/api/auth/login", json={"email": "recepcion@bench.com", "password": "recepcion123"})
+        cabeceras = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        dia = datetime.combine(datetime.now().date() + timedelta(days=300), datetime.min.time())
+        hora = (dia + timedelta(hours=10)).isoformat()
+        r = await cliente.post("/api/citas/batch", headers=cabeceras, json={"citas": [
+            {"servicio_id": 1, "fecha_hora": hora, "estilista_id": 1},
+            {"servicio_id": 1, "fecha_hora": hora, "estilista_id": 1},   # choca con el anterior
+            {"servicio_id": 1, "fecha_hora": "2020-01-01T10:00:00"},     # en el pasado
+            {"servicio_id": 999, "fecha_hora": hora},                    # servicio inexistente
+            {"servicio_id": 2, "fecha_hora": hora},                      # se asigna a otro estilista
+        ]})
+        codigos = [e["status_code"] for e in r.json()["resultados"]]
+        return codigos == [200, 400, 400, 404, 200]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="POST /api/citas/batch frente a N llamadas individuales")
+    parser.add_argument("--tamanos", default="5,10,20", help="tamaños de lote separados por comas")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--estilistas", type=int, default=12)
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    tamanos = [int(n) for n in args.tamanos.split(",")]
+    sembrar(args.estilistas, citas_por_dia=args.estilistas * 3, dias=len(tamanos) * args.repeticiones * 2)
+    contador = ContadorConsultas(backend.engine)
+    resultados = asyncio.run(medir(tamanos, args.repeticiones, contador))
+    correcto = asyncio.run(verificar_resultados_por_elemento())
+
+    if args.json:
+        print(json.dumps({"resultados": resultados, "resultados_por_elemento_correctos": correcto}))
+    else:
+        print(f"📊 Mediana de {args.repeticiones} repeticiones, {args.estilistas} estilistas")
+        print(f"{'N':>4} {'secuencial ms':>14} {'lote ms':>9} {'consultas sec.':>15} {'consultas lote':>15} {'creadas sec./lote':>18}")
+        for r in resultados:
+            print(f"{r['n']:>4} {r['secuencial_ms']:>14} {r['lote_ms']:>9} {r['secuencial_consultas']:>15} "
+                  f"{r['lote_consultas']:>15} {r['secuencial_creadas']:>8} / {r['lote_creadas']:<7}")
+        print(f"\n{'✅' if correcto else '❌'} Resultados por elemento (creada, conflicto, pasado, servicio inexistente)")
+    if not correcto:
+        sys.exit(1)
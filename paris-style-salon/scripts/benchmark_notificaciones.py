@@ -0,0 +1,177 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import backend_enhanced_v3_fixed as backend
+from sqlalchemy import DateTime, bindparam, insert, text
+
+DIAS = 30
+LOTE_INSERCION = 100000
+
+# Recordatorios pendientes de las citas de mañana, de las tres formas
+CONSULTAS = {
+    "NOT IN": """
+        SELECT c.id FROM citas c
+        WHERE c.fecha_hora BETWEEN :inicio AND :fin AND c.estado = 'confirmada'
+        AND c.id NOT IN (
+            SELECT cita_id FROM notificaciones WHERE tipo = 'recordatorio' AND enviado = 1
+        )
+    """,
+    "NOT EXISTS": """
+        SELECT c.id FROM citas c
+        WHERE c.fecha_hora BETWEEN :inicio AND :fin AND c.estado = 'confirmada'
+        AND NOT EXISTS (
+            SELECT 1 FROM notificaciones n
+            WHERE n.cita_id = c.id AND n.tipo = 'recordatorio' AND n.enviado = 1
+        )
+    """,
+    # Lo que lee ProgramadorRecordatorios: recordatorio_en pasa a NULL al encolarlo
+    "recordatorio_en": """
+        SELECT id FROM citas
+        WHERE estado = 'confirmada' AND recordatorio_en BETWEEN :inicio AND :fin
+    """,
+}
+
+def sembrar_citas(num_citas, manana, rng) -> int:
+    """Citas confirmadas de los próximos DIAS días; la mitad de las de mañana ya tiene el recordatorio enviado"""
+    db = backend.SessionLocal()
+    try:
+        db.execute(insert(backend.Estilista), [{"nombre": f"Estilista {i}", "activo": True} for i in range(20)])
+        db.execute(insert(backend.Servicio), [{"nombre": "Corte", "precio": 350000, "duracion_minutos": 45, "activo": True}])
+        db.execute(insert(backend.Usuario), [
+            {"nombre": f"Cliente {i}", "email": f"cliente{i}@bench.com", "telefono": "0", "password_hash": "x"}
+            for i in range(1000)
+        ])
+        citas = []
+        for _ in range(num_citas):
+            fecha_hora = manana + timedelta(minutes=rng.randrange(DIAS * 24 * 60))
+            citas.append({
+                "cliente_id": rng.randrange(1, 1001), "estilista_id": rng.randrange(1, 21), "servicio_id": 1,
+                "fecha_hora": fecha_hora, "fecha_fin": fecha_hora + timedelta(minutes=45),
+                "estado": "confirmada", "precio_total": 350000, "fecha_creacion": manana,
+                "recordatorio_en": fecha_hora - backend.ANTELACION_RECORDATORIO,
+            })
+        db.execute(insert(backend.Cita), citas)
+        de_manana = db.execute(
+            text("SELECT id FROM citas WHERE fecha_hora < :fin").bindparams(bindparam("fin", type_=DateTime)),
+            {"fin": manana + timedelta(days=1)}
+        ).scalars().all()
+        enviados = de_manana[::2]
+        db.execute(insert(backend.Notificacion), [
+            {"usuario_id": 1, "cita_id": cita_id, "tipo": "recordatorio", "mensaje": "Recordatorio enviado",
+             "enviado": True, "fecha_envio": manana}
+            for cita_id in enviados
+        ])
+        db.execute(
+            text("UPDATE citas SET recordatorio_en = NULL WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": enviados}
+        )
+        db.commit()
+        return len(de_manana) - len(enviados)
+    finally:
+        db.close()
+
+def crecer_historial(desde, hasta, primera_cita_pasada, manana):
+    """Notificaciones de citas ya pasadas: confirmación y recordatorio de cada una"""
+    db = backend.SessionLocal()
+    try:
+        for bloque in range(desde, hasta, LOTE_INSERCION):
+            db.execute(insert(backend.Notificacion), [
+                {"usuario_id": 1, "cita_id": primera_cita_pasada + i // 2, "tipo": ("recordatorio", "confirmacion")[i % 2],
+                 "mensaje": "histórico", "enviado": True, "fecha_envio": manana - timedelta(days=2)}
+                for i in range(bloque, min(hasta, bloque + LOTE_INSERCION))
+            ])
+            db.commit()
+        db.execute(text("ANALYZE"))
+        db.commit()
+    finally:
+        db.close()
+
+def medir(manana, repeticiones) -> dict:
+    fin = manana + timedelta(days=1) - timedelta(microseconds=1)
+    parametros = {
+        "NOT IN": {"inicio": manana, "fin": fin},
+        "NOT EXISTS": {"inicio": manana, "fin": fin},
+        "recordatorio_en": {"inicio": manana - backend.ANTELACION_RECORDATORIO, "fin": fin - backend.ANTELACION_RECORDATORIO},
+    }
+    db = backend.SessionLocal()
+    try:
+        resultados = {}
+        for nombre, sql in CONSULTAS.items():
+            fechas = (bindparam("inicio", type_=DateTime), bindparam("fin", type_=DateTime))
+            consulta = text(sql).bindparams(*fechas)
+            tiempos, ids = [], []
+            for _ in range(repeticiones):
+                t0 = time.perf_counter()
+                ids = db.execute(consulta, parametros[nombre]).scalars().all()
+                tiempos.append((time.perf_counter() - t0) * 1000)
+            plan = [fila[3] for fila in db.execute(text("EXPLAIN QUERY PLAN " + sql).bindparams(*fechas), parametros[nombre])]
+            resultados[nombre] = {"ms": statistics.median(tiempos), "ids": set(ids), "plan": plan}
+        return resultados
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Selección de recordatorios pendientes con NOT IN, NOT EXISTS y recordatorio_en")
+    parser.add_argument("--citas", type=int, default=50000)
+    parser.add_argument("--historial", default="10000,100000,1000000", help="tamaños crecientes del historial, separados por comas")
+    parser.add_argument("--repeticiones", type=int, default=5, help="se toma la mediana")
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    rng = random.Random(19)
+    manana = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+    pendientes = sembrar_citas(args.citas, manana, rng)
+
+    niveles, correcto, anterior = [], True, 0
+    for historial in (int(h) for h in args.historial.split(",")):
+        crecer_historial(anterior, historial, args.citas + 1, manana)
+        anterior = historial
+        medidas = medir(manana, args.repeticiones)
+        iguales = len({frozenset(m["ids"]) for m in medidas.values()}) == 1 and len(medidas["NOT IN"]["ids"]) == pendientes
+        # Ni el anti-join ni el recorrido por estado pueden recorrer el historial
+        sin_scan = all(
+            not (f.startswith("SCAN") and "notificaciones" in f) and "LIST SUBQUERY" not in f
+            for nombre in ("NOT EXISTS", "recordatorio_en") for f in medidas[nombre]["plan"]
+        )
+        correcto &= iguales and sin_scan
+        niveles.append({
+            "historial": historial,
+            **{f"{nombre}_ms": round(m["ms"], 2) for nombre, m in medidas.items()},
+            "pendientes": len(medidas["NOT EXISTS"]["ids"]),
+            "mismas_citas": iguales,
+            "sin_recorrer_historial": sin_scan,
+            "planes": {nombre: m["plan"] for nombre, m in medidas.items()},
+        })
+
+    if args.json:
+        print(json.dumps({"citas": args.citas, "niveles": niveles, "correcto": correcto}))
+    else:
+        print(f"📊 {args.citas} citas confirmadas en {DIAS} días, {pendientes} recordatorios pendientes para mañana")
+        print(f"{'historial':>10} {'NOT IN ms':>10} {'NOT EXISTS ms':>14} {'recordatorio_en ms':>19}")
+        for n in niveles:
+            print(f"{n['historial']:>10} {n['NOT IN_ms']:>10} {n['NOT EXISTS_ms']:>14} {n['recordatorio_en_ms']:>19}")
+        for nombre, plan in niveles[-1]["planes"].items():
+            print(f"\n   Plan {nombre}:")
+            for f in plan:
+                print(f"     {f}")
+        print(f"\n{'✅' if all(n['mismas_citas'] for n in niveles) else '❌'} Las tres consultas devuelven las mismas citas")
+        print(f"{'✅' if all(n['sin_recorrer_historial'] for n in niveles) else '❌'} "
+              f"NOT EXISTS y recordatorio_en no recorren el historial")
+    if not correcto:
+        sys.exit(1)
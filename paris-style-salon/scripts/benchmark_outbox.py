@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import email
+import hashlib
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend y el servicio a una base de datos temporal antes de importarlos"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import httpx
+from aiosmtpd.controller import Controller
+from sqlalchemy import insert, text
+
+import backend_enhanced_v3_fixed as backend
+import notification_service
+from notification_service import NotificationService, PoolSMTP, TrabajadorNotificaciones
+
+# aiosmtpd avisa de una API interna obsoleta en cada sesión; los reintentos
+# esperados del benchmark no deben ensuciar la salida
+logging.getLogger("mail.log").setLevel(logging.ERROR)
+logging.getLogger("paris_style.notificaciones").setLevel(logging.CRITICAL)
+
+class ServidorRegistro:
+    """Servidor SMTP local que apunta cuándo llega cada Message-ID y puede rechazar los primeros"""
+
+    def __init__(self):
+        self.llegadas = {}
+        self.recibidos = 0
+        self.rechazar = 0
+        self._lock = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope):
+        with self._lock:
+            if self.rechazar > 0:
+                self.rechazar -= 1
+                return "451 Requested action aborted: try again later"
+            self.recibidos += 1
+            message_id = email.message_from_bytes(envelope.original_content or envelope.content)["Message-ID"]
+            self.llegadas.setdefault(message_id, []).append(time.perf_counter())
+        return "250 OK"
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def sembrar(num_estilistas):
+    db = backend.SessionLocal()
+    try:
+        db.execute(insert(backend.Estilista), [{"nombre": f"Estilista {i}", "activo": True} for i in range(num_estilistas)])
+        db.execute(insert(backend.Servicio), [{"nombre": "Corte", "precio": 350000, "duracion_minutos": 45, "activo": True}])
+        db.execute(insert(backend.Usuario), [{
+            "nombre": "Cliente", "email": "cliente@bench.com", "telefono": "0",
+            "password_hash": hashlib.sha256("cliente123".encode()).hexdigest()
+        }])
+        db.commit()
+    finally:
+        db.close()
+
+def message_ids_por_cita() -> dict:
+    db = backend.SessionLocal()
+    try:
+        filas = db.execute(text("SELECT id, cita_id FROM notificaciones_salida WHERE tipo = 'confirmacion'")).all()
+        return {f"<notificacion-{fila.id}@bench.com>": fila.cita_id for fila in filas}
+    finally:
+        db.close()
+
+def estado_bandeja() -> dict:
+    db = backend.SessionLocal()
+    try:
+        filas = db.execute(text("""
+            SELECT estado, COUNT(*), SUM(intentos) FROM notificaciones_salida GROUP BY estado
+        """)).all()
+        historial = db.execute(text("SELECT COUNT(*) FROM notificaciones WHERE enviado = 1")).scalar()
+        return {"estados": {e: n for e, n, _ in filas}, "intentos": sum(i for _, _, i in filas), "historial": historial}
+    finally:
+        db.close()
+
+async def crear_citas(n, desde_dia):
+    """Crea n citas por la API y devuelve el instante en que respondió cada una"""
+    respuestas = {}
+    transporte = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        r = await cliente.post("/api/auth/login", json={"email": "cliente@bench.com", "password": "cliente123"})
+        cabeceras = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        base = datetime.combine(datetime.now().date() + timedelta(days=desde_dia), datetime.min.time())
+        for i in range(n):
+            fecha = base + timedelta(days=i // 10, hours=8 + i % 10)
+            r = await cliente.post("/api/citas", json={"servicio_id": 1, "fecha_hora": fecha.isoformat()}, headers=cabeceras)
+            respuestas[r.json()["cita_id"]] = time.perf_counter()
+            await asyncio.sleep(0.05)
+    return respuestas
+
+def esperar(condicion, limite_segundos=30):
+    fin = time.monotonic() + limite_segundos
+    while time.monotonic() < fin:
+        if condicion():
+            return True
+        time.sleep(0.05)
+    return False
+
+def crear_trabajador(puerto, **opciones):
+    pool = PoolSMTP("127.0.0.1", puerto, "notificaciones@bench.com", None, starttls=False, max_conexiones=4)
+    servicio = NotificationService(pool)
+    servicio.sender_email = "notificaciones@bench.com"
+    return TrabajadorNotificaciones(servicio, **opciones)
+
+def iniciar_trabajador(trabajador, intervalo):
+    detener = threading.Event()
+    hilo = threading.Thread(target=trabajador.ejecutar, args=(detener, intervalo), daemon=True)
+    hilo.start()
+    return detener, hilo
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latencia de la bandeja de salida y entrega con reintentos y leases")
+    parser.add_argument("--citas", type=int, default=100)
+    parser.add_argument("--intervalo", type=float, default=1.0, help="espera del trabajador con la bandeja vacía")
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    sembrar(num_estilistas=10)
+    servidor = ServidorRegistro()
+    controller = Controller(servidor, hostname="127.0.0.1", port=puerto_libre())
+    controller.start()
+
+    # 1. Latencia desde la reserva hasta que el email llega al servidor SMTP
+    trabajador = crear_trabajador(controller.port)
+    detener, hilo = iniciar_trabajador(trabajador, args.intervalo)
+    respuestas = asyncio.run(crear_citas(args.citas, desde_dia=1))
+    esperar(lambda: servidor.recibidos >= args.citas)
+    ids = message_ids_por_cita()
+    latencias = [
+        (min(llegadas) - respuestas[ids[message_id]]) * 1000
+        for message_id, llegadas in servidor.llegadas.items() if ids.get(message_id) in respuestas
+    ]
+    entregas_unicas = len(latencias) == args.citas and all(len(l) == 1 for l in servidor.llegadas.values())
+
+    # 2. El servidor rechaza temporalmente (451) los primeros envíos: se reintentan con backoff
+    detener.set()
+    hilo.join()
+    trabajador = crear_trabajador(controller.port, reintento_base=0.2, reintento_maximo=1)
+    detener, hilo = iniciar_trabajador(trabajador, 0.1)
+    servidor.rechazar = 5
+    recibidos_antes = servidor.recibidos
+    asyncio.run(crear_citas(10, desde_dia=60))
+    reintentos_ok = esperar(lambda: servidor.recibidos - recibidos_antes >= 10)
+    detener.set()
+    hilo.join()
+
+    # 3. Un trabajador reclama un lote y muere sin enviarlo: otro lo envía al vencer el lease
+    asyncio.run(crear_citas(10, desde_dia=90))
+    caido = crear_trabajador(controller.port, lease_segundos=1)
+    db = notification_service.SessionLocal()
+    _, reclamadas = caido.reclamar(db)
+    db.close()
+    recibidos_antes = servidor.recibidos
+    trabajador = crear_trabajador(controller.port)
+    detener, hilo = iniciar_trabajador(trabajador, 0.1)
+    sin_envio_durante_lease = (time.sleep(0.5), servidor.recibidos == recibidos_antes)[1]
+    lease_ok = sin_envio_durante_lease and esperar(lambda: servidor.recibidos - recibidos_antes >= len(reclamadas))
+    detener.set()
+    hilo.join()
+    controller.stop()
+
+    bandeja = estado_bandeja()
+    total = args.citas + 20
+    exactamente_una_vez = (
+        bandeja["estados"] == {"enviada": total} and bandeja["historial"] == total
+        and servidor.recibidos == total and all(len(l) == 1 for l in servidor.llegadas.values())
+    )
+    resultado = {
+        "citas": args.citas,
+        "intervalo_s": args.intervalo,
+        "latencia_p50_ms": round(percentil(latencias, 0.5), 1),
+        "latencia_p95_ms": round(percentil(latencias, 0.95), 1),
+        "latencia_max_ms": round(max(latencias), 1),
+        "intentos_totales": bandeja["intentos"],
+        "entregas_unicas": entregas_unicas,
+        "reintentos_correctos": reintentos_ok,
+        "lease_correcto": lease_ok,
+        "exactamente_una_entrega": exactamente_una_vez,
+    }
+    correcto = entregas_unicas and reintentos_ok and lease_ok and exactamente_una_vez
+
+    if args.json:
+        print(json.dumps(resultado))
+    else:
+        print(f"📊 {args.citas} reservas, trabajador con espera de {args.intervalo:g} s con la bandeja vacía")
+        print(f"   Reserva → email recibido: p50 {resultado['latencia_p50_ms']} ms, "
+              f"p95 {resultado['latencia_p95_ms']} ms, máx. {resultado['latencia_max_ms']} ms")
+        print("   (antes: hasta 30 minutos, el ciclo de schedule)")
+        print(f"   {total} notificaciones en {bandeja['intentos']} intentos")
+        print(f"\n{'✅' if reintentos_ok else '❌'} Rechazos 451 reintentados con backoff hasta entregarse")
+        print(f"{'✅' if lease_ok else '❌'} Lote de un trabajador caído reenviado al vencer el lease")
+        print(f"{'✅' if exactamente_una_vez else '❌'} Cada notificación entregada y registrada una sola vez")
+    if not correcto:
+        sys.exit(1)
@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from html import escape
+
+def preparar_entorno():
+    """Apunta el servicio a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+from notification_service import NotificationService, PoolSMTP
+from plantillas_email import CAMPOS, PLANTILLAS
+
+Fila = namedtuple("Fila", CAMPOS)
+
+def cuerpo_recordatorio_anterior(cita) -> str:
+    """El f-string que se evaluaba entero por cada recordatorio, como referencia"""
+    return f"""
+    <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+        <h2 style="color: #D97706;">Recordatorio de Cita - Paris Style</h2>
+        <p>Hola <strong>{cita.nombre}</strong>,</p>
+        <p>Te recordamos que tienes una cita próximamente:</p>
+
+        <div style="background-color: #FEF3C7; padding: 20px; border-radius: 8px; margin: 20px 0;">
+            <h3 style="margin-top: 0; color: #92400E;">Detalles de tu Cita</h3>
+            <p><strong>Servicio:</strong> {cita.servicio_nombre}</p>
+            <p><strong>Fecha:</strong> {cita.fecha_hora.strftime('%d/%m/%Y')}</p>
+            <p><strong>Hora:</strong> {cita.fecha_hora.strftime('%H:%M')}</p>
+            {f'<p><strong>Estilista:</strong> {cita.estilista_nombre}</p>' if cita.estilista_nombre else ''}
+            <p><strong>Precio:</strong> ${cita.precio:,}</p>
+        </div>
+
+        <p>Si necesitas reagendar o cancelar tu cita, por favor contáctanos con al menos 2 horas de anticipación.</p>
+
+        <div style="background-color: #F3F4F6; padding: 15px; border-radius: 8px; margin: 20px 0;">
+            <p style="margin: 0;"><strong>Dirección:</strong> Calle 123 #45-67, Bogotá</p>
+            <p style="margin: 5px 0 0 0;"><strong>Teléfono:</strong> +57 300 123 4567</p>
+        </div>
+
+        <p>¡Te esperamos en Paris Style!</p>
+
+        <div style="text-align: center; margin-top: 30px; padding-top: 20px; border-top: 1px solid #E5E7EB;">
+            <p style="color: #6B7280; font-size: 12px;">
+                Este es un mensaje automático, por favor no responder a este email.
+            </p>
+        </div>
+    </div>
+    """
+
+def generar_filas(n):
+    """Recordatorios de un día: pocas horas y estilistas distintos, muchos clientes"""
+    rng = random.Random(5)
+    inicio = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time()) + timedelta(hours=8)
+    servicios = [("Corte", 350000), ("Tinte", 1200000), ("Manicure", 80000), ("Peinado", 250000)]
+    estilistas = [f"Estilista {i}" for i in range(12)] + [None]
+    filas = []
+    for i in range(n):
+        servicio, precio = rng.choice(servicios)
+        filas.append(Fila(
+            f"Cliente {i}", servicio, inicio + timedelta(minutes=15 * rng.randrange(48)),
+            rng.choice(estilistas), precio
+        ))
+    return filas
+
+def medir(funcion, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, resultado
+
+def normalizar(html):
+    return " ".join(html.split())
+
+def verificar(filas, renderizados):
+    """Mismo HTML que la versión anterior (salvo espacios), texto plano sin etiquetas y valores escapados"""
+    iguales = all(
+        normalizar(cuerpo_recordatorio_anterior(fila)) == normalizar(html)
+        for fila, (_, _, html) in zip(filas, renderizados)
+    )
+    textos = all(
+        "<" not in texto and f"Precio: ${fila.precio:,}" in texto and fila.fecha_hora.strftime("%d/%m/%Y") in texto
+        and (("Estilista: " in texto) == bool(fila.estilista_nombre))
+        for fila, (_, texto, _) in zip(filas, renderizados)
+    )
+    peligrosa = Fila('Ana <script>"x"</script>', "Corte & Color", filas[0].fecha_hora, "Luis & Co", 1000)
+    _, texto, html = PLANTILLAS["recordatorio"].renderizar(peligrosa)
+    escapado = escape(peligrosa.nombre) in html and "<script>" not in html and "Luis &amp; Co" in html
+    escapado &= peligrosa.nombre in texto
+    return {"html_equivalente": iguales, "texto_plano_correcto": textos, "html_escapado": escapado}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render de recordatorios con plantillas precompiladas frente al f-string por mensaje")
+    parser.add_argument("--mensajes", type=int, default=10000)
+    parser.add_argument("--repeticiones", type=int, default=5, help="se toma la mejor")
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    filas = generar_filas(args.mensajes)
+    plantilla = PLANTILLAS["recordatorio"]
+    servicio = NotificationService(PoolSMTP("127.0.0.1", 25, "notificaciones@bench.com", None, starttls=False))
+
+    s_anterior, _ = medir(lambda: [cuerpo_recordatorio_anterior(f) for f in filas], args.repeticiones)
+    s_lote, renderizados = medir(lambda: plantilla.renderizar_lote(filas), args.repeticiones)
+    s_uno, _ = medir(lambda: [plantilla.renderizar(f) for f in filas], args.repeticiones)
+    s_mime_anterior, _ = medir(lambda: [
+        servicio.crear_mensaje(f"c{i}@bench.com", plantilla.asunto, cuerpo_recordatorio_anterior(f)).as_bytes()
+        for i, f in enumerate(filas)
+    ], 1)
+    s_mime, _ = medir(lambda: [
+        servicio.crear_mensaje(f"c{i}@bench.com", asunto, html, texto).as_bytes()
+        for i, (asunto, texto, html) in enumerate(plantilla.renderizar_lote(filas))
+    ], 1)
+    verificacion = verificar(filas, renderizados)
+    correcto = all(verificacion.values())
+
+    def us(segundos):
+        return round(segundos / args.mensajes * 1e6, 2)
+
+    resultado = {
+        "mensajes": args.mensajes,
+        "anterior_us_por_mensaje": us(s_anterior),
+        "lote_us_por_mensaje": us(s_lote),
+        "uno_a_uno_us_por_mensaje": us(s_uno),
+        "lote_us_por_cuerpo": us(s_lote / 2),
+        "aceleracion_por_cuerpo": round(s_anterior / (s_lote / 2), 2),
+        "mime_anterior_us_por_mensaje": us(s_mime_anterior),
+        "mime_multipart_us_por_mensaje": us(s_mime),
+        **verificacion,
+    }
+
+    if args.json:
+        print(json.dumps(resultado))
+    else:
+        print(f"📊 {args.mensajes} recordatorios, mejor de {args.repeticiones} repeticiones")
+        print(f"   f-string por mensaje (solo HTML):     {resultado['anterior_us_por_mensaje']:>8} µs/mensaje")
+        print(f"   Plantilla compilada, uno a uno:       {resultado['uno_a_uno_us_por_mensaje']:>8} µs/mensaje (texto + HTML)")
+        print(f"   Plantilla compilada, por lote:        {resultado['lote_us_por_mensaje']:>8} µs/mensaje (texto + HTML), "
+              f"{resultado['lote_us_por_cuerpo']} µs por cuerpo, {resultado['aceleracion_por_cuerpo']}x")
+        print(f"   Mensaje MIME completo, antes:         {resultado['mime_anterior_us_por_mensaje']:>8} µs/mensaje")
+        print(f"   Mensaje MIME multipart/alternative:   {resultado['mime_multipart_us_por_mensaje']:>8} µs/mensaje")
+        print(f"\n{'✅' if verificacion['html_equivalente'] else '❌'} HTML idéntico al de la plantilla anterior (salvo espacios)")
+        print(f"{'✅' if verificacion['texto_plano_correcto'] else '❌'} Versión de texto plano con los mismos datos")
+        print(f"{'✅' if verificacion['html_escapado'] else '❌'} Nombres con HTML escapados en la versión HTML")
+    if not correcto:
+        sys.exit(1)
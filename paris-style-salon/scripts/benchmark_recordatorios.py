@@ -0,0 +1,215 @@
+import argparse
+import heapq
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend y el servicio a una base de datos temporal antes de importarlos"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import backend_enhanced_v3_fixed as backend
+from notification_service import ProgramadorRecordatorios
+from sqlalchemy import DateTime, insert, text
+
+DIAS = 60
+
+def sembrar(num_citas, historial, inicio):
+    """Citas confirmadas repartidas en los próximos DIAS días e historial de notificaciones ya enviadas"""
+    rng = random.Random(11)
+    db = backend.SessionLocal()
+    try:
+        db.execute(insert(backend.Estilista), [{"nombre": f"Estilista {i}", "activo": True} for i in range(20)])
+        db.execute(insert(backend.Servicio), [{"nombre": "Corte", "precio": 350000, "duracion_minutos": 45, "activo": True}])
+        db.execute(insert(backend.Usuario), [
+            {"nombre": f"Cliente {i}", "email": f"cliente{i}@bench.com", "telefono": "0", "password_hash": "x"}
+            for i in range(1000)
+        ])
+        citas = []
+        for i in range(num_citas):
+            fecha_hora = inicio + timedelta(minutes=rng.randrange(DIAS * 24 * 60))
+            citas.append({
+                "cliente_id": rng.randrange(1, 1001), "estilista_id": rng.randrange(1, 21), "servicio_id": 1,
+                "fecha_hora": fecha_hora, "fecha_fin": fecha_hora + timedelta(minutes=45),
+                "estado": "confirmada", "precio_total": 350000, "fecha_creacion": inicio,
+                "recordatorio_en": fecha_hora - backend.ANTELACION_RECORDATORIO,
+            })
+        db.execute(insert(backend.Cita), citas)
+        db.execute(text("""
+            INSERT INTO notificaciones (usuario_id, cita_id, tipo, mensaje, enviado, fecha_envio)
+            VALUES (1, :cita_id, :tipo, 'histórico', 1, :fecha)
+        """), [
+            {"cita_id": num_citas + i, "tipo": ("recordatorio", "confirmacion")[i % 2], "fecha": inicio}
+            for i in range(historial)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+def consulta_diaria_anterior(ahora):
+    """La consulta de las 18:00 que sustituye el programador, con su NOT IN sobre el historial"""
+    manana = ahora + timedelta(days=1)
+    db = backend.SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        filas = db.execute(text("""
+            SELECT c.id, c.fecha_hora, u.nombre, u.email, s.nombre as servicio_nombre,
+                   e.nombre as estilista_nombre, s.precio
+            FROM citas c
+            JOIN usuarios u ON c.cliente_id = u.id
+            JOIN servicios s ON c.servicio_id = s.id
+            LEFT JOIN estilistas e ON c.estilista_id = e.id
+            WHERE c.fecha_hora BETWEEN :start AND :end
+            AND c.estado = 'confirmada'
+            AND c.id NOT IN (
+                SELECT cita_id FROM notificaciones
+                WHERE tipo = 'recordatorio' AND enviado = 1
+            )
+        """).bindparams(start=manana.replace(hour=0, minute=0), end=manana.replace(hour=23, minute=59)).columns(fecha_hora=DateTime)).all()
+        return len(filas), (time.perf_counter() - t0) * 1000
+    finally:
+        db.close()
+
+def memoria_todo_en_heap():
+    """Alternativa sin horizonte: todos los recordatorios futuros en el heap"""
+    db = backend.SessionLocal()
+    try:
+        tracemalloc.start()
+        t0 = time.process_time()
+        filas = db.execute(text("SELECT id, recordatorio_en FROM citas WHERE estado = 'confirmada' AND recordatorio_en IS NOT NULL")
+                           .columns(recordatorio_en=DateTime)).all()
+        heap = [(recordatorio_en, cita_id) for cita_id, recordatorio_en in filas]
+        heapq.heapify(heap)
+        programadas = {cita_id for _, cita_id in heap}
+        del filas
+        cpu_ms = (time.process_time() - t0) * 1000
+        memoria = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return len(heap), memoria, cpu_ms
+    finally:
+        db.close()
+
+def simular_dia(inicio, paso_segundos):
+    """Avanza un reloj simulado 24 h llamando a tarea() como lo hace TrabajadorNotificaciones"""
+    programador = ProgramadorRecordatorios()
+    tracemalloc.start()
+    pico_heap = 0
+    tardia_id = cancelada_id = None
+    cpu0 = time.process_time()
+    ahora = inicio
+    fin = inicio + timedelta(days=1)
+    while ahora < fin:
+        programador.tarea(ahora)
+        pico_heap = max(pico_heap, len(programador))
+        if tardia_id is None and ahora >= inicio + timedelta(hours=5):
+            tardia_id, cancelada_id = eventos_de_la_api(programador, ahora)
+        ahora += timedelta(seconds=paso_segundos)
+    cpu_ms = (time.process_time() - cpu0) * 1000
+    memoria_pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return programador, pico_heap, memoria_pico, cpu_ms, tardia_id, cancelada_id
+
+def eventos_de_la_api(programador, ahora):
+    """Una confirmación tardía (recordatorio ya vencido) y una cancelación de una cita ya cargada en el heap"""
+    db = backend.SessionLocal()
+    try:
+        fecha_hora = ahora + timedelta(hours=3)
+        tardia_id = db.execute(insert(backend.Cita).returning(backend.Cita.id), [{
+            "cliente_id": 1, "estilista_id": 1, "servicio_id": 1, "fecha_hora": fecha_hora,
+            "fecha_fin": fecha_hora + timedelta(minutes=45), "estado": "confirmada", "precio_total": 1,
+            "recordatorio_en": ahora
+        }]).scalar_one()
+        cancelada_id = programador._heap[0][1]
+        db.execute(text("UPDATE citas SET estado = 'cancelada', recordatorio_en = NULL WHERE id = :id"), {"id": cancelada_id})
+        db.commit()
+        return tardia_id, cancelada_id
+    finally:
+        db.close()
+
+def verificar(inicio, tardia_id, cancelada_id):
+    fin = inicio + timedelta(days=1)
+    db = backend.SessionLocal()
+    try:
+        # Las citas de las primeras 24 h ya tenían el recordatorio vencido al
+        # arrancar: se encolan en el primer refresco
+        esperadas = {fila[0] for fila in db.execute(text("""
+            SELECT id FROM citas
+            WHERE estado = 'confirmada' AND fecha_hora > :desde AND fecha_hora < :hasta
+        """).bindparams(desde=inicio, hasta=fin + backend.ANTELACION_RECORDATORIO))}
+        encoladas = [fila[0] for fila in db.execute(text("SELECT cita_id FROM notificaciones_salida WHERE tipo = 'recordatorio'"))]
+        pendientes_vencidas = db.execute(text("""
+            SELECT COUNT(*) FROM citas WHERE estado = 'confirmada' AND recordatorio_en <= :hasta
+        """).bindparams(hasta=fin - timedelta(minutes=2))).scalar()
+        return {
+            "encolados": len(encoladas),
+            "esperados": len(esperadas),
+            "sin_duplicados": len(encoladas) == len(set(encoladas)),
+            "exactos": set(encoladas) == esperadas,
+            "cancelada_omitida": cancelada_id not in encoladas,
+            "tardia_encolada": tardia_id in encoladas,
+            "ninguno_pendiente": pendientes_vencidas == 0,
+        }
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memoria y CPU del programador de recordatorios con citas futuras")
+    parser.add_argument("--citas", type=int, default=100000)
+    parser.add_argument("--historial", type=int, default=200000, help="notificaciones antiguas")
+    parser.add_argument("--paso", type=float, default=1.0, help="segundos simulados entre vueltas del trabajador")
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    inicio = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+    sembrar(args.citas, args.historial, inicio)
+
+    filas_diaria, ms_diaria = consulta_diaria_anterior(inicio + timedelta(hours=18))
+    en_heap_todo, memoria_todo, cpu_todo = memoria_todo_en_heap()
+    programador, pico_heap, memoria_pico, cpu_dia, tardia_id, cancelada_id = simular_dia(inicio, args.paso)
+    verificacion = verificar(inicio, tardia_id, cancelada_id)
+    correcto = all(v for k, v in verificacion.items() if isinstance(v, bool))
+
+    resultado = {
+        "citas_futuras": args.citas,
+        "historial_notificaciones": args.historial,
+        "consulta_diaria_anterior_ms": round(ms_diaria, 1),
+        "consulta_diaria_anterior_filas": filas_diaria,
+        "todo_en_heap_entradas": en_heap_todo,
+        "todo_en_heap_kib": round(memoria_todo / 1024),
+        "todo_en_heap_cpu_ms": round(cpu_todo, 1),
+        "horizonte_s": programador.horizonte.total_seconds(),
+        "horizonte_pico_entradas": pico_heap,
+        "horizonte_pico_kib": round(memoria_pico / 1024),
+        "dia_simulado_cpu_ms": round(cpu_dia, 1),
+        "vueltas": int(86400 / args.paso),
+        **verificacion,
+    }
+
+    if args.json:
+        print(json.dumps(resultado))
+    else:
+        print(f"📊 {args.citas} citas confirmadas en {DIAS} días, {args.historial} notificaciones de historial")
+        print(f"   Consulta diaria anterior (NOT IN): {resultado['consulta_diaria_anterior_ms']} ms, "
+              f"{filas_diaria} filas de golpe a las 18:00")
+        print(f"   Todo en el heap:     {en_heap_todo:>7} entradas, {resultado['todo_en_heap_kib']:>7} KiB, "
+              f"{resultado['todo_en_heap_cpu_ms']} ms de CPU al arrancar")
+        print(f"   Horizonte de {programador.horizonte.total_seconds():.0f} s: {pico_heap:>4} entradas como máximo, "
+              f"{resultado['horizonte_pico_kib']} KiB de pico")
+        print(f"   24 h simuladas ({resultado['vueltas']} vueltas): {resultado['dia_simulado_cpu_ms']} ms de CPU, "
+              f"{verificacion['encolados']} recordatorios encolados")
+        print(f"\n{'✅' if verificacion['exactos'] and verificacion['sin_duplicados'] else '❌'} "
+              f"Cada recordatorio del día encolado una vez ({verificacion['encolados']}/{verificacion['esperados']})")
+        print(f"{'✅' if verificacion['tardia_encolada'] else '❌'} Confirmación tardía encolada en el siguiente refresco")
+        print(f"{'✅' if verificacion['cancelada_omitida'] else '❌'} Cita cancelada con el recordatorio ya en el heap omitida")
+    if not correcto:
+        sys.exit(1)
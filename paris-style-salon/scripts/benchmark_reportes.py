@@ -0,0 +1,219 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import httpx
+import backend_enhanced_v3_fixed as backend
+import resumenes
+from sqlalchemy import text
+
+NUM_ESTILISTAS = 12
+SERVICIOS = [("Corte", 350000, 45, "Cabello"), ("Tinte", 1200000, 120, "Cabello"),
+             ("Manicure", 80000, 30, "Uñas"), ("Pedicure", 90000, 45, "Uñas"), ("Maquillaje", 250000, 60, None)]
+ESTADOS = ["completada"] * 70 + ["cancelada"] * 12 + ["confirmada"] * 10 + ["pendiente"] * 8
+FORMATO = "%Y-%m-%d %H:%M:%S.%f"
+
+# Lo que habría que ejecutar sin resúmenes: recorrer las citas del rango
+CONSULTA_CITAS = f"""
+    SELECT {{clave}}, COALESCE(c.estado, 'pendiente'), COUNT(*), SUM(COALESCE(c.precio_total, 0)),
+           SUM({resumenes.MINUTOS_CITA})
+    FROM citas c
+    WHERE c.fecha_hora >= :desde AND c.fecha_hora < :hasta
+    GROUP BY 1, 2
+"""
+
+def sembrar(num_citas, dias, hoy):
+    """Citas repartidas en los `dias` anteriores a hoy y 30 posteriores, insertadas con el driver sqlite3"""
+    rng = random.Random(20)
+    password = hashlib.sha256("bench123".encode()).hexdigest()
+    conn = backend.engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany("INSERT INTO estilistas (nombre, activo) VALUES (?, 1)",
+                           [(f"Estilista {i}",) for i in range(NUM_ESTILISTAS)])
+        cursor.executemany("INSERT INTO servicios (nombre, precio, duracion_minutos, categoria, activo) VALUES (?, ?, ?, ?, 1)",
+                           SERVICIOS)
+        cursor.executemany(
+            "INSERT INTO usuarios (nombre, email, telefono, password_hash, es_admin) VALUES (?, ?, '0', ?, ?)",
+            [("Admin", "admin@bench.com", password, 1), ("Cliente", "cliente@bench.com", password, 0)]
+        )
+        inicio = datetime.combine(hoy - timedelta(days=dias), datetime.min.time()) + timedelta(hours=8)
+        filas = []
+        for _ in range(num_citas):
+            servicio_id = rng.randrange(len(SERVICIOS))
+            _, precio, duracion, _ = SERVICIOS[servicio_id]
+            fecha_hora = inicio + timedelta(days=rng.randrange(dias + 30), minutes=15 * rng.randrange(44))
+            estado = rng.choice(ESTADOS) if fecha_hora.date() < hoy else rng.choice(["pendiente", "confirmada", "cancelada"])
+            filas.append((
+                rng.choice([None] + list(range(1, NUM_ESTILISTAS + 1)) * 10), servicio_id + 1,
+                fecha_hora.strftime(FORMATO), (fecha_hora + timedelta(minutes=duracion)).strftime(FORMATO),
+                estado, precio, inicio.strftime(FORMATO)
+            ))
+        cursor.executemany("""
+            INSERT INTO citas (cliente_id, estilista_id, servicio_id, fecha_hora, fecha_fin, estado, precio_total, fecha_creacion)
+            VALUES (2, ?, ?, ?, ?, ?, ?, ?)
+        """, filas)
+        conn.commit()
+    finally:
+        conn.close()
+
+async def movimientos_api(cliente, admin, hoy, n):
+    """Citas creadas, confirmadas, canceladas y completadas por la API, que mantienen los resúmenes"""
+    r = await cliente.post("/api/auth/login", json={"email": "cliente@bench.com", "password": "bench123"})
+    cliente_cab = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    rng = random.Random(21)
+    creadas = []
+    for i in range(n):
+        fecha = datetime.combine(hoy + timedelta(days=1 + i % 20), datetime.min.time()) + timedelta(hours=8, minutes=15 * (i // 20))
+        r = await cliente.post("/api/citas", json={"servicio_id": rng.randrange(1, len(SERVICIOS) + 1),
+                                                   "fecha_hora": fecha.isoformat()}, headers=cliente_cab)
+        if r.status_code == 200:
+            creadas.append(r.json()["cita_id"])
+    for i, cita_id in enumerate(creadas):
+        if i % 4 == 3:
+            await cliente.put(f"/api/citas/{cita_id}", json={"estado": "cancelada"}, headers=cliente_cab)
+            continue
+        await cliente.put(f"/api/citas/{cita_id}", json={"estado": "confirmada"}, headers=admin)
+        if i % 4 == 1:
+            await cliente.put(f"/api/citas/{cita_id}", json={"estado": "completada"}, headers=admin)
+        elif i % 4 == 2:
+            await cliente.put(f"/api/citas/{cita_id}", json={"estado": "cancelada"}, headers=admin)
+    # Una confirmación repetida no debe mover los resúmenes dos veces
+    r = await cliente.put(f"/api/citas/{creadas[0]}", json={"estado": "confirmada"}, headers=admin)
+    return len(creadas), r.status_code
+
+def grupos_desde_citas(db, clave, desde, hasta):
+    filas = db.execute(text(CONSULTA_CITAS.format(clave=clave)), {
+        "desde": datetime.combine(desde, datetime.min.time()).strftime(FORMATO),
+        "hasta": datetime.combine(hasta + timedelta(days=1), datetime.min.time()).strftime(FORMATO),
+    }).all()
+    return backend.agrupar_resumen(filas)
+
+def esperado(db, desde, hasta):
+    """Métricas por estilista y por día calculadas recorriendo citas, para comparar con el reporte"""
+    dias = (hasta - desde).days + 1
+    jornada = backend.minutos_del_dia(backend.HORA_CIERRE) - backend.minutos_del_dia(backend.HORA_APERTURA)
+    por_estilista = grupos_desde_citas(db, "COALESCE(c.estilista_id, 0)", desde, hasta)
+    por_dia = grupos_desde_citas(db, "date(c.fecha_hora)", desde, hasta)
+    return (
+        {(e or None): backend.metricas_reporte(m, dias * jornada if e else None) for e, m in por_estilista.items()},
+        {d: backend.metricas_reporte(m, jornada * NUM_ESTILISTAS) for d, m in por_dia.items()},
+    )
+
+def coincide(reporte, db, desde, hasta):
+    estilistas, dias = esperado(db, desde, hasta)
+    quitar = ("estilista_id", "nombre", "dia")
+    return (
+        {e["estilista_id"]: {k: v for k, v in e.items() if k not in quitar} for e in reporte["por_estilista"]} == estilistas
+        and {d["dia"]: {k: v for k, v in d.items() if k not in quitar} for d in reporte["por_dia"]} == dias
+    )
+
+def tabla_resumenes(db):
+    return sorted(db.execute(text("SELECT * FROM resumen_diario_estilista WHERE citas != 0 OR ingresos != 0")).all()) + \
+        sorted(db.execute(text("SELECT * FROM resumen_diario_servicio WHERE citas != 0 OR ingresos != 0")).all())
+
+def mediana_ms(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tiempos), resultado
+
+async def medir(args, hoy):
+    transporte = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        r = await cliente.post("/api/auth/login", json={"email": "admin@bench.com", "password": "bench123"})
+        admin = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        creadas, estado_repetida = await movimientos_api(cliente, admin, hoy, args.movimientos)
+
+        db = backend.SessionLocal()
+        try:
+            resultados, correcto = [], estado_repetida == 400
+            for dias in (7, 30, 365):
+                desde, hasta = hoy - timedelta(days=dias - 1), hoy + timedelta(days=20)
+                parametros = {"desde": desde.isoformat(), "hasta": hasta.isoformat()}
+                tiempos = []
+                for _ in range(args.repeticiones):
+                    t0 = time.perf_counter()
+                    r = await cliente.get("/api/admin/reportes", params=parametros, headers=admin)
+                    tiempos.append((time.perf_counter() - t0) * 1000)
+                reporte = r.json()
+                ms_citas, _ = mediana_ms(lambda: (
+                    grupos_desde_citas(db, "COALESCE(c.estilista_id, 0)", desde, hasta),
+                    grupos_desde_citas(db, "date(c.fecha_hora)", desde, hasta),
+                    grupos_desde_citas(db, "c.servicio_id", desde, hasta),
+                ), args.repeticiones)
+                exacto = coincide(reporte, db, desde, hasta)
+                correcto &= exacto
+                resultados.append({
+                    "dias": (hasta - desde).days + 1,
+                    "citas_en_rango": reporte["totales"]["citas"] + reporte["totales"]["canceladas"],
+                    "reporte_ms": round(statistics.median(tiempos), 2),
+                    "recorrer_citas_ms": round(ms_citas, 2),
+                    "reporte_exacto": exacto,
+                })
+
+            # La reconstrucción deja los resúmenes exactamente como los mantuvo la API
+            antes = tabla_resumenes(db)
+            db.close()
+            t0 = time.perf_counter()
+            resumenes.reconstruir_base_datos(backend.engine.url.database)
+            segundos_reconstruir = time.perf_counter() - t0
+            db = backend.SessionLocal()
+            reconstruccion_igual = antes == tabla_resumenes(db)
+            correcto &= reconstruccion_igual
+            return resultados, creadas, segundos_reconstruir, reconstruccion_igual, estado_repetida, correcto
+        finally:
+            db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GET /api/admin/reportes sobre resúmenes diarios frente a recorrer citas")
+    parser.add_argument("--citas", type=int, default=300000)
+    parser.add_argument("--dias", type=int, default=730, help="días de historia")
+    parser.add_argument("--movimientos", type=int, default=200, help="citas creadas y cambiadas por la API")
+    parser.add_argument("--repeticiones", type=int, default=5, help="se toma la mediana")
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    hoy = date.today()
+    sembrar(args.citas, args.dias, hoy)
+    # Las citas sembradas con SQL directo no pasan por la API: se reconstruyen como tras una restauración
+    resumenes.reconstruir_base_datos(backend.engine.url.database)
+    resultados, creadas, segundos_reconstruir, reconstruccion_igual, estado_repetida, correcto = asyncio.run(medir(args, hoy))
+
+    if args.json:
+        print(json.dumps({
+            "citas": args.citas, "resultados": resultados, "citas_api": creadas,
+            "reconstruir_s": round(segundos_reconstruir, 2), "reconstruccion_igual": reconstruccion_igual,
+            "correcto": correcto,
+        }))
+    else:
+        print(f"📊 {args.citas} citas en {args.dias} días, {creadas} creadas y cambiadas por la API")
+        print(f"{'días':>6} {'citas':>9} {'reporte ms':>11} {'recorrer citas ms':>18}")
+        for r in resultados:
+            print(f"{r['dias']:>6} {r['citas_en_rango']:>9} {r['reporte_ms']:>11} {r['recorrer_citas_ms']:>18}")
+        print(f"   Reconstrucción completa: {segundos_reconstruir:.2f} s")
+        print(f"\n{'✅' if all(r['reporte_exacto'] for r in resultados) else '❌'} "
+              f"El reporte coincide con recorrer las citas en todos los rangos")
+        print(f"{'✅' if reconstruccion_igual else '❌'} La reconstrucción reproduce los resúmenes mantenidos por la API")
+        print(f"{'✅' if estado_repetida == 400 else '❌'} Una transición repetida se rechaza sin mover los resúmenes")
+    if not correcto:
+        sys.exit(1)
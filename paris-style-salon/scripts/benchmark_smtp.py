@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+def preparar_entorno():
+    """Apunta el servicio a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+from notification_service import NotificationService, PoolSMTP
+
+# aiosmtpd avisa de una API interna obsoleta en cada login
+logging.getLogger("mail.log").setLevel(logging.ERROR)
+
+class ServidorLento:
+    """Servidor SMTP local que imita la latencia de uno real.
+
+    El saludo (EHLO) cuesta lo que en producción cuestan la conexión TCP,
+    STARTTLS y el login; DATA, lo que tarda el servidor en aceptar el mensaje.
+    """
+
+    def __init__(self, latencia_sesion_ms: float, latencia_mensaje_ms: float):
+        self.latencia_sesion = latencia_sesion_ms / 1000
+        self.latencia_mensaje = latencia_mensaje_ms / 1000
+        self.recibidos = 0
+        self.sesiones = 0
+        self._lock = threading.Lock()
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        with self._lock:
+            self.sesiones += 1
+        await asyncio.sleep(self.latencia_sesion)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latencia_mensaje)
+        with self._lock:
+            self.recibidos += 1
+        return "250 OK"
+
+def autenticar(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def iniciar(handler, puerto=None):
+    # Controller no admite el puerto 0: comprueba el arranque conectándose a él
+    controller = Controller(
+        handler, hostname="127.0.0.1", port=puerto or puerto_libre(),
+        auth_require_tls=False, authenticator=autenticar
+    )
+    controller.start()
+    return controller
+
+def emails(n):
+    return [(f"cliente{i}@bench.com", "Recordatorio de Cita - Paris Style", f"<p>Cita {i}</p>") for i in range(n)]
+
+def medir(nombre, puerto, handler, mensajes, conexiones, mensajes_por_conexion):
+    pool = PoolSMTP(
+        "127.0.0.1", puerto, "parisStyle@bench.com", "x", starttls=False,
+        max_conexiones=conexiones, mensajes_por_conexion=mensajes_por_conexion
+    )
+    servicio = NotificationService(pool)
+    recibidos, sesiones = handler.recibidos, handler.sesiones
+    t0 = time.perf_counter()
+    if conexiones == 1:
+        enviados = [servicio.send_email(*email) for email in emails(mensajes)]
+    else:
+        enviados = servicio.send_emails(emails(mensajes))
+    segundos = time.perf_counter() - t0
+    pool.cerrar()
+    return {
+        "modo": nombre,
+        "mensajes_s": round(mensajes / segundos, 1),
+        "segundos": round(segundos, 2),
+        "enviados": sum(enviados),
+        "recibidos": handler.recibidos - recibidos,
+        "sesiones": handler.sesiones - sesiones,
+    }
+
+def verificar_reconexion(handler, controller, mensajes, conexiones):
+    """Las sesiones del pool sobreviven a un reinicio del servidor"""
+    puerto = controller.port
+    pool = PoolSMTP("127.0.0.1", puerto, "parisStyle@bench.com", "x", starttls=False, max_conexiones=conexiones)
+    servicio = NotificationService(pool)
+    recibidos = handler.recibidos
+    enviados = sum(servicio.send_emails(emails(mensajes)))
+    controller.stop()
+    controller = iniciar(handler, puerto)
+    enviados += sum(servicio.send_emails(emails(mensajes)))
+    pool.cerrar()
+    controller.stop()
+    return enviados == 2 * mensajes and handler.recibidos - recibidos == 2 * mensajes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Envío de emails con sesión por mensaje frente al pool de PoolSMTP")
+    parser.add_argument("--mensajes", type=int, default=300)
+    parser.add_argument("--conexiones", default="1,4,8", help="tamaños de pool separados por comas")
+    parser.add_argument("--latencia-sesion-ms", type=float, default=40, help="conexión + STARTTLS + login")
+    parser.add_argument("--latencia-mensaje-ms", type=float, default=5)
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    handler = ServidorLento(args.latencia_sesion_ms, args.latencia_mensaje_ms)
+    controller = iniciar(handler)
+    resultados = [medir("sesión por mensaje", controller.port, handler, args.mensajes, 1, 1)]
+    for conexiones in (int(c) for c in args.conexiones.split(",")):
+        resultados.append(medir(f"pool {conexiones}", controller.port, handler, args.mensajes, conexiones, 100))
+    controller.stop()
+
+    controller = iniciar(handler)
+    reconexion = verificar_reconexion(handler, controller, 50, 4)
+    correcto = reconexion and all(r["enviados"] == r["recibidos"] == args.mensajes for r in resultados)
+
+    if args.json:
+        print(json.dumps({"resultados": resultados, "reconexion_correcta": reconexion, "correcto": correcto}))
+    else:
+        print(f"📊 {args.mensajes} mensajes, sesión {args.latencia_sesion_ms:.0f} ms, mensaje {args.latencia_mensaje_ms:.0f} ms")
+        print(f"{'modo':<20} {'mensajes/s':>11} {'segundos':>9} {'sesiones':>9} {'recibidos':>10}")
+        for r in resultados:
+            print(f"{r['modo']:<20} {r['mensajes_s']:>11} {r['segundos']:>9} {r['sesiones']:>9} {r['recibidos']:>10}")
+        print(f"\n{'✅' if reconexion else '❌'} Reconexión tras reiniciar el servidor sin perder mensajes")
+    if not correcto:
+        sys.exit(1)
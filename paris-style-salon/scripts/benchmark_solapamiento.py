@@ -0,0 +1,131 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import backend_enhanced_v3_fixed as backend
+from sqlalchemy import and_, insert, text
+
+DURACIONES = [30, 45, 60, 90, 120]
+
+def sembrar_anio(db, num_estilistas, citas_por_dia, rng):
+    """Un año de citas consecutivas por estilista a partir de hoy"""
+    db.execute(insert(backend.Estilista), [
+        {"nombre": f"Estilista {i}", "activo": True} for i in range(num_estilistas)
+    ])
+    db.execute(insert(backend.Servicio), [
+        {"nombre": f"Servicio {d}", "precio": 1000000, "duracion_minutos": d, "activo": True}
+        for d in DURACIONES
+    ])
+    db.execute(insert(backend.Usuario), [
+        {"nombre": "Cliente", "email": "cliente@bench.com", "telefono": "0", "password_hash": "x"}
+    ])
+
+    hoy = datetime.combine(datetime.now().date(), datetime.min.time())
+    filas = []
+    for dia in range(365):
+        for estilista_id in range(1, num_estilistas + 1):
+            inicio = hoy + timedelta(days=dia, hours=8)
+            for _ in range(citas_por_dia):
+                servicio_id = rng.randrange(len(DURACIONES)) + 1
+                fin = inicio + timedelta(minutes=DURACIONES[servicio_id - 1])
+                filas.append({
+                    "cliente_id": 1, "estilista_id": estilista_id, "servicio_id": servicio_id,
+                    "fecha_hora": inicio, "fecha_fin": fin,
+                    "estado": rng.choice(["pendiente", "confirmada", "completada", "cancelada"]),
+                    "precio_total": 1000000
+                })
+                inicio = fin
+    db.execute(insert(backend.Cita), filas)
+    db.commit()
+    return hoy, len(filas)
+
+def conflicto_escaneo_dia(db, estilista_id, inicio, fin):
+    """Alternativa sin fecha_fin: traer el día completo y comparar en Python"""
+    dia = datetime.combine(inicio.date(), datetime.min.time())
+    citas = db.query(backend.Cita.fecha_hora, backend.Servicio.duracion_minutos).join(
+        backend.Servicio, backend.Cita.servicio_id == backend.Servicio.id
+    ).filter(
+        and_(
+            backend.Cita.estilista_id == estilista_id,
+            backend.Cita.fecha_hora >= dia,
+            backend.Cita.fecha_hora < dia + timedelta(days=1),
+            backend.Cita.estado.in_(["pendiente", "confirmada"])
+        )
+    ).all()
+    for fecha_hora, duracion in citas:
+        if fecha_hora < fin and fecha_hora + timedelta(minutes=duracion) > inicio:
+            return True
+    return False
+
+def medir(funcion, consultas):
+    tiempos = []
+    for args in consultas:
+        t0 = time.perf_counter()
+        funcion(*args)
+        tiempos.append((time.perf_counter() - t0) * 1_000_000)
+    tiempos.sort()
+    return statistics.median(tiempos), tiempos[int(len(tiempos) * 0.99) - 1]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detección de solapamientos sobre un año de citas")
+    parser.add_argument("--estilistas", type=int, default=20)
+    parser.add_argument("--citas-por-dia", type=int, default=10)
+    parser.add_argument("--consultas", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    db = backend.SessionLocal()
+    try:
+        hoy, total = sembrar_anio(db, args.estilistas, args.citas_por_dia, rng)
+        print(f"📊 {total} citas sembradas ({args.estilistas} estilistas, 365 días)")
+
+        consultas = []
+        for _ in range(args.consultas):
+            inicio = hoy + timedelta(days=rng.randrange(365), hours=rng.randrange(8, 18), minutes=rng.choice([0, 15, 30, 45]))
+            consultas.append((db, rng.randrange(1, args.estilistas + 1), inicio, inicio + timedelta(minutes=rng.choice(DURACIONES))))
+
+        # Ambas variantes deben coincidir
+        for c in consultas[:200]:
+            assert conflicto_escaneo_dia(*c) == bool(backend.buscar_conflicto(*c))
+
+        # Línea base: esquema anterior, sin índice de rango
+        db.execute(text("DROP INDEX idx_citas_estilista_rango"))
+        sin_indice = medir(conflicto_escaneo_dia, consultas)
+        db.execute(text("CREATE INDEX idx_citas_estilista_rango ON citas (estilista_id, fecha_hora, fecha_fin)"))
+        db.commit()
+
+        escaneo = medir(conflicto_escaneo_dia, consultas)
+        sonda = medir(backend.buscar_conflicto, consultas)
+        print(f"{'variante':<30} {'p50 µs':>9} {'p99 µs':>9}")
+        print(f"{'escaneo del día (sin índice)':<30} {sin_indice[0]:>9.1f} {sin_indice[1]:>9.1f}")
+        print(f"{'escaneo del día (con índice)':<30} {escaneo[0]:>9.1f} {escaneo[1]:>9.1f}")
+        print(f"{'sonda de rango':<30} {sonda[0]:>9.1f} {sonda[1]:>9.1f}")
+
+        _, estilista_id, inicio, fin = consultas[0]
+        plan = db.execute(text("""
+            EXPLAIN QUERY PLAN
+            SELECT id FROM citas
+            WHERE estilista_id = :e AND fecha_hora > :limite AND fecha_hora < :fin
+              AND fecha_fin > :inicio AND estado IN ('pendiente', 'confirmada')
+            LIMIT 1
+        """), {"e": estilista_id, "limite": inicio - timedelta(minutes=120), "fin": fin, "inicio": inicio}).fetchall()
+        print("\n📋 Plan de la sonda:")
+        for fila in plan:
+            print(f"   {fila[-1]}")
+    finally:
+        db.close()
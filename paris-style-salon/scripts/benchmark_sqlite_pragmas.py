@@ -0,0 +1,108 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from db_config import crear_engine
+
+ESQUEMA = [
+    """CREATE TABLE citas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cliente_id INTEGER NOT NULL,
+        estilista_id INTEGER,
+        servicio_id INTEGER NOT NULL,
+        fecha_hora DATETIME NOT NULL,
+        fecha_fin DATETIME,
+        estado VARCHAR(20) DEFAULT 'pendiente',
+        precio_total INTEGER
+    )""",
+    "CREATE INDEX idx_citas_estilista_rango ON citas (estilista_id, fecha_hora, fecha_fin)",
+]
+
+def preparar(engine, filas_iniciales):
+    base = datetime(2025, 1, 1, 8)
+    with engine.begin() as conn:
+        for sentencia in ESQUEMA:
+            conn.execute(text(sentencia))
+        conn.execute(text("""
+            INSERT INTO citas (cliente_id, estilista_id, servicio_id, fecha_hora, fecha_fin, estado, precio_total)
+            VALUES (1, :e, 1, :inicio, :fin, 'confirmada', 2500000)
+        """), [
+            {"e": i % 20, "inicio": base + timedelta(minutes=30 * i), "fin": base + timedelta(minutes=30 * i + 30)}
+            for i in range(filas_iniciales)
+        ])
+
+def trabajador(engine, operaciones, proporcion_escritura, semilla, resultados):
+    rng = random.Random(semilla)
+    base = datetime(2025, 1, 1, 8)
+    hechas = errores = 0
+    for _ in range(operaciones):
+        try:
+            if rng.random() < proporcion_escritura:
+                inicio = base + timedelta(minutes=rng.randrange(0, 500000))
+                with engine.begin() as conn:
+                    conn.execute(text("""
+                        INSERT INTO citas (cliente_id, estilista_id, servicio_id, fecha_hora, fecha_fin, estado, precio_total)
+                        VALUES (1, :e, 1, :inicio, :fin, 'pendiente', 2500000)
+                    """), {"e": rng.randrange(20), "inicio": inicio, "fin": inicio + timedelta(minutes=45)})
+            else:
+                dia = base + timedelta(days=rng.randrange(300))
+                with engine.connect() as conn:
+                    conn.execute(text("""
+                        SELECT id, fecha_hora, fecha_fin FROM citas
+                        WHERE estilista_id = :e AND fecha_hora >= :desde AND fecha_hora < :hasta
+                    """), {"e": rng.randrange(20), "desde": dia, "hasta": dia + timedelta(days=1)}).fetchall()
+            hechas += 1
+        except OperationalError:
+            # "database is locked"
+            errores += 1
+    resultados.append((hechas, errores))
+
+def ejecutar(nombre, engine, hilos, operaciones, proporcion_escritura, filas_iniciales):
+    preparar(engine, filas_iniciales)
+    resultados = []
+    threads = [
+        threading.Thread(target=trabajador, args=(engine, operaciones, proporcion_escritura, i, resultados))
+        for i in range(hilos)
+    ]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    segundos = time.perf_counter() - inicio
+    hechas = sum(r[0] for r in resultados)
+    errores = sum(r[1] for r in resultados)
+    print(f"{nombre:<22} {hechas / segundos:>10.0f} {errores:>10} {segundos:>9.2f}")
+    engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga mixta lectura/escritura con y sin los PRAGMAs de db_config")
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--operaciones", type=int, default=500, help="operaciones por hilo")
+    parser.add_argument("--escrituras", type=float, default=0.2, help="proporción de escrituras")
+    parser.add_argument("--filas", type=int, default=20000)
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    print(f"📊 {args.hilos} hilos x {args.operaciones} operaciones, {args.escrituras:.0%} escrituras")
+    print(f"{'configuración':<22} {'ops/s':>10} {'bloqueos':>10} {'segundos':>9}")
+
+    # Configuración anterior: journal de rollback, sin busy_timeout explícito
+    anterior = create_engine(
+        f"sqlite:///{os.path.join(directorio, 'anterior.db')}",
+        connect_args={"check_same_thread": False}
+    )
+    ejecutar("anterior (DELETE)", anterior, args.hilos, args.operaciones, args.escrituras, args.filas)
+
+    ajustada = crear_engine(f"sqlite:///{os.path.join(directorio, 'ajustada.db')}")
+    ejecutar("db_config (WAL)", ajustada, args.hilos, args.operaciones, args.escrituras, args.filas)
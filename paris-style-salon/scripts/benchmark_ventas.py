@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import httpx
+import backend_enhanced_v3_fixed as backend
+from sqlalchemy import insert, text
+
+def sembrar(num_productos):
+    db = backend.SessionLocal()
+    try:
+        db.execute(insert(backend.Usuario), [{
+            "nombre": "Caja", "email": "caja@bench.com", "telefono": "0", "es_admin": True,
+            "password_hash": hashlib.sha256("caja123".encode()).hexdigest()
+        }])
+        db.execute(insert(backend.Producto), [
+            {"nombre": f"Producto {i}", "precio": 1000000 + i * 10000, "stock": 0, "activo": True}
+            for i in range(num_productos)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+def reiniciar(stock):
+    db = backend.SessionLocal()
+    try:
+        db.execute(text("DELETE FROM ventas_lineas"))
+        db.execute(text("DELETE FROM ventas"))
+        db.execute(text("UPDATE productos SET stock = :stock"), {"stock": stock})
+        db.commit()
+    finally:
+        db.close()
+
+def generar_ventas(num_ventas, num_productos, semilla):
+    """Entre 1 y 3 líneas de 1 a 3 unidades; los productos más bajos se venden más"""
+    rng = random.Random(semilla)
+    pesos = [1 / (i + 1) for i in range(num_productos)]
+    return [
+        [{"producto_id": p + 1, "cantidad": rng.randint(1, 3)} for p in rng.choices(range(num_productos), pesos, k=rng.randint(1, 3))]
+        for _ in range(num_ventas)
+    ]
+
+def verificar(stock_inicial, aceptadas) -> dict:
+    """Stock nunca negativo, stock vendido = líneas registradas, una venta por respuesta aceptada"""
+    db = backend.SessionLocal()
+    try:
+        minimo = db.execute(text("SELECT MIN(stock) FROM productos")).scalar()
+        descuadres = db.execute(text("""
+            SELECT COUNT(*) FROM productos p
+            WHERE :inicial - p.stock != (SELECT COALESCE(SUM(l.cantidad), 0) FROM ventas_lineas l WHERE l.producto_id = p.id)
+        """), {"inicial": stock_inicial}).scalar()
+        totales_mal = db.execute(text("""
+            SELECT COUNT(*) FROM ventas v
+            WHERE v.total != (SELECT SUM(l.cantidad * l.precio_unitario) FROM ventas_lineas l WHERE l.venta_id = v.id)
+        """)).scalar()
+        ventas = db.execute(text("SELECT COUNT(*) FROM ventas")).scalar()
+        agotados = db.execute(text("SELECT COUNT(*) FROM productos WHERE stock = 0")).scalar()
+        return {
+            "stock_minimo": minimo,
+            "productos_descuadrados": descuadres,
+            "ventas_con_total_erroneo": totales_mal,
+            "ventas_registradas": ventas,
+            "productos_agotados": agotados,
+            "correcto": minimo >= 0 and descuadres == 0 and totales_mal == 0 and ventas == aceptadas,
+        }
+    finally:
+        db.close()
+
+async def ejecutar_ventas(ventas, concurrencia) -> dict:
+    transporte = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        r = await cliente.post("/api/auth/login", json={"email": "caja@bench.com", "password": "caja123"})
+        cabeceras = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        cola = asyncio.Queue()
+        for lineas in ventas:
+            cola.put_nowait(lineas)
+        latencias, codigos = [], {}
+
+        async def trabajador():
+            while not cola.empty():
+                lineas = cola.get_nowait()
+                t0 = time.perf_counter()
+                r = await cliente.post("/api/ventas", json={"lineas": lineas}, headers=cabeceras)
+                latencias.append((time.perf_counter() - t0) * 1000)
+                codigos[r.status_code] = codigos.get(r.status_code, 0) + 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+        total = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "concurrencia": concurrencia,
+        "ventas_s": round(len(latencias) / total, 1),
+        "p50_ms": round(latencias[len(latencias) // 2], 2),
+        "p99_ms": round(latencias[int(len(latencias) * 0.99) - 1], 2),
+        "aceptadas": codigos.get(200, 0),
+        "sin_stock": codigos.get(409, 0),
+        "errores": sum(n for codigo, n in codigos.items() if codigo not in (200, 409)),
+    }
+
+def vender_leyendo_y_escribiendo(ventas, hilos) -> int:
+    """La forma anterior (leer el stock, comprobarlo y escribir el nuevo valor) desde varios hilos.
+
+    Devuelve las unidades que se dieron por vendidas; si supera el stock
+    inicial, hubo escrituras que pisaron a otras.
+    """
+    vendidas = [0] * hilos
+
+    def trabajador(indice):
+        db = backend.SessionLocal()
+        try:
+            for lineas in ventas[indice::hilos]:
+                for linea in lineas:
+                    stock = db.execute(text("SELECT stock FROM productos WHERE id = :id"), {"id": linea["producto_id"]}).scalar()
+                    if stock >= linea["cantidad"]:
+                        db.execute(text("UPDATE productos SET stock = :stock WHERE id = :id"),
+                                   {"stock": stock - linea["cantidad"], "id": linea["producto_id"]})
+                        db.commit()
+                        vendidas[indice] += linea["cantidad"]
+        finally:
+            db.close()
+
+    trabajadores = [threading.Thread(target=trabajador, args=(i,)) for i in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    return sum(vendidas)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ventas concurrentes en caja: stock nunca negativo y rendimiento")
+    parser.add_argument("--ventas", type=int, default=3000)
+    parser.add_argument("--productos", type=int, default=20)
+    parser.add_argument("--stock", type=int, default=300, help="stock inicial de cada producto")
+    parser.add_argument("--concurrencia", default="1,8,32", help="niveles de concurrencia, separados por comas")
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    sembrar(args.productos)
+    ventas = generar_ventas(args.ventas, args.productos, semilla=21)
+
+    niveles = []
+    for concurrencia in (int(c) for c in args.concurrencia.split(",")):
+        reiniciar(args.stock)
+        medida = asyncio.run(ejecutar_ventas(ventas, concurrencia))
+        medida.update(verificar(args.stock, medida["aceptadas"]))
+        niveles.append(medida)
+
+    # Referencia: con lectura y escritura separadas se venden unidades que no existen
+    reiniciar(args.stock)
+    vendidas_rmw = vender_leyendo_y_escribiendo(ventas, max(n["concurrencia"] for n in niveles))
+    db = backend.SessionLocal()
+    try:
+        descontadas_rmw = args.productos * args.stock - db.execute(text("SELECT SUM(stock) FROM productos")).scalar()
+    finally:
+        db.close()
+
+    integro = all(n["correcto"] and n["errores"] == 0 for n in niveles)
+    # Las escrituras se serializan en SQLite: con más concurrencia no debe caer por debajo de la mitad
+    se_mantiene = min(n["ventas_s"] for n in niveles) >= 0.5 * niveles[0]["ventas_s"]
+    resultado = {
+        "ventas": args.ventas, "productos": args.productos, "stock": args.stock,
+        "niveles": niveles,
+        "lectura_escritura": {"unidades_vendidas": vendidas_rmw, "unidades_descontadas": descontadas_rmw,
+                              "vendidas_de_mas": vendidas_rmw - descontadas_rmw},
+        "stock_integro": integro,
+        "rendimiento_se_mantiene": se_mantiene,
+    }
+
+    if args.json:
+        print(json.dumps(resultado))
+    else:
+        print(f"📊 {args.ventas} ventas sobre {args.productos} productos con {args.stock} unidades cada uno")
+        print(f"{'concurrencia':>12} {'ventas/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'aceptadas':>10} {'sin stock':>10} "
+              f"{'errores':>8} {'stock mín':>10}")
+        for n in niveles:
+            print(f"{n['concurrencia']:>12} {n['ventas_s']:>9} {n['p50_ms']:>8} {n['p99_ms']:>8} {n['aceptadas']:>10} "
+                  f"{n['sin_stock']:>10} {n['errores']:>8} {n['stock_minimo']:>10}")
+        rmw = resultado["lectura_escritura"]
+        print(f"\n   Leer y escribir el stock por separado: {rmw['unidades_vendidas']} unidades vendidas, "
+              f"{rmw['unidades_descontadas']} descontadas ({rmw['vendidas_de_mas']} de más)")
+        print(f"\n{'✅' if integro else '❌'} Stock nunca negativo, cuadrado con las líneas de venta y sin errores")
+        print(f"{'✅' if se_mantiene else '❌'} El rendimiento se mantiene al subir la concurrencia")
+    if not (integro and se_mantiene):
+        sys.exit(1)
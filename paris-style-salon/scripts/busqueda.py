@@ -0,0 +1,126 @@
+"""Índices de búsqueda de texto (SQLite FTS5) para GET /api/buscar.
+
+servicios_fts, estilistas_fts y usuarios_fts son tablas FTS5 de contenido
+externo sobre servicios, estilistas y usuarios: solo guardan el índice y
+los triggers las mantienen al día en la misma transacción que cambia la
+fila. El tokenizador unicode61 con remove_diacritics hace que "sofia"
+encuentre "Sofía"; los índices de prefijo aceleran las búsquedas de lo que
+se va escribiendo ("luc" -> Lucía, Lucas).
+
+Los teléfonos se indexan aparte, solo con sus dígitos, en
+usuarios_telefono_fts con el tokenizador trigram, de modo que cualquier
+fragmento de 3 o más cifras los encuentra sin recorrer usuarios.
+
+Tras cargas masivas con los triggers desactivados o copias restauradas,
+los índices se reconstruyen con:
+
+    python scripts/busqueda.py
+"""
+import re
+from typing import Optional
+
+from db_config import conectar_sqlite, ruta_sqlite
+
+TOKENIZADOR = "unicode61 remove_diacritics 2"
+PREFIJOS = "2 3"
+MAX_PALABRAS = 8
+# Las palabras más cortas que el menor índice de prefijo obligarían a recorrer todo el índice
+MIN_CARACTERES_PALABRA = 2
+
+# Tablas FTS de contenido externo: (tabla FTS, tabla de contenido, columnas indexadas)
+INDICES_TEXTO = [
+    ("servicios_fts", "servicios", ("nombre", "descripcion", "categoria")),
+    ("estilistas_fts", "estilistas", ("nombre", "especialidades")),
+    ("usuarios_fts", "usuarios", ("nombre", "email")),
+]
+
+def digitos_sql(columna: str) -> str:
+    """Expresión SQL con solo las cifras de un teléfono ("+57 300-123" -> "57300123")"""
+    expresion = columna
+    for separador in (" ", "+", "-", "(", ")", "."):
+        expresion = f"REPLACE({expresion}, '{separador}', '')"
+    return expresion
+
+def _triggers(tabla: str, fts: str, columnas, valor=lambda fila, columna: f"{fila}.{columna}") -> list:
+    """Triggers que replican en la tabla FTS las altas, bajas y cambios de las columnas indexadas"""
+    lista = ", ".join(columnas)
+    nuevos = ", ".join(valor("new", c) for c in columnas)
+    viejos = ", ".join(valor("old", c) for c in columnas)
+    insertar = f"INSERT INTO {fts} (rowid, {lista}) VALUES (new.id, {nuevos});"
+    borrar = f"INSERT INTO {fts} ({fts}, rowid, {lista}) VALUES ('delete', old.id, {viejos});"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabla} BEGIN {insertar} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabla} BEGIN {borrar} END",
+        # Solo si cambia algo indexado: los cambios de rol o de contraseña no tocan el índice
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {lista} ON {tabla} BEGIN {borrar} {insertar} END",
+    ]
+
+def crear_indices_busqueda(conexion):
+    """Crea las tablas FTS y sus triggers y las llena desde las tablas de contenido"""
+    for fts, tabla, columnas in INDICES_TEXTO:
+        conexion.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {", ".join(columnas)}, content='{tabla}', content_rowid='id',
+                tokenize='{TOKENIZADOR}', prefix='{PREFIJOS}'
+            )
+        """)
+        for trigger in _triggers(tabla, fts, columnas):
+            conexion.execute(trigger)
+    # Sin contenido: solo sirve para encontrar el id, los datos se leen de usuarios
+    conexion.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS usuarios_telefono_fts USING fts5(
+            telefono, content='', tokenize='trigram'
+        )
+    """)
+    for trigger in _triggers("usuarios", "usuarios_telefono_fts", ("telefono",),
+                             lambda fila, columna: digitos_sql(f"{fila}.{columna}")):
+        conexion.execute(trigger)
+    reconstruir_indices(conexion)
+
+def reconstruir_indices(conexion):
+    """Vuelve a indexar todas las filas; no abre transacción"""
+    for fts, _, _ in INDICES_TEXTO:
+        conexion.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+    conexion.execute("INSERT INTO usuarios_telefono_fts (usuarios_telefono_fts) VALUES ('delete-all')")
+    conexion.execute(f"""
+        INSERT INTO usuarios_telefono_fts (rowid, telefono)
+        SELECT id, {digitos_sql("telefono")} FROM usuarios
+    """)
+
+def expresion_fts(texto: str) -> Optional[str]:
+    """Consulta FTS5 en la que cada palabra es un prefijo obligatorio.
+
+    Las palabras van entre comillas, así que los operadores de FTS5 que
+    escriba el usuario (OR, NEAR, *, ...) se buscan como texto. Las de
+    menos de MIN_CARACTERES_PALABRA caracteres se descartan ("maría d").
+    """
+    palabras = [p for p in re.findall(r"\w+", texto) if len(p) >= MIN_CARACTERES_PALABRA][:MAX_PALABRAS]
+    if not palabras:
+        return None
+    return " ".join(f'"{palabra}"*' for palabra in palabras)
+
+def expresion_telefono(texto: str) -> Optional[str]:
+    """Fragmento de teléfono si el texto son solo cifras y separadores (al menos 3 cifras)"""
+    if re.search(r"[^\d\s+\-().]", texto):
+        return None
+    digitos = re.sub(r"\D", "", texto)
+    return f'"{digitos}"' if len(digitos) >= 3 else None
+
+if __name__ == "__main__":
+    ruta = ruta_sqlite()
+    print(f"🔧 Reconstruyendo índices de búsqueda de {ruta}...")
+    conexion = conectar_sqlite(ruta)
+    conexion.isolation_level = None
+    try:
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            reconstruir_indices(conexion)
+            for fts, _, _ in INDICES_TEXTO + [("usuarios_telefono_fts", None, None)]:
+                conexion.execute(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+            conexion.execute("COMMIT")
+        except Exception:
+            conexion.execute("ROLLBACK")
+            raise
+    finally:
+        conexion.close()
+    print("✅ Índices de búsqueda reconstruidos")
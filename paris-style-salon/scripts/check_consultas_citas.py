@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_check_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'check.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import backend_enhanced_v3_fixed as backend
+from fastapi import Response
+from sqlalchemy import event, insert
+
+CITAS = 3000
+LIMITE = 50
+
+def sembrar(db):
+    db.execute(insert(backend.Estilista), [{"nombre": f"Estilista {i}", "activo": True} for i in range(4)])
+    db.execute(insert(backend.Servicio), [{"nombre": "Corte", "precio": 1, "duracion_minutos": 45, "activo": True}])
+    db.execute(insert(backend.Usuario), [
+        {"nombre": "Admin", "email": "admin@check.com", "telefono": "0", "password_hash": "x", "es_admin": True},
+        {"nombre": "Estilista", "email": "estilista@check.com", "telefono": "0", "password_hash": "x",
+         "es_estilista": True, "estilista_id": 2},
+        {"nombre": "Cliente", "email": "cliente@check.com", "telefono": "0", "password_hash": "x"},
+    ])
+    base = datetime(2025, 1, 1, 8)
+    db.execute(insert(backend.Cita), [
+        {"cliente_id": 3, "estilista_id": (i % 4) + 1 if i % 10 else None, "servicio_id": 1,
+         # Varias citas comparten fecha_hora para ejercitar el desempate por id
+         "fecha_hora": base + timedelta(hours=i // 3), "estado": "pendiente",
+         "precio_total": 1, "fecha_creacion": base}
+        for i in range(CITAS)
+    ])
+    db.commit()
+
+class ContadorConsultas:
+    def __init__(self, engine):
+        self.total = 0
+        event.listen(engine, "before_cursor_execute", self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+def recorrer_paginas(db, usuario, contador, **filtros):
+    """Recorre todas las páginas y verifica una consulta por página"""
+    cursor = None
+    ids = []
+    paginas = 0
+    while True:
+        response = Response()
+        antes = contador.total
+        pagina = backend.get_citas(response, cursor=cursor, limite=LIMITE, current_user=usuario, db=db, **filtros)
+        consultas = contador.total - antes
+        assert consultas == 1, f"{usuario.nombre}: página {paginas} ejecutó {consultas} consultas"
+        ids.extend(c["id"] for c in pagina)
+        paginas += 1
+        cursor = response.headers.get("X-Siguiente-Cursor")
+        if not cursor:
+            return ids, paginas
+
+def check_consultas_citas():
+    """Verificar que GET /api/citas ejecuta una consulta por página sin importar el tamaño"""
+    db = backend.SessionLocal()
+    try:
+        sembrar(db)
+        contador = ContadorConsultas(backend.engine)
+        usuarios = {u.email: u for u in db.query(backend.Usuario).all()}
+
+        admin = usuarios["admin@check.com"]
+        ids, paginas = recorrer_paginas(db, admin, contador)
+        assert len(ids) == CITAS and len(set(ids)) == CITAS, "La paginación repite u omite citas"
+        print(f"✅ Admin: {paginas} páginas, {len(ids)} citas, 1 consulta por página")
+
+        estilista = usuarios["estilista@check.com"]
+        ids, paginas = recorrer_paginas(db, estilista, contador)
+        esperadas = db.query(backend.Cita).filter(backend.Cita.estilista_id == 2).count()
+        assert len(ids) == esperadas, "El estilista no recibe todas sus citas"
+        print(f"✅ Estilista: {paginas} páginas, {len(ids)} citas, 1 consulta por página")
+
+        cliente = usuarios["cliente@check.com"]
+        ids, paginas = recorrer_paginas(db, cliente, contador, desde="2025-01-10", hasta="2025-01-11")
+        assert len(ids) == 48 * 3, f"Filtro por fechas devolvió {len(ids)} citas"
+        print(f"✅ Cliente con rango de fechas: {paginas} páginas, {len(ids)} citas")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    try:
+        check_consultas_citas()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,168 @@
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+def preparar_entorno():
+    """Apunta el backend a una base de datos temporal antes de importarlo"""
+    directorio = tempfile.mkdtemp(prefix="paris_check_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'check.db')}"
+    os.environ.setdefault("PARIS_STYLE_LOG_NIVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+preparar_entorno()
+
+import backend_enhanced_v3_fixed as backend
+from fastapi import Response
+from sqlalchemy import event, insert
+
+class CapturaSQL:
+    """Guarda las sentencias que ejecuta el backend para pedir su plan después"""
+
+    def __init__(self, engine):
+        self.sentencias = []
+        event.listen(engine, "before_cursor_execute", self._capturar)
+
+    def _capturar(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.sentencias.append((statement, parameters))
+
+    def tomar(self):
+        sentencias, self.sentencias = self.sentencias, []
+        return sentencias
+
+def plan(db, statement, parameters):
+    conexion = db.connection().connection.driver_connection
+    return [fila[3] for fila in conexion.execute("EXPLAIN QUERY PLAN " + statement, parameters)]
+
+def verificar_plan(nombre, filas, indice_esperado):
+    """Ningún acceso a citas/notificaciones puede ser un SCAN sin índice ni ordenar todo con un B-tree temporal.
+
+    El historial de notificaciones no admite ningún SCAN: se consulta con
+    búsquedas por (cita_id, tipo), como en el anti-join NOT EXISTS.
+
+    "TEMP B-TREE FOR RIGHT PART OF ORDER BY" se acepta: el índice ya entrega
+    las filas por fecha_hora y solo se ordenan por id las que comparten hora.
+    """
+    problemas = [
+        f for f in filas
+        if (f.startswith("SCAN") and ("citas" in f or "notificaciones" in f) and "INDEX" not in f)
+        or ("TEMP B-TREE" in f and "RIGHT PART" not in f)
+        # El historial de notificaciones solo crece: nunca se recorre entero,
+        # ni siquiera por un índice (p. ej. la lista de un NOT IN)
+        or (f.startswith("SCAN") and "notificaciones " in f + " ")
+    ]
+    usa_indice = any(indice_esperado in f for f in filas)
+    estado = "✅" if usa_indice and not problemas else "❌"
+    print(f"{estado} {nombre}")
+    for f in filas:
+        print(f"     {f}")
+    return usa_indice and not problemas
+
+def sembrar(db):
+    db.execute(insert(backend.Estilista), [{"nombre": f"Estilista {i}", "activo": True} for i in range(4)])
+    db.execute(insert(backend.Servicio), [{"nombre": "Corte", "precio": 1, "duracion_minutos": 45, "activo": True}])
+    db.execute(insert(backend.Usuario), [
+        {"nombre": "Admin", "email": "admin@check.com", "telefono": "0", "password_hash": "x", "es_admin": True},
+        {"nombre": "Estilista", "email": "estilista@check.com", "telefono": "0", "password_hash": "x",
+         "es_estilista": True, "estilista_id": 2},
+        {"nombre": "Cliente", "email": "cliente@check.com", "telefono": "0", "password_hash": "x"},
+    ])
+    base = datetime(2025, 1, 1, 8)
+    db.execute(insert(backend.Cita), [
+        {"cliente_id": 3, "estilista_id": (i % 4) + 1, "servicio_id": 1,
+         "fecha_hora": base + timedelta(hours=i), "fecha_fin": base + timedelta(hours=i, minutes=45),
+         "estado": "pendiente", "precio_total": 1, "fecha_creacion": base}
+        for i in range(500)
+    ])
+    db.execute(insert(backend.CambioCita), [
+        {"cita_id": i + 1, "cliente_id": 3, "estilista_id": (i % 4) + 1, "tipo": "creada", "fecha": base}
+        for i in range(500)
+    ])
+    db.commit()
+
+def check_planes_consulta():
+    """Verificar con EXPLAIN QUERY PLAN que las consultas frecuentes usan índices"""
+    db = backend.SessionLocal()
+    captura = CapturaSQL(backend.engine)
+    correcto = True
+    try:
+        sembrar(db)
+        usuarios = {u.email: u for u in db.query(backend.Usuario).all()}
+        captura.tomar()
+
+        casos = [
+            ("Listado de citas del estilista", "idx_citas_estilista",
+             lambda: backend.get_citas(Response(), current_user=usuarios["estilista@check.com"], db=db, cursor=None, desde=None, hasta=None)),
+            ("Listado de citas del cliente", "idx_citas_cliente_fecha",
+             lambda: backend.get_citas(Response(), current_user=usuarios["cliente@check.com"], db=db, cursor=None, desde=None, hasta=None)),
+            ("Listado de citas del administrador", "idx_citas_fecha",
+             lambda: backend.get_citas(Response(), current_user=usuarios["admin@check.com"], db=db, cursor=None, desde=None, hasta=None)),
+            ("Detección de solapamientos", "idx_citas_estilista",
+             lambda: backend.buscar_conflicto(db, 2, base_consulta, base_consulta + timedelta(minutes=45))),
+            ("Estilista libre según la base de datos", "idx_citas_estilista",
+             lambda: backend.buscar_estilista_libre(db, base_consulta, base_consulta + timedelta(minutes=45))),
+            ("Disponibilidad diaria del estilista", "idx_citas_estilista",
+             lambda: backend.get_disponibilidad_estilista(2, "2025-01-03", db)),
+            ("Cuadrícula de disponibilidad", "idx_citas_fecha",
+             lambda: backend.get_disponibilidad_estilistas("2025-01-03", "2025-01-16", None, 45, db)),
+            ("Cambios de citas del estilista", ("idx_citas_cambios_estilista", "INTEGER PRIMARY KEY"),
+             lambda: backend.get_cambios_citas("0", 50, usuarios["estilista@check.com"], db)),
+            ("Cambios de citas del cliente", ("idx_citas_cambios_cliente", "INTEGER PRIMARY KEY"),
+             lambda: backend.get_cambios_citas("0", 50, usuarios["cliente@check.com"], db)),
+            ("Cambios de citas del administrador", "INTEGER PRIMARY KEY",
+             lambda: backend.get_cambios_citas("0", 50, usuarios["admin@check.com"], db)),
+        ]
+        base_consulta = datetime(2025, 1, 3, 10)
+        for nombre, indice, llamada in casos:
+            llamada()
+            # La cota de duración máxima es una fila única leída por clave primaria
+            sentencias = [s for s in captura.tomar() if "citas" in s[0] and "citas_duracion_maxima" not in s[0]]
+            # Un índice por sentencia cuando el caso ejecuta varias consultas distintas
+            indices = indice if isinstance(indice, tuple) else (indice,) * len(sentencias)
+            for (statement, parameters), esperado in zip(sentencias, indices):
+                correcto &= verificar_plan(nombre, plan(db, statement, parameters), esperado)
+
+        # Notificaciones ya enviadas para una cita (cita_id, tipo, enviado)
+        correcto &= verificar_plan(
+            "Notificación enviada por cita y tipo",
+            plan(db, "SELECT id FROM notificaciones WHERE cita_id = ? AND tipo = ? AND enviado = 1", (1, "recordatorio")),
+            "uq_notificaciones_cita_tipo"
+        )
+        # Anti-join contra el historial: una búsqueda por cita en el índice
+        # único, no la lista completa que materializaría un NOT IN
+        correcto &= verificar_plan(
+            "Citas confirmadas sin recordatorio enviado (NOT EXISTS)",
+            plan(db, """SELECT id FROM citas
+                        WHERE estado = 'confirmada' AND fecha_hora > ?
+                        AND NOT EXISTS (
+                            SELECT 1 FROM notificaciones
+                            WHERE notificaciones.cita_id = citas.id
+                            AND notificaciones.tipo = 'recordatorio' AND notificaciones.enviado = 1
+                        )""", (datetime.now(),)),
+            "uq_notificaciones_cita_tipo"
+        )
+        # Refresco del programador de recordatorios
+        correcto &= verificar_plan(
+            "Recordatorios que vencen dentro del horizonte",
+            plan(db, "SELECT id, recordatorio_en FROM citas WHERE estado = 'confirmada' AND recordatorio_en <= ?",
+                 (datetime.now(),)),
+            "idx_citas_recordatorio"
+        )
+        # Lote de la bandeja de salida que reclama TrabajadorNotificaciones
+        correcto &= verificar_plan(
+            "Bandeja de salida: notificaciones disponibles",
+            plan(db, """SELECT id FROM notificaciones_salida
+                        WHERE estado = 'pendiente' AND disponible_en <= ?
+                        ORDER BY disponible_en LIMIT ?""", (datetime.now(), 50)),
+            "idx_notificaciones_salida_pendientes"
+        )
+    finally:
+        db.close()
+    return correcto
+
+if __name__ == "__main__":
+    if not check_planes_consulta():
+        print("\n❌ Hay consultas frecuentes sin índice")
+        sys.exit(1)
+    print("\n✅ Todas las consultas frecuentes usan índices")
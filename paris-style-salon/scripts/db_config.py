@@ -0,0 +1,93 @@
+"""Configuración compartida de SQLite para Paris Style.
+
+La API (sync y async), notification_service.py y los scripts de
+instalación crean sus conexiones aquí, de modo que todas aplican los mismos
+PRAGMAs: WAL para que las lecturas no bloqueen a las escrituras,
+synchronous=NORMAL (seguro con WAL), busy_timeout para esperar el lock en
+vez de fallar con "database is locked", y caché/mmap/temp_store en memoria.
+"""
+import importlib.util
+import os
+import sqlite3
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./paris_style.db")
+
+BUSY_TIMEOUT_MS = int(os.getenv("PARIS_STYLE_BUSY_TIMEOUT_MS", "5000"))
+POOL_SIZE = int(os.getenv("PARIS_STYLE_POOL_SIZE", "10"))
+POOL_MAX_OVERFLOW = int(os.getenv("PARIS_STYLE_POOL_MAX_OVERFLOW", "20"))
+
+PRAGMAS = {
+    "journal_mode": os.getenv("PARIS_STYLE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("PARIS_STYLE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": BUSY_TIMEOUT_MS,
+    "cache_size": -64000,        # 64 MB (valor negativo = KiB)
+    "mmap_size": 268435456,      # 256 MB
+    "temp_store": "MEMORY",
+}
+
+def aplicar_pragmas(conexion, pragmas: dict = PRAGMAS):
+    """Aplica los PRAGMAs a una conexión DBAPI (sqlite3 o el adaptador de aiosqlite)"""
+    cursor = conexion.cursor()
+    try:
+        for nombre, valor in pragmas.items():
+            cursor.execute(f"PRAGMA {nombre}={valor}")
+    finally:
+        cursor.close()
+
+def es_memoria(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:"
+
+def ruta_sqlite(url: str = DATABASE_URL) -> str:
+    """Ruta del archivo de la base de datos a partir de la URL de SQLAlchemy"""
+    return make_url(url).database
+
+def _opciones_pool(url: str) -> dict:
+    if es_memoria(url):
+        # Una base en memoria solo existe dentro de su conexión
+        return {"poolclass": StaticPool}
+    return {"pool_size": POOL_SIZE, "max_overflow": POOL_MAX_OVERFLOW}
+
+def crear_engine(url: str = DATABASE_URL, pragmas: dict = PRAGMAS):
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": BUSY_TIMEOUT_MS / 1000},
+        **_opciones_pool(url)
+    )
+    event.listen(engine, "connect", lambda conexion, _: aplicar_pragmas(conexion, pragmas))
+    return engine
+
+def aiosqlite_disponible() -> bool:
+    return importlib.util.find_spec("aiosqlite") is not None
+
+def crear_engine_async(url: str = DATABASE_URL, pragmas: dict = PRAGMAS):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    if not aiosqlite_disponible():
+        raise RuntimeError("El modo async necesita aiosqlite: pip install aiosqlite")
+    async_url = url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    engine = create_async_engine(
+        async_url,
+        connect_args={"check_same_thread": False, "timeout": BUSY_TIMEOUT_MS / 1000},
+        **_opciones_pool(url)
+    )
+    event.listen(engine.sync_engine, "connect", lambda conexion, _: aplicar_pragmas(conexion, pragmas))
+    return engine
+
+def conectar_sqlite(ruta: str = None, pragmas: dict = PRAGMAS) -> sqlite3.Connection:
+    """Conexión sqlite3 directa para los scripts de instalación y mantenimiento"""
+    conexion = sqlite3.connect(ruta or ruta_sqlite(), timeout=BUSY_TIMEOUT_MS / 1000)
+    aplicar_pragmas(conexion, pragmas)
+    return conexion
+
+def eliminar_base_datos(ruta: str = None) -> bool:
+    """Elimina el archivo de la base de datos junto con sus archivos -wal y -shm"""
+    ruta = ruta or ruta_sqlite()
+    existia = os.path.exists(ruta)
+    for archivo in (ruta, f"{ruta}-wal", f"{ruta}-shm"):
+        if os.path.exists(archivo):
+            os.remove(archivo)
+    return existia
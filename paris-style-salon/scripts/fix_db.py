@@ -1,22 +1,22 @@
-import sqlite3
 import hashlib
-import os
+
+from db_config import conectar_sqlite, eliminar_base_datos, ruta_sqlite
+from migraciones import aplicar_migraciones
 
 def fix_database_complete():
     """Solución completa: recrear DB + insertar datos + configurar usuarios"""
     
-    db_path = 'paris_style.db'
+    db_path = ruta_sqlite()
     
     print("🔧 SOLUCIONANDO PROBLEMA DE BASE DE DATOS...")
     print("=" * 50)
     
     # Paso 1: Eliminar DB existente
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    if eliminar_base_datos(db_path):
         print("✅ 1. Base de datos anterior eliminada")
     
     # Paso 2: Crear nueva estructura
-    conn = sqlite3.connect(db_path)
+    conn = conectar_sqlite(db_path)
     cursor = conn.cursor()
     
     try:
@@ -156,6 +156,9 @@ def fix_database_complete():
         
         conn.commit()
         
+        # Índices y columnas posteriores (fecha_actualizacion, fecha_fin, ...)
+        aplicar_migraciones(conn)
+        
         print("✅ 6. Base de datos configurada completamente!")
         print("\n🔑 CREDENCIALES:")
         print("👑 Admin: admin@parisstyle.com / admin123")
@@ -1,17 +1,18 @@
-import sqlite3
 import os
-from datetime import datetime
+
+from db_config import conectar_sqlite, ruta_sqlite
+from migraciones import aplicar_migraciones
 
 def fix_missing_column_sqlite():
-    """Agregar la columna fecha_actualizacion de forma compatible con SQLite"""
+    """Agregar la columna fecha_actualizacion de forma compatible con SQLite (vía migraciones.py)"""
     
-    db_path = 'paris_style.db'
+    db_path = ruta_sqlite()
     
     if not os.path.exists(db_path):
         print("❌ Base de datos no encontrada.")
         return
     
-    conn = sqlite3.connect(db_path)
+    conn = conectar_sqlite(db_path)
     cursor = conn.cursor()
     
     try:
@@ -23,25 +24,15 @@ def fix_missing_column_sqlite():
         
         print(f"Columnas actuales en citas: {columns}")
         
+        # La columna la agrega la migración 3; el resto de migraciones pendientes
+        # (fecha_fin, índices) también se aplican
+        aplicadas = aplicar_migraciones(conn)
         if 'fecha_actualizacion' not in columns:
-            print("➕ Agregando columna fecha_actualizacion...")
-            
-            # Paso 1: Agregar columna sin valor por defecto
-            cursor.execute("ALTER TABLE citas ADD COLUMN fecha_actualizacion DATETIME")
-            
-            # Paso 2: Actualizar registros existentes con la fecha actual
-            fecha_actual = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            cursor.execute("""
-                UPDATE citas 
-                SET fecha_actualizacion = ? 
-                WHERE fecha_actualizacion IS NULL
-            """, (fecha_actual,))
-            
-            conn.commit()
             print("✅ Columna fecha_actualizacion agregada exitosamente!")
-            print(f"✅ Registros existentes actualizados con fecha: {fecha_actual}")
         else:
             print("✅ La columna fecha_actualizacion ya existe.")
+        if aplicadas:
+            print(f"✅ Migraciones aplicadas: {', '.join(str(v) for v in aplicadas)}")
         
         # Verificar estructura final
         cursor.execute("PRAGMA table_info(citas)")
@@ -0,0 +1,337 @@
+"""Generador de datos sintéticos de Paris Style para pruebas de carga.
+
+Crea una base de datos nueva con el esquema de migraciones.py y la llena
+con N clientes, M estilistas y varios años de citas con estados y
+notificaciones realistas. La misma semilla y la misma fecha de referencia
+producen siempre los mismos datos:
+
+    python scripts/generar_datos.py --reemplazar                       # ~1M citas
+    python scripts/generar_datos.py --clientes 5000 --estilistas 10 --anios 1 --semilla 7
+
+La agenda de cada estilista se llena día a día, de apertura a cierre y
+sin solapamientos, con servicios de sus especialidades; la ocupación
+sube hacia el fin de semana y los domingos el salón cierra. Las citas
+pasadas quedan completadas o canceladas, las futuras pendientes,
+confirmadas o canceladas, y el historial de notificaciones refleja lo
+que el trabajador de notification_service.py habría enviado.
+
+La carga va en una sola transacción con sentencias preparadas
+(executemany), sin diario en disco y sin índices ni triggers, que se
+recrean al final; después se reconstruyen los índices de búsqueda y los
+resúmenes diarios y se vuelve a WAL.
+
+Credenciales: admin@parisstyle.com / admin123,
+estilista{i}@parisstyle.com / estilista123 y cliente{i}@email.com / cliente123.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from busqueda import reconstruir_indices
+from db_config import PRAGMAS, conectar_sqlite, eliminar_base_datos, ruta_sqlite
+from migraciones import migrar_base_datos
+from resumenes import reconstruir_resumenes
+
+# Solo durante la carga: si se interrumpe, la base se vuelve a generar
+PRAGMAS_CARGA = {**PRAGMAS, "journal_mode": "MEMORY", "synchronous": "OFF", "cache_size": -512000}
+TABLAS_CARGA = ("estilistas", "servicios", "usuarios", "citas", "notificaciones")
+LOTE_CARGA = 50000
+
+INSERTAR_CITA = """
+    INSERT INTO citas (id, cliente_id, estilista_id, servicio_id, fecha_hora, fecha_fin, estado, precio_total,
+                       fecha_creacion, fecha_actualizacion, recordatorio_en)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+HORA_APERTURA = 8 * 60
+HORA_CIERRE = 20 * 60
+DIAS_FUTUROS = 60
+ANTELACION_RECORDATORIO_HORAS = 24
+
+# (nombre, descripción, precio en centavos, minutos, categoría, peso en la demanda), como setup_complete.py
+SERVICIOS = [
+    ("Corte de Cabello", "Corte personalizado según tu estilo", 2500000, 45, "Cabello", 30),
+    ("Coloración Completa", "Cambio de color completo con productos premium", 4500000, 120, "Cabello", 8),
+    ("Mechas", "Mechas tradicionales o balayage", 3500000, 90, "Cabello", 8),
+    ("Tratamiento Capilar", "Hidratación profunda y reparación", 3000000, 60, "Cabello", 6),
+    ("Peinado para Eventos", "Peinado elegante para ocasiones especiales", 4000000, 60, "Cabello", 5),
+    ("Manicure Clásico", "Limado, cutícula y esmaltado tradicional", 2000000, 45, "Uñas", 20),
+    ("Manicure Gel", "Manicure con esmalte gel de larga duración", 3000000, 60, "Uñas", 15),
+    ("Pedicure Clásico", "Cuidado completo de pies con esmaltado", 2500000, 60, "Uñas", 10),
+    ("Pedicure Spa", "Pedicure relajante con exfoliación y masaje", 3500000, 90, "Uñas", 5),
+    ("Nail Art", "Diseños artísticos en uñas", 1500000, 30, "Uñas", 6),
+    ("Limpieza Facial", "Limpieza profunda con extracción de impurezas", 3500000, 60, "Facial", 8),
+    ("Maquillaje Social", "Maquillaje para eventos sociales", 3500000, 45, "Maquillaje", 8),
+    ("Maquillaje para Novias", "Maquillaje completo para el día especial", 6000000, 90, "Maquillaje", 2),
+    ("Diseño de Cejas", "Depilación y diseño profesional de cejas", 1500000, 30, "Cejas", 12),
+    ("Extensiones de Pestañas", "Aplicación de extensiones pelo a pelo", 4500000, 120, "Pestañas", 4),
+]
+
+# Especialidades de un estilista: grupos de categorías que suelen ir juntas
+PERFILES = [("Cabello",), ("Cabello", "Facial"), ("Uñas",), ("Maquillaje", "Cejas", "Pestañas"), ("Facial", "Cejas")]
+
+NOMBRES = ["Sofía", "Lucía", "María", "Valentina", "Camila", "Isabella", "Mariana", "Daniela", "Ángela", "Inés",
+           "Paula", "Gabriela", "Natalia", "Laura", "Carolina", "José", "Andrés", "Martín", "Sebastián", "Nicolás",
+           "Julián", "Óscar", "Lucas", "Samuel", "Tomás", "Carlos", "Luis", "Felipe", "Diego", "Alejandro"]
+APELLIDOS = ["García", "Rodríguez", "Martínez", "Gómez", "López", "Pérez", "Sánchez", "Ramírez", "Díaz", "Torres",
+             "Muñoz", "Hernández", "Núñez", "Jiménez", "Álvarez", "Castaño", "Ríos", "Herrera", "Vásquez", "Peña",
+             "Moreno", "Rojas", "Vargas", "Castro", "Ortiz", "Gutiérrez", "Restrepo", "Cárdenas", "Mejía", "Osorio"]
+
+# Lunes a sábado: la agenda se llena más hacia el fin de semana; domingo cerrado
+OCUPACION_DIA_SEMANA = (0.65, 0.7, 0.75, 0.8, 0.95, 1.0, 0.0)
+
+# Citas pasadas: completadas o canceladas; futuras: pendientes, confirmadas o canceladas (acumuladas)
+PROBABILIDAD_COMPLETADA = 0.86
+PROBABILIDAD_PENDIENTE = 0.35
+PROBABILIDAD_CONFIRMADA = 0.9
+
+# Historial de notificaciones que el trabajador de notification_service.py habría
+# escrito para cada cita: (tipo, texto, citas que la recibieron, fecha de envío)
+NOTIFICACIONES_HISTORIAL = [
+    ("confirmacion", "Confirmación enviada", "1 = 1", "fecha_creacion"),
+    ("cita_confirmada", "Confirmación del estilista enviada", "estado IN ('confirmada', 'completada')", "fecha_creacion"),
+    ("cancelacion", "Cancelación enviada", "estado = 'cancelada'", "fecha_actualizacion"),
+    ("recordatorio", "Recordatorio enviado",
+     "estado = 'completada' OR (estado = 'confirmada' AND recordatorio_en IS NULL)",
+     f"strftime('%Y-%m-%d %H:%M:%S.000000', fecha_hora, '-{ANTELACION_RECORDATORIO_HORAS} hours')"),
+]
+
+def _hash(password: str) -> str:
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def _telefono(rng) -> str:
+    return f"+57 3{rng.randrange(10)}{rng.randrange(10)} {rng.randrange(1000):03d} {rng.randrange(10000):04d}"
+
+def generar_personal(rng, num_estilistas):
+    """Filas de estilistas y de sus usuarios, con las categorías de cada uno"""
+    estilistas, usuarios, categorias = [], [], []
+    for i in range(1, num_estilistas + 1):
+        nombre = f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}"
+        perfil = PERFILES[(i - 1) % len(PERFILES)]
+        categorias.append(perfil)
+        estilistas.append((i, nombre, ", ".join(perfil), _telefono(rng), f"estilista{i}@parisstyle.com"))
+        usuarios.append((nombre, f"estilista{i}@parisstyle.com", _telefono(rng), _hash("estilista123"), 0, 1, i))
+    return estilistas, usuarios, categorias
+
+def generar_clientes(rng, num_clientes):
+    contrasena = _hash("cliente123")
+    for i in range(1, num_clientes + 1):
+        yield (f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}", f"cliente{i}@email.com",
+               _telefono(rng), contrasena, 0, 0, None)
+
+def generar_citas(rng, categorias, primer_cliente, num_clientes, inicio: date, dias_pasados, ahora: datetime, ocupacion):
+    """Genera, día a día, las citas como tuplas para executemany.
+
+    Las fechas se escriben como las guarda SQLAlchemy ("YYYY-MM-DD HH:MM:SS.ffffff")
+    para que las comparaciones de texto de la API sigan funcionando.
+    """
+    total_dias = dias_pasados + DIAS_FUTUROS
+    # Con margen hacia atrás para las fechas de creación de las primeras citas
+    margen = 32
+    dias_iso = [(inicio + timedelta(days=d - margen)).isoformat() + " " for d in range(total_dias + margen)]
+    horas = [f"{m // 60:02d}:{m % 60:02d}:00.000000" for m in range(1440)]
+    minuto_ahora = (ahora.date() - inicio).days * 1440 + ahora.hour * 60 + ahora.minute
+    antelacion_recordatorio = ANTELACION_RECORDATORIO_HORAS * 60
+
+    def texto(minuto_absoluto: int) -> str:
+        dia, minuto = divmod(minuto_absoluto, 1440)
+        return dias_iso[dia + margen] + horas[minuto]
+
+    # Servicios de cada perfil repetidos según su peso: elegir uno es indexar al azar
+    menus = {
+        perfil: [i + 1 for i, s in enumerate(SERVICIOS) if s[4] in perfil for _ in range(s[5])]
+        for perfil in set(categorias)
+    }
+    duraciones = [0] + [s[3] for s in SERVICIOS]
+    precios = [0] + [s[2] for s in SERVICIOS]
+
+    cita_id = 0
+    aleatorio = rng.random
+    for d in range(total_dias):
+        factor = OCUPACION_DIA_SEMANA[(inicio + timedelta(days=d)).weekday()] * ocupacion
+        if not factor:
+            continue
+        citas = []
+        dia = dias_iso[d + margen]
+        for estilista_id, perfil in enumerate(categorias, start=1):
+            menu = menus[perfil]
+            minuto = HORA_APERTURA
+            while True:
+                servicio_id = menu[int(aleatorio() * len(menu))]
+                fin = minuto + duraciones[servicio_id]
+                if fin > HORA_CIERRE:
+                    break
+                if aleatorio() >= factor:
+                    # Hueco libre de un cuarto de hora
+                    minuto += 15
+                    continue
+                cita_id += 1
+                inicio_cita = d * 1440 + minuto
+                r = aleatorio()
+                recordatorio_en = None
+                if inicio_cita < minuto_ahora:
+                    estado = "completada" if r < PROBABILIDAD_COMPLETADA else "cancelada"
+                else:
+                    estado = "pendiente" if r < PROBABILIDAD_PENDIENTE else "confirmada" if r < PROBABILIDAD_CONFIRMADA else "cancelada"
+                    # Recordatorio aún por encolar si falta más de la antelación; si no, ya se envió
+                    if estado == "confirmada" and inicio_cita - antelacion_recordatorio > minuto_ahora:
+                        recordatorio_en = texto(inicio_cita - antelacion_recordatorio)
+                # Reservada hasta 30 días antes, casi siempre con poca antelación, y nunca después de "ahora"
+                creacion = texto(min(inicio_cita - int(30 * aleatorio() ** 2) * 1440 - 60 - int(540 * aleatorio()), minuto_ahora))
+                fecha_hora = dia + horas[minuto]
+                citas.append((
+                    cita_id, primer_cliente + int(num_clientes * aleatorio() ** 1.5), estilista_id, servicio_id,
+                    fecha_hora, dia + horas[fin], estado, precios[servicio_id],
+                    creacion, fecha_hora if estado == "completada" else creacion, recordatorio_en,
+                ))
+                minuto = fin
+        yield citas
+
+def _desactivar_indices(conexion):
+    """Quita índices y triggers de las tablas que se cargan y devuelve su SQL para recrearlos"""
+    objetos = conexion.execute(f"""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+        AND tbl_name IN ({", ".join("?" for _ in TABLAS_CARGA)})
+    """, TABLAS_CARGA).fetchall()
+    for tipo, nombre, _ in objetos:
+        conexion.execute(f"DROP {tipo.upper()} {nombre}")
+    return [sql for _, _, sql in objetos]
+
+def generar(ruta, num_clientes, num_estilistas, anios, semilla, ocupacion, referencia: datetime, reemplazar=False) -> dict:
+    if os.path.exists(ruta):
+        if not reemplazar:
+            raise SystemExit(f"❌ {ruta} ya existe; usa --reemplazar para generar una base nueva")
+        eliminar_base_datos(ruta)
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    migrar_base_datos(ruta)
+
+    rng = random.Random(semilla)
+    tiempos = {}
+    conexion = conectar_sqlite(ruta, PRAGMAS_CARGA)
+    conexion.isolation_level = None
+    try:
+        conexion.execute("BEGIN")
+        t0 = time.perf_counter()
+        recrear = _desactivar_indices(conexion)
+
+        estilistas, personal, categorias = generar_personal(rng, num_estilistas)
+        conexion.executemany("INSERT INTO estilistas (id, nombre, especialidades, telefono, email) VALUES (?, ?, ?, ?, ?)",
+                             estilistas)
+        conexion.executemany(
+            "INSERT INTO servicios (id, nombre, descripcion, precio, duracion_minutos, categoria) VALUES (?, ?, ?, ?, ?, ?)",
+            [(i, *s[:5]) for i, s in enumerate(SERVICIOS, start=1)]
+        )
+        insertar_usuario = """
+            INSERT INTO usuarios (nombre, email, telefono, password_hash, es_admin, es_estilista, estilista_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        conexion.execute(insertar_usuario, ("Administrador", "admin@parisstyle.com", "+57 300 000 0000", _hash("admin123"), 1, 0, None))
+        conexion.executemany(insertar_usuario, personal)
+        primer_cliente = 2 + num_estilistas
+        conexion.executemany(insertar_usuario, generar_clientes(rng, num_clientes))
+        tiempos["usuarios_s"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        dias_pasados = int(anios * 365)
+        inicio = referencia.date() - timedelta(days=dias_pasados)
+        lote = []
+        for citas in generar_citas(rng, categorias, primer_cliente, num_clientes, inicio, dias_pasados, referencia, ocupacion):
+            lote.extend(citas)
+            if len(lote) >= LOTE_CARGA:
+                conexion.executemany(INSERTAR_CITA, lote)
+                lote.clear()
+        conexion.executemany(INSERTAR_CITA, lote)
+        tiempos["citas_s"] = time.perf_counter() - t0
+
+        # El historial sale de las citas ya cargadas, sin pasar por Python
+        t0 = time.perf_counter()
+        for tipo, historial, condicion, fecha_envio in NOTIFICACIONES_HISTORIAL:
+            conexion.execute(f"""
+                INSERT INTO notificaciones (usuario_id, cita_id, tipo, mensaje, enviado, fecha_envio, fecha_creacion)
+                SELECT cliente_id, id, ?, ? || ' para cita del ' || strftime('%d/%m/%Y %H:%M', fecha_hora), 1,
+                       {fecha_envio}, {fecha_envio}
+                FROM citas WHERE {condicion}
+            """, (tipo, historial))
+        tiempos["notificaciones_s"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for sql in recrear:
+            conexion.execute(sql)
+        # Los triggers de citas estaban quitados durante la carga
+        conexion.execute("""
+            UPDATE citas_duracion_maxima
+            SET minutos = (SELECT COALESCE(MAX((CAST(ROUND((julianday(fecha_fin) - julianday(fecha_hora)) * 86400) AS INTEGER) + 59) / 60), 0)
+                           FROM citas)
+            WHERE id = 1
+        """)
+        reconstruir_indices(conexion)
+        reconstruir_resumenes(conexion)
+        tiempos["indices_s"] = time.perf_counter() - t0
+        conexion.execute("COMMIT")
+
+        t0 = time.perf_counter()
+        conexion.execute("ANALYZE")
+        tiempos["analyze_s"] = time.perf_counter() - t0
+        estados = dict(conexion.execute("SELECT estado, COUNT(*) FROM citas GROUP BY estado").fetchall())
+        total_notificaciones = conexion.execute("SELECT COUNT(*) FROM notificaciones").fetchone()[0]
+    except BaseException:
+        if conexion.in_transaction:
+            conexion.execute("ROLLBACK")
+        raise
+    finally:
+        conexion.close()
+    # Una conexión con los PRAGMAs normales deja la base en WAL
+    conexion = conectar_sqlite(ruta)
+    conexion.close()
+
+    return {
+        "ruta": ruta,
+        "semilla": semilla,
+        "referencia": referencia.isoformat(sep=" "),
+        "clientes": num_clientes,
+        "estilistas": num_estilistas,
+        "citas": sum(estados.values()),
+        "notificaciones": total_notificaciones,
+        "estados": estados,
+        **{clave: round(valor, 2) for clave, valor in tiempos.items()},
+        "total_s": round(sum(tiempos.values()), 2),
+    }
+
+def _referencia(valor: str) -> datetime:
+    return datetime.strptime(valor, "%Y-%m-%d %H:%M")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera una base de datos sintética de Paris Style")
+    parser.add_argument("--clientes", type=int, default=100000)
+    parser.add_argument("--estilistas", type=int, default=100)
+    parser.add_argument("--anios", type=float, default=3, help="años de citas hacia atrás (más 60 días hacia delante)")
+    parser.add_argument("--ocupacion", type=float, default=0.85, help="ocupación de la agenda el día más lleno (0-1)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--referencia", type=_referencia, default=datetime.now().replace(second=0, microsecond=0),
+                        help="'ahora' de los datos (YYYY-MM-DD HH:MM); fíjalo para reproducir la misma base")
+    parser.add_argument("--ruta", default=None, help="archivo SQLite; por defecto el de DATABASE_URL")
+    parser.add_argument("--reemplazar", action="store_true", help="borra la base de datos si ya existe")
+    parser.add_argument("--json", action="store_true", help="salida legible por máquina")
+    args = parser.parse_args()
+
+    ruta = args.ruta or ruta_sqlite()
+    if not args.json:
+        print(f"🔧 Generando {ruta} (semilla {args.semilla})...")
+    resultado = generar(ruta, args.clientes, args.estilistas, args.anios, args.semilla, args.ocupacion,
+                        args.referencia, args.reemplazar)
+
+    if args.json:
+        print(json.dumps(resultado))
+    else:
+        print(f"✅ {resultado['clientes']} clientes, {resultado['estilistas']} estilistas, {resultado['citas']} citas "
+              f"y {resultado['notificaciones']} notificaciones en {resultado['total_s']} s")
+        print("   " + ", ".join(f"{estado}: {n}" for estado, n in sorted(resultado["estados"].items())))
+        print(f"   usuarios {resultado['usuarios_s']} s, citas {resultado['citas_s']} s, "
+              f"notificaciones {resultado['notificaciones_s']} s, "
+              f"índices y resúmenes {resultado['indices_s']} s, ANALYZE {resultado['analyze_s']} s")
@@ -0,0 +1,131 @@
+"""Configuración compartida de logging para Paris Style.
+
+Los endpoints solo encolan el registro (QueueHandler); un hilo en segundo
+plano (QueueListener) lo formatea y lo escribe, de modo que la E/S de
+stdout nunca ocurre en el hilo de la petición. Cada línea es un objeto JSON
+completo, así que los logs de varios workers de uvicorn no se mezclan a
+mitad de línea.
+
+Variables de entorno:
+    PARIS_STYLE_LOG_NIVEL            nivel raíz (INFO)
+    PARIS_STYLE_LOG_NIVELES          niveles por logger: "paris_style.api=DEBUG,httpx=WARNING"
+    PARIS_STYLE_LOG_FORMATO          "json" o "texto"
+    PARIS_STYLE_LOG_MUESTREO_DEBUG   fracción de registros DEBUG que se emiten (0.01)
+
+Los campos estructurados se pasan con `extra={"campos": {...}}`.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+LOG_NIVEL = os.getenv("PARIS_STYLE_LOG_NIVEL", "INFO")
+# Los clientes HTTP registran cada petición en INFO
+LOG_NIVELES = os.getenv("PARIS_STYLE_LOG_NIVELES", "httpx=WARNING,httpcore=WARNING")
+LOG_FORMATO = os.getenv("PARIS_STYLE_LOG_FORMATO", "json")
+LOG_MUESTREO_DEBUG = float(os.getenv("PARIS_STYLE_LOG_MUESTREO_DEBUG", "0.01"))
+
+_listener: Optional[QueueListener] = None
+
+class FormateadorJSON(logging.Formatter):
+    """Una línea JSON por registro, con los campos de `extra={"campos": ...}`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entrada = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+        campos = getattr(record, "campos", None)
+        if campos:
+            entrada.update(campos)
+        if record.exc_text:
+            entrada["excepcion"] = record.exc_text
+        return json.dumps(entrada, ensure_ascii=False, default=str)
+
+class FiltroMuestreo(logging.Filter):
+    """Deja pasar todos los registros INFO o superiores y solo una fracción de los DEBUG"""
+
+    def __init__(self, tasa: float):
+        super().__init__()
+        self.tasa = tasa
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.tasa
+
+class ManejadorCola(QueueHandler):
+    """QueueHandler que deja el formateo final al listener.
+
+    QueueHandler.prepare formatea el mensaje completo en el hilo que
+    registra y pierde los campos estructurados; aquí solo se resuelven los
+    argumentos y la traza de la excepción, que no se pueden serializar más
+    tarde de forma segura.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def parse_niveles(valor: str) -> Dict[str, str]:
+    niveles = {}
+    for par in filter(None, (p.strip() for p in valor.split(","))):
+        nombre, _, nivel = par.partition("=")
+        niveles[nombre.strip()] = nivel.strip().upper()
+    return niveles
+
+def configurar_logging(
+    nivel: str = None,
+    niveles: Dict[str, str] = None,
+    formato: str = None,
+    muestreo_debug: float = None,
+    stream=None
+) -> QueueListener:
+    """Instala el QueueHandler en el logger raíz y arranca el listener.
+
+    Se puede llamar varias veces: la configuración anterior se detiene
+    (vaciando su cola) antes de instalar la nueva.
+    """
+    global _listener
+    detener_logging()
+
+    salida = logging.StreamHandler(stream or sys.stdout)
+    if (formato or LOG_FORMATO) == "json":
+        salida.setFormatter(FormateadorJSON())
+    else:
+        salida.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    cola = queue.SimpleQueue()
+    manejador = ManejadorCola(cola)
+    manejador.addFilter(FiltroMuestreo(LOG_MUESTREO_DEBUG if muestreo_debug is None else muestreo_debug))
+
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(manejador)
+    raiz.setLevel((nivel or LOG_NIVEL).upper())
+    for nombre, nivel_logger in (parse_niveles(LOG_NIVELES) if niveles is None else niveles).items():
+        logging.getLogger(nombre).setLevel(nivel_logger)
+
+    _listener = QueueListener(cola, salida)
+    _listener.start()
+    return _listener
+
+def detener_logging():
+    """Detiene el listener después de escribir lo que quede en la cola"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(detener_logging)
@@ -0,0 +1,541 @@
+"""Migraciones versionadas del esquema de Paris Style.
+
+Cada migración se aplica una sola vez, dentro de una transacción
+BEGIN IMMEDIATE, y queda registrada en la tabla schema_migraciones. Son
+idempotentes sobre bases de datos creadas por los scripts anteriores
+(fix_db.py, setup_complete.py, ...), por lo que se pueden ejecutar sobre
+una base en producción sin borrarla:
+
+    python scripts/migraciones.py            # aplica las pendientes
+    python scripts/migraciones.py --estado   # lista las versiones aplicadas
+"""
+import argparse
+import os
+from collections import namedtuple
+from datetime import datetime
+from typing import List
+
+from db_config import conectar_sqlite, ruta_sqlite
+
+Migracion = namedtuple("Migracion", ["version", "descripcion", "aplicar"])
+
+def _columnas(conexion, tabla: str) -> List[str]:
+    return [fila[1] for fila in conexion.execute(f"PRAGMA table_info({tabla})")]
+
+def _agregar_columna(conexion, tabla: str, columna: str, definicion: str) -> bool:
+    if columna in _columnas(conexion, tabla):
+        return False
+    conexion.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}")
+    return True
+
+def _v1_esquema_base(conexion):
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS estilistas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre VARCHAR(100) NOT NULL,
+            especialidades TEXT,
+            telefono VARCHAR(20),
+            email VARCHAR(100),
+            activo BOOLEAN DEFAULT TRUE,
+            fecha_contratacion DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre VARCHAR(100) NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            telefono VARCHAR(20) NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            es_admin BOOLEAN DEFAULT FALSE,
+            es_estilista BOOLEAN DEFAULT FALSE,
+            estilista_id INTEGER,
+            fecha_registro DATETIME DEFAULT CURRENT_TIMESTAMP,
+            activo BOOLEAN DEFAULT TRUE,
+            FOREIGN KEY (estilista_id) REFERENCES estilistas(id)
+        )
+    """)
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS servicios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre VARCHAR(100) NOT NULL,
+            descripcion TEXT,
+            precio INTEGER NOT NULL,
+            duracion_minutos INTEGER NOT NULL,
+            categoria VARCHAR(50),
+            activo BOOLEAN DEFAULT TRUE,
+            fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS citas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            estilista_id INTEGER,
+            servicio_id INTEGER NOT NULL,
+            fecha_hora DATETIME NOT NULL,
+            estado VARCHAR(20) DEFAULT 'pendiente',
+            notas TEXT,
+            precio_total INTEGER,
+            fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (cliente_id) REFERENCES usuarios(id),
+            FOREIGN KEY (estilista_id) REFERENCES estilistas(id),
+            FOREIGN KEY (servicio_id) REFERENCES servicios(id)
+        )
+    """)
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS notificaciones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER NOT NULL,
+            cita_id INTEGER,
+            tipo VARCHAR(50) NOT NULL,
+            mensaje TEXT NOT NULL,
+            enviado BOOLEAN DEFAULT FALSE,
+            fecha_envio DATETIME,
+            fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
+            FOREIGN KEY (cita_id) REFERENCES citas(id)
+        )
+    """)
+
+def _v2_roles_usuarios(conexion):
+    # Antes en setup_enhanced_users.py
+    _agregar_columna(conexion, "usuarios", "es_estilista", "BOOLEAN DEFAULT FALSE")
+    _agregar_columna(conexion, "usuarios", "estilista_id", "INTEGER")
+
+def _v3_fecha_actualizacion(conexion):
+    # Antes en fix_missing_column_sqlite.py
+    if _agregar_columna(conexion, "citas", "fecha_actualizacion", "DATETIME"):
+        conexion.execute(
+            "UPDATE citas SET fecha_actualizacion = ? WHERE fecha_actualizacion IS NULL",
+            (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),)
+        )
+
+def _v4_fecha_fin(conexion):
+    if _agregar_columna(conexion, "citas", "fecha_fin", "DATETIME"):
+        conexion.execute("""
+            UPDATE citas
+            SET fecha_fin = strftime('%Y-%m-%d %H:%M:%S', fecha_hora,
+                '+' || (SELECT duracion_minutos FROM servicios s WHERE s.id = citas.servicio_id) || ' minutes'
+            ) || '.000000'
+            WHERE fecha_fin IS NULL
+        """)
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_citas_estilista_rango ON citas (estilista_id, fecha_hora, fecha_fin)")
+
+def _v5_indices_consultas_frecuentes(conexion):
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_citas_fecha ON citas (fecha_hora)")
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_citas_estilista_fecha_estado ON citas (estilista_id, fecha_hora, estado)")
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_citas_cliente_fecha ON citas (cliente_id, fecha_hora)")
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_notificaciones_cita_tipo_enviado ON notificaciones (cita_id, tipo, enviado)")
+
+def _v6_registro_cambios_citas(conexion):
+    # AUTOINCREMENT: los ids nunca se reutilizan, así que sirven de cursor
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS citas_cambios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cita_id INTEGER NOT NULL,
+            cliente_id INTEGER NOT NULL,
+            estilista_id INTEGER,
+            tipo VARCHAR(20) NOT NULL,
+            fecha DATETIME NOT NULL,
+            FOREIGN KEY (cita_id) REFERENCES citas(id)
+        )
+    """)
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_citas_cambios_estilista ON citas_cambios (estilista_id, id)")
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_citas_cambios_cliente ON citas_cambios (cliente_id, id)")
+
+def _v7_notificaciones_salida(conexion):
+    # Bandeja de salida: la API la escribe en la transacción de la cita y
+    # notification_service.py la vacía con reintentos
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS notificaciones_salida (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cita_id INTEGER NOT NULL,
+            usuario_id INTEGER NOT NULL,
+            tipo VARCHAR(50) NOT NULL,
+            estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',
+            intentos INTEGER NOT NULL DEFAULT 0,
+            disponible_en DATETIME NOT NULL,
+            reclamado_por VARCHAR(64),
+            ultimo_error TEXT,
+            fecha_creacion DATETIME NOT NULL,
+            fecha_envio DATETIME,
+            CONSTRAINT uq_notificaciones_salida_cita_tipo UNIQUE (cita_id, tipo),
+            FOREIGN KEY (cita_id) REFERENCES citas(id),
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+        )
+    """)
+    conexion.execute("""
+        CREATE INDEX IF NOT EXISTS idx_notificaciones_salida_pendientes
+        ON notificaciones_salida (disponible_en) WHERE estado = 'pendiente'
+    """)
+
+def _v8_recordatorio_en(conexion):
+    # Momento en que se debe encolar el recordatorio de una cita confirmada;
+    # NULL cuando ya se encoló o no corresponde
+    if _agregar_columna(conexion, "citas", "recordatorio_en", "DATETIME"):
+        horas = float(os.getenv("PARIS_STYLE_RECORDATORIO_HORAS", "24"))
+        conexion.execute("""
+            UPDATE citas
+            SET recordatorio_en = strftime('%Y-%m-%d %H:%M:%S', fecha_hora, ?) || '.000000'
+            WHERE estado = 'confirmada'
+            AND fecha_hora > ?
+            AND NOT EXISTS (
+                SELECT 1 FROM notificaciones n
+                WHERE n.cita_id = citas.id AND n.tipo = 'recordatorio' AND n.enviado = 1
+            )
+        """, (f"-{horas * 3600:.0f} seconds", datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    conexion.execute("""
+        CREATE INDEX IF NOT EXISTS idx_citas_recordatorio
+        ON citas (recordatorio_en) WHERE estado = 'confirmada'
+    """)
+
+def _v9_notificaciones_unicas(conexion):
+    # El historial guarda una notificación por cita y tipo, como la bandeja
+    # de salida. Los duplicados de los scripts anteriores se reducen a una
+    # fila: la primera enviada o, si ninguna se envió, la primera
+    conexion.execute("""
+        DELETE FROM notificaciones
+        WHERE cita_id IS NOT NULL AND EXISTS (
+            SELECT 1 FROM notificaciones otra
+            WHERE otra.cita_id = notificaciones.cita_id AND otra.tipo = notificaciones.tipo
+            AND (COALESCE(otra.enviado, 0) > COALESCE(notificaciones.enviado, 0)
+                 OR (COALESCE(otra.enviado, 0) = COALESCE(notificaciones.enviado, 0) AND otra.id < notificaciones.id))
+        )
+    """)
+    conexion.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_notificaciones_cita_tipo ON notificaciones (cita_id, tipo)")
+    # El índice único devuelve como mucho una fila por (cita_id, tipo), así
+    # que el de v5 con enviado ya no aporta nada y SQLite no lo elegiría
+    conexion.execute("DROP INDEX IF EXISTS idx_notificaciones_cita_tipo_enviado")
+
+def _v10_resumenes_diarios(conexion):
+    # Mantenidos por la API en cada cambio de estado (ver resumenes.py)
+    for tabla, columna in (("resumen_diario_estilista", "estilista_id"), ("resumen_diario_servicio", "servicio_id")):
+        conexion.execute(f"""
+            CREATE TABLE IF NOT EXISTS {tabla} (
+                dia DATE NOT NULL,
+                {columna} INTEGER NOT NULL,
+                estado VARCHAR(20) NOT NULL,
+                citas INTEGER NOT NULL DEFAULT 0,
+                ingresos INTEGER NOT NULL DEFAULT 0,
+                minutos INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (dia, {columna}, estado)
+            ) WITHOUT ROWID
+        """)
+    # Llenado inicial desde citas, copiado aquí tal como era al escribir la
+    # migración: resumenes.py puede cambiar sin alterar lo que hace v10
+    for tabla, columna, clave in (("resumen_diario_estilista", "estilista_id", "COALESCE(c.estilista_id, 0)"),
+                                  ("resumen_diario_servicio", "servicio_id", "c.servicio_id")):
+        conexion.execute(f"DELETE FROM {tabla}")
+        conexion.execute(f"""
+            INSERT INTO {tabla} (dia, {columna}, estado, citas, ingresos, minutos)
+            SELECT date(c.fecha_hora), {clave}, COALESCE(c.estado, 'pendiente'),
+                   COUNT(*), SUM(COALESCE(c.precio_total, 0)),
+                   SUM(COALESCE(
+                       CAST(ROUND((julianday(c.fecha_fin) - julianday(c.fecha_hora)) * 1440) AS INTEGER),
+                       (SELECT s.duracion_minutos FROM servicios s WHERE s.id = c.servicio_id),
+                       0
+                   ))
+            FROM citas c
+            GROUP BY 1, 2, 3
+        """)
+
+def _v11_productos_y_ventas(conexion):
+    # productos ya existe en las bases creadas con database_setup.sql
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS productos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre VARCHAR(100) NOT NULL,
+            descripcion TEXT,
+            precio INTEGER NOT NULL,
+            stock INTEGER NOT NULL DEFAULT 0 CHECK (stock >= 0),
+            categoria VARCHAR(50),
+            imagen_url VARCHAR(255),
+            activo BOOLEAN DEFAULT 1,
+            fecha_creacion DATETIME
+        )
+    """)
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS ventas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vendedor_id INTEGER NOT NULL,
+            cliente_id INTEGER,
+            total INTEGER NOT NULL,
+            fecha DATETIME NOT NULL,
+            FOREIGN KEY (vendedor_id) REFERENCES usuarios(id),
+            FOREIGN KEY (cliente_id) REFERENCES usuarios(id)
+        )
+    """)
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS ventas_lineas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            venta_id INTEGER NOT NULL,
+            producto_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL,
+            precio_unitario INTEGER NOT NULL,
+            FOREIGN KEY (venta_id) REFERENCES ventas(id),
+            FOREIGN KEY (producto_id) REFERENCES productos(id)
+        )
+    """)
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas (fecha)")
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_ventas_lineas_venta ON ventas_lineas (venta_id)")
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_ventas_lineas_producto ON ventas_lineas (producto_id)")
+
+def _v12_cursos(conexion):
+    # cursos.inscritos es el contador de plazas ocupadas: lo mantiene la API
+    # con un UPDATE condicional en cada inscripción, sin contar filas
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS cursos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre VARCHAR(100) NOT NULL,
+            descripcion TEXT,
+            precio INTEGER NOT NULL,
+            fecha DATE NOT NULL,
+            horario VARCHAR(50),
+            cupo INTEGER NOT NULL,
+            inscritos INTEGER NOT NULL DEFAULT 0,
+            activo BOOLEAN DEFAULT 1,
+            fecha_creacion DATETIME,
+            CHECK (inscritos >= 0 AND inscritos <= cupo)
+        )
+    """)
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS inscripciones_cursos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            curso_id INTEGER NOT NULL,
+            usuario_id INTEGER NOT NULL,
+            fecha_inscripcion DATETIME NOT NULL,
+            CONSTRAINT uq_inscripciones_curso_usuario UNIQUE (curso_id, usuario_id),
+            FOREIGN KEY (curso_id) REFERENCES cursos(id),
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+        )
+    """)
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_cursos_fecha ON cursos (fecha)")
+
+def _v13_indices_busqueda(conexion):
+    # Tablas FTS5 y triggers de GET /api/buscar, copiados aquí tal como eran al
+    # escribir la migración: busqueda.py puede cambiar sin alterar lo que hace v13
+    for fts, tabla, columnas in (("servicios_fts", "servicios", "nombre, descripcion, categoria"),
+                                 ("estilistas_fts", "estilistas", "nombre, especialidades"),
+                                 ("usuarios_fts", "usuarios", "nombre, email")):
+        conexion.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {columnas}, content='{tabla}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        """)
+    conexion.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS usuarios_telefono_fts USING fts5(
+            telefono, content='', tokenize='trigram'
+        )
+    """)
+    triggers = [
+        """CREATE TRIGGER IF NOT EXISTS servicios_fts_ai AFTER INSERT ON servicios BEGIN
+            INSERT INTO servicios_fts (rowid, nombre, descripcion, categoria)
+            VALUES (new.id, new.nombre, new.descripcion, new.categoria);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS servicios_fts_ad AFTER DELETE ON servicios BEGIN
+            INSERT INTO servicios_fts (servicios_fts, rowid, nombre, descripcion, categoria)
+            VALUES ('delete', old.id, old.nombre, old.descripcion, old.categoria);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS servicios_fts_au AFTER UPDATE OF nombre, descripcion, categoria ON servicios BEGIN
+            INSERT INTO servicios_fts (servicios_fts, rowid, nombre, descripcion, categoria)
+            VALUES ('delete', old.id, old.nombre, old.descripcion, old.categoria);
+            INSERT INTO servicios_fts (rowid, nombre, descripcion, categoria)
+            VALUES (new.id, new.nombre, new.descripcion, new.categoria);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS estilistas_fts_ai AFTER INSERT ON estilistas BEGIN
+            INSERT INTO estilistas_fts (rowid, nombre, especialidades) VALUES (new.id, new.nombre, new.especialidades);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS estilistas_fts_ad AFTER DELETE ON estilistas BEGIN
+            INSERT INTO estilistas_fts (estilistas_fts, rowid, nombre, especialidades)
+            VALUES ('delete', old.id, old.nombre, old.especialidades);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS estilistas_fts_au AFTER UPDATE OF nombre, especialidades ON estilistas BEGIN
+            INSERT INTO estilistas_fts (estilistas_fts, rowid, nombre, especialidades)
+            VALUES ('delete', old.id, old.nombre, old.especialidades);
+            INSERT INTO estilistas_fts (rowid, nombre, especialidades) VALUES (new.id, new.nombre, new.especialidades);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS usuarios_fts_ai AFTER INSERT ON usuarios BEGIN
+            INSERT INTO usuarios_fts (rowid, nombre, email) VALUES (new.id, new.nombre, new.email);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS usuarios_fts_ad AFTER DELETE ON usuarios BEGIN
+            INSERT INTO usuarios_fts (usuarios_fts, rowid, nombre, email) VALUES ('delete', old.id, old.nombre, old.email);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS usuarios_fts_au AFTER UPDATE OF nombre, email ON usuarios BEGIN
+            INSERT INTO usuarios_fts (usuarios_fts, rowid, nombre, email) VALUES ('delete', old.id, old.nombre, old.email);
+            INSERT INTO usuarios_fts (rowid, nombre, email) VALUES (new.id, new.nombre, new.email);
+        END""",
+        # Solo las cifras del teléfono
+        """CREATE TRIGGER IF NOT EXISTS usuarios_telefono_fts_ai AFTER INSERT ON usuarios BEGIN
+            INSERT INTO usuarios_telefono_fts (rowid, telefono)
+            VALUES (new.id, REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(new.telefono, ' ', ''), '+', ''), '-', ''), '(', ''), ')', ''), '.', ''));
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS usuarios_telefono_fts_ad AFTER DELETE ON usuarios BEGIN
+            INSERT INTO usuarios_telefono_fts (usuarios_telefono_fts, rowid, telefono)
+            VALUES ('delete', old.id, REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(old.telefono, ' ', ''), '+', ''), '-', ''), '(', ''), ')', ''), '.', ''));
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS usuarios_telefono_fts_au AFTER UPDATE OF telefono ON usuarios BEGIN
+            INSERT INTO usuarios_telefono_fts (usuarios_telefono_fts, rowid, telefono)
+            VALUES ('delete', old.id, REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(old.telefono, ' ', ''), '+', ''), '-', ''), '(', ''), ')', ''), '.', ''));
+            INSERT INTO usuarios_telefono_fts (rowid, telefono)
+            VALUES (new.id, REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(new.telefono, ' ', ''), '+', ''), '-', ''), '(', ''), ')', ''), '.', ''));
+        END""",
+    ]
+    for trigger in triggers:
+        conexion.execute(trigger)
+    for fts in ("servicios_fts", "estilistas_fts", "usuarios_fts"):
+        conexion.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+    conexion.execute("INSERT INTO usuarios_telefono_fts (usuarios_telefono_fts) VALUES ('delete-all')")
+    conexion.execute("""
+        INSERT INTO usuarios_telefono_fts (rowid, telefono)
+        SELECT id, REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(telefono, ' ', ''), '+', ''), '-', ''), '(', ''), ')', ''), '.', '')
+        FROM usuarios
+    """)
+
+def _v14_fecha_fin_y_duracion_maxima(conexion):
+    # v4 solo calculaba fecha_fin al crear la columna; las citas insertadas
+    # después sin ella (seed_data.sql, INSERTs a mano) no chocaban con nada
+    fecha_fin = """strftime('%Y-%m-%d %H:%M:%S', {cita}.fecha_hora,
+        '+' || COALESCE((SELECT duracion_minutos FROM servicios s WHERE s.id = {cita}.servicio_id), 0) || ' minutes'
+    ) || '.000000'"""
+    conexion.execute(f"UPDATE citas SET fecha_fin = {fecha_fin.format(cita='citas')} WHERE fecha_fin IS NULL")
+    # Duración de la cita más larga guardada, en minutos redondeados hacia
+    # arriba: es la cota inferior del rango de las consultas de solapamiento.
+    # Solo crece, así que acortar un servicio nunca la deja por debajo de una cita existente
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS citas_duracion_maxima (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            minutos INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conexion.execute("""
+        INSERT OR REPLACE INTO citas_duracion_maxima (id, minutos)
+        SELECT 1, COALESCE(MAX((CAST(ROUND((julianday(fecha_fin) - julianday(fecha_hora)) * 86400) AS INTEGER) + 59) / 60), 0)
+        FROM citas
+    """)
+    triggers = [
+        f"""CREATE TRIGGER IF NOT EXISTS citas_fecha_fin_ai AFTER INSERT ON citas WHEN new.fecha_fin IS NULL BEGIN
+            UPDATE citas SET fecha_fin = {fecha_fin.format(cita='new')} WHERE id = new.id;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS citas_fecha_fin_au AFTER UPDATE OF fecha_hora, fecha_fin ON citas
+            WHEN new.fecha_fin IS NULL BEGIN
+            UPDATE citas SET fecha_fin = {fecha_fin.format(cita='new')} WHERE id = new.id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS citas_duracion_maxima_ai AFTER INSERT ON citas WHEN new.fecha_fin IS NOT NULL BEGIN
+            UPDATE citas_duracion_maxima
+            SET minutos = MAX(minutos, (CAST(ROUND((julianday(new.fecha_fin) - julianday(new.fecha_hora)) * 86400) AS INTEGER) + 59) / 60)
+            WHERE id = 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS citas_duracion_maxima_au AFTER UPDATE OF fecha_hora, fecha_fin ON citas
+            WHEN new.fecha_fin IS NOT NULL BEGIN
+            UPDATE citas_duracion_maxima
+            SET minutos = MAX(minutos, (CAST(ROUND((julianday(new.fecha_fin) - julianday(new.fecha_hora)) * 86400) AS INTEGER) + 59) / 60)
+            WHERE id = 1;
+        END""",
+    ]
+    for trigger in triggers:
+        conexion.execute(trigger)
+
+MIGRACIONES = [
+    Migracion(1, "Esquema base: estilistas, usuarios, servicios, citas, notificaciones", _v1_esquema_base),
+    Migracion(2, "Roles de usuario: es_estilista, estilista_id", _v2_roles_usuarios),
+    Migracion(3, "citas.fecha_actualizacion", _v3_fecha_actualizacion),
+    Migracion(4, "citas.fecha_fin e índice de rango por estilista", _v4_fecha_fin),
+    Migracion(5, "Índices de las consultas frecuentes de citas y notificaciones", _v5_indices_consultas_frecuentes),
+    Migracion(6, "Registro de cambios de citas (citas_cambios) para sincronización incremental", _v6_registro_cambios_citas),
+    Migracion(7, "Bandeja de salida de notificaciones (notificaciones_salida)", _v7_notificaciones_salida),
+    Migracion(8, "citas.recordatorio_en e índice de recordatorios pendientes", _v8_recordatorio_en),
+    Migracion(9, "Una notificación por cita y tipo en el historial (uq_notificaciones_cita_tipo)", _v9_notificaciones_unicas),
+    Migracion(10, "Resúmenes diarios de citas por estilista y por servicio", _v10_resumenes_diarios),
+    Migracion(11, "Productos de la tienda y ventas en caja (ventas, ventas_lineas)", _v11_productos_y_ventas),
+    Migracion(12, "Cursos e inscripciones con contador de plazas (cursos.inscritos)", _v12_cursos),
+    Migracion(13, "Búsqueda de texto FTS5 en servicios, estilistas y usuarios", _v13_indices_busqueda),
+    Migracion(14, "citas.fecha_fin siempre calculada y duración máxima de cita (citas_duracion_maxima)", _v14_fecha_fin_y_duracion_maxima),
+]
+
+def aplicar_migraciones(conexion) -> List[int]:
+    """Aplica las migraciones pendientes sobre una conexión sqlite3 y devuelve las versiones aplicadas"""
+    nivel_aislamiento = conexion.isolation_level
+    conexion.isolation_level = None  # transacciones explícitas, también para el DDL
+    try:
+        conexion.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migraciones (
+                version INTEGER PRIMARY KEY,
+                descripcion TEXT NOT NULL,
+                aplicada_en DATETIME NOT NULL
+            )
+        """)
+        registradas = {fila[0] for fila in conexion.execute("SELECT version FROM schema_migraciones")}
+        aplicadas = []
+        for migracion in MIGRACIONES:
+            if migracion.version in registradas:
+                continue
+            # BEGIN IMMEDIATE toma el lock de escritura: si dos procesos arrancan
+            # a la vez, el segundo espera y encuentra la versión ya registrada
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                registrada = conexion.execute(
+                    "SELECT 1 FROM schema_migraciones WHERE version = ?", (migracion.version,)
+                ).fetchone()
+                if not registrada:
+                    migracion.aplicar(conexion)
+                    conexion.execute(
+                        "INSERT INTO schema_migraciones (version, descripcion, aplicada_en) VALUES (?, ?, ?)",
+                        (migracion.version, migracion.descripcion, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                    )
+                    aplicadas.append(migracion.version)
+                conexion.execute("COMMIT")
+            except Exception:
+                conexion.execute("ROLLBACK")
+                raise
+        return aplicadas
+    finally:
+        conexion.isolation_level = nivel_aislamiento
+
+def migrar_engine(engine) -> List[int]:
+    """Aplica las migraciones usando una conexión del pool de un engine de SQLAlchemy"""
+    conexion = engine.raw_connection()
+    try:
+        return aplicar_migraciones(conexion.driver_connection)
+    finally:
+        conexion.close()
+
+def migrar_base_datos(ruta: str = None) -> List[int]:
+    conexion = conectar_sqlite(ruta)
+    try:
+        return aplicar_migraciones(conexion)
+    finally:
+        conexion.close()
+
+def estado_migraciones(ruta: str = None):
+    conexion = conectar_sqlite(ruta)
+    try:
+        tablas = conexion.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_migraciones'"
+        ).fetchone()
+        if not tablas:
+            return []
+        return conexion.execute(
+            "SELECT version, descripcion, aplicada_en FROM schema_migraciones ORDER BY version"
+        ).fetchall()
+    finally:
+        conexion.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migraciones del esquema de Paris Style")
+    parser.add_argument("--estado", action="store_true", help="mostrar las versiones aplicadas")
+    args = parser.parse_args()
+
+    ruta = ruta_sqlite()
+    if not args.estado:
+        print(f"🔧 Migrando {ruta}...")
+        aplicadas = migrar_base_datos(ruta)
+        if aplicadas:
+            print(f"✅ Migraciones aplicadas: {', '.join(str(v) for v in aplicadas)}")
+        else:
+            print("✅ La base de datos ya está al día")
+
+    print("\n📋 Versiones registradas:")
+    for version, descripcion, aplicada_en in estado_migraciones(ruta):
+        print(f"   {version:>3}  {aplicada_en}  {descripcion}")
@@ -1,235 +1,487 @@
+import heapq
+import os
+import queue
+import random
 import smtplib
-import schedule
-import time
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from sqlalchemy import create_engine, text
+from sqlalchemy import DateTime, bindparam, text
 from sqlalchemy.orm import sessionmaker
+from typing import List, Optional, Set, Tuple
 import logging
 
-# Configuración de logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+from db_config import DATABASE_URL, crear_engine
+from logging_config import configurar_logging
+from plantillas_email import PLANTILLAS
+
+# Configuración de logging (ver logging_config.py)
+configurar_logging()
+logger = logging.getLogger("paris_style.notificaciones")
 
 # Configuración de base de datos
-DATABASE_URL = "sqlite:///./paris_style.db"
-engine = create_engine(DATABASE_URL)
+engine = crear_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Configuración SMTP
+SMTP_SERVIDOR = os.getenv("PARIS_STYLE_SMTP_SERVIDOR", "smtp.gmail.com")
+SMTP_PUERTO = int(os.getenv("PARIS_STYLE_SMTP_PUERTO", "587"))
+SMTP_USUARIO = os.getenv("PARIS_STYLE_SMTP_USUARIO", "parisStyle@gmail.com")
+SMTP_PASSWORD = os.getenv("PARIS_STYLE_SMTP_PASSWORD", "tu_password_de_aplicacion")
+SMTP_STARTTLS = os.getenv("PARIS_STYLE_SMTP_STARTTLS", "1") == "1"
+SMTP_CONEXIONES = int(os.getenv("PARIS_STYLE_SMTP_CONEXIONES", "4"))
+# Muchos servidores cortan la sesión tras un número de mensajes
+SMTP_MENSAJES_POR_CONEXION = int(os.getenv("PARIS_STYLE_SMTP_MENSAJES_POR_CONEXION", "100"))
+SMTP_TIMEOUT = float(os.getenv("PARIS_STYLE_SMTP_TIMEOUT", "30"))
+
+class ConexionSMTP:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.enviados = 0
+
+def error_de_conexion(error: Exception) -> bool:
+    """Si el fallo es de la sesión (y se puede reintentar con otra) y no del mensaje"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421
+    # SMTPException hereda de OSError: el resto de errores SMTP son del mensaje
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+class PoolSMTP:
+    """Sesiones SMTP reutilizables, con un máximo de envíos simultáneos.
+
+    Cada sesión hace la conexión, STARTTLS y login una sola vez y se
+    devuelve al pool después de cada mensaje. Si el servidor la cerró
+    (inactividad, reinicio, 421) se abre otra y se reintenta el mensaje una
+    vez; los rechazos del propio mensaje no se reintentan.
+    """
+
+    def __init__(
+        self,
+        servidor: str,
+        puerto: int,
+        usuario: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = True,
+        max_conexiones: int = 4,
+        mensajes_por_conexion: int = 100,
+        timeout: float = 30
+    ):
+        self.servidor = servidor
+        self.puerto = puerto
+        self.usuario = usuario
+        self.password = password
+        self.starttls = starttls
+        self.max_conexiones = max_conexiones
+        self.mensajes_por_conexion = mensajes_por_conexion
+        self.timeout = timeout
+        self._libres: "queue.LifoQueue[ConexionSMTP]" = queue.LifoQueue()
+        self._cupos = threading.BoundedSemaphore(max_conexiones)
+
+    def _conectar(self) -> ConexionSMTP:
+        smtp = smtplib.SMTP(self.servidor, self.puerto, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.usuario and self.password:
+                smtp.login(self.usuario, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        return ConexionSMTP(smtp)
+
+    def _tomar(self) -> ConexionSMTP:
+        try:
+            return self._libres.get_nowait()
+        except queue.Empty:
+            return self._conectar()
+
+    @staticmethod
+    def _cerrar(conexion: ConexionSMTP):
+        try:
+            conexion.smtp.quit()
+        except Exception:
+            conexion.smtp.close()
+
+    def enviar(self, mensaje: MIMEMultipart):
+        """Envía un mensaje con una sesión del pool; bloquea si todas están ocupadas"""
+        with self._cupos:
+            conexion = self._tomar()
+            try:
+                try:
+                    conexion.smtp.send_message(mensaje)
+                except Exception as e:
+                    if not error_de_conexion(e):
+                        raise
+                    logger.warning("Sesión SMTP caída, reconectando: %s", e)
+                    conexion.smtp.close()
+                    conexion = self._conectar()
+                    conexion.smtp.send_message(mensaje)
+            except Exception as e:
+                if error_de_conexion(e):
+                    conexion.smtp.close()
+                else:
+                    self._libres.put(conexion)
+                raise
+            conexion.enviados += 1
+            if conexion.enviados >= self.mensajes_por_conexion:
+                self._cerrar(conexion)
+            else:
+                self._libres.put(conexion)
+
+    def cerrar(self):
+        while True:
+            try:
+                self._cerrar(self._libres.get_nowait())
+            except queue.Empty:
+                return
+
 class NotificationService:
-    def __init__(self):
-        self.smtp_server = "smtp.gmail.com"
-        self.smtp_port = 587
-        self.sender_email = "parisStyle@gmail.com"
-        self.sender_password = "tu_password_de_aplicacion"
+    def __init__(self, pool: Optional[PoolSMTP] = None):
+        self.smtp_server = SMTP_SERVIDOR
+        self.smtp_port = SMTP_PUERTO
+        self.sender_email = SMTP_USUARIO
+        self.sender_password = SMTP_PASSWORD
+        self.pool = pool or PoolSMTP(
+            self.smtp_server, self.smtp_port, self.sender_email, self.sender_password,
+            starttls=SMTP_STARTTLS, max_conexiones=SMTP_CONEXIONES,
+            mensajes_por_conexion=SMTP_MENSAJES_POR_CONEXION, timeout=SMTP_TIMEOUT
+        )
+    
+    def crear_mensaje(self, to_email: str, subject: str, body: str, texto: Optional[str] = None) -> MIMEMultipart:
+        """Mensaje HTML; con texto, multipart/alternative con la versión de texto plano primero"""
+        msg = MIMEMultipart('alternative' if texto is not None else 'mixed')
+        msg['From'] = self.sender_email
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        if texto is not None:
+            msg.attach(MIMEText(texto, 'plain', 'utf-8'))
+        msg.attach(MIMEText(body, 'html', 'utf-8'))
+        return msg
     
     def send_email(self, to_email: str, subject: str, body: str) -> bool:
-        """Envía un email usando SMTP"""
+        """Envía un email usando una sesión SMTP del pool"""
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.sender_email
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            msg.attach(MIMEText(body, 'html'))
-            
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.sender_email, self.sender_password)
-            server.send_message(msg)
-            server.quit()
-            
+            self.pool.enviar(self.crear_mensaje(to_email, subject, body))
             logger.info(f"Email enviado exitosamente a {to_email}")
             return True
         except Exception as e:
             logger.error(f"Error enviando email a {to_email}: {e}")
             return False
     
-    def send_appointment_reminder(self):
-        """Envía recordatorios de citas para el día siguiente"""
+    def send_emails(self, emails: List[Tuple[str, str, str]]) -> List[bool]:
+        """Envía (destinatario, asunto, cuerpo) en paralelo, tantos a la vez como sesiones tiene el pool"""
+        if len(emails) <= 1:
+            return [self.send_email(*email) for email in emails]
+        with ThreadPoolExecutor(max_workers=self.pool.max_conexiones, thread_name_prefix="smtp") as ejecutor:
+            return list(ejecutor.map(lambda email: self.send_email(*email), emails))
+    
+
+
+# Configuración de la bandeja de salida
+OUTBOX_LOTE = int(os.getenv("PARIS_STYLE_OUTBOX_LOTE", "50"))
+OUTBOX_INTERVALO = float(os.getenv("PARIS_STYLE_OUTBOX_INTERVALO", "1"))
+OUTBOX_LEASE_SEGUNDOS = float(os.getenv("PARIS_STYLE_OUTBOX_LEASE", "300"))
+OUTBOX_REINTENTO_BASE = float(os.getenv("PARIS_STYLE_OUTBOX_REINTENTO_BASE", "30"))
+OUTBOX_REINTENTO_MAXIMO = float(os.getenv("PARIS_STYLE_OUTBOX_REINTENTO_MAXIMO", "3600"))
+OUTBOX_MAX_INTENTOS = int(os.getenv("PARIS_STYLE_OUTBOX_MAX_INTENTOS", "8"))
+# Los recordatorios que vencen dentro del horizonte se cargan en memoria;
+# el refresco debe ser menor que el horizonte para no llegar tarde
+RECORDATORIOS_HORIZONTE = float(os.getenv("PARIS_STYLE_RECORDATORIOS_HORIZONTE", "900"))
+RECORDATORIOS_REFRESCO = float(os.getenv("PARIS_STYLE_RECORDATORIOS_REFRESCO", "60"))
+
+def espera_reintento(intentos: int, base: float, maximo: float) -> float:
+    """Backoff exponencial con jitter: entre la mitad y el total de base * 2^(intentos - 1)"""
+    espera = min(maximo, base * 2 ** (intentos - 1))
+    return random.uniform(espera / 2, espera)
+
+class TrabajadorNotificaciones:
+    """Vacía la bandeja de salida notificaciones_salida.
+
+    Cada lote se reclama con un UPDATE ... RETURNING que le asigna un
+    token y adelanta disponible_en hasta el fin del lease: si el proceso
+    muere, las filas vuelven a estar disponibles al vencer el lease. El
+    envío se marca, junto con su registro en notificaciones, solo si el
+    token sigue siendo el del lote, así que marcar dos veces no tiene
+    efecto. Entre el envío y la marca puede haber un duplicado (entrega al
+    menos una vez); el Message-ID es fijo por notificación para que el
+    cliente de correo lo descarte. Los fallos se reintentan con backoff
+    exponencial hasta max_intentos y después quedan como "fallida".
+    """
+
+    def __init__(
+        self,
+        servicio: NotificationService,
+        lote: int = OUTBOX_LOTE,
+        lease_segundos: float = OUTBOX_LEASE_SEGUNDOS,
+        reintento_base: float = OUTBOX_REINTENTO_BASE,
+        reintento_maximo: float = OUTBOX_REINTENTO_MAXIMO,
+        max_intentos: int = OUTBOX_MAX_INTENTOS
+    ):
+        self.servicio = servicio
+        self.lote = lote
+        self.lease_segundos = lease_segundos
+        self.reintento_base = reintento_base
+        self.reintento_maximo = reintento_maximo
+        self.max_intentos = max_intentos
+        self.dominio = servicio.sender_email.rpartition("@")[2] or "parisstyle.local"
+
+    def reclamar(self, db) -> Tuple[str, list]:
+        token = uuid.uuid4().hex
+        ahora = datetime.now()
+        filas = db.execute(text("""
+            UPDATE notificaciones_salida
+            SET reclamado_por = :token, disponible_en = :lease_hasta, intentos = intentos + 1
+            WHERE id IN (
+                SELECT id FROM notificaciones_salida
+                WHERE estado = 'pendiente' AND disponible_en <= :ahora
+                ORDER BY disponible_en
+                LIMIT :lote
+            )
+            RETURNING id, cita_id, usuario_id, tipo, intentos
+        """).bindparams(
+            bindparam("ahora", type_=DateTime), bindparam("lease_hasta", type_=DateTime)
+        ), {
+            "token": token, "ahora": ahora,
+            "lease_hasta": ahora + timedelta(seconds=self.lease_segundos), "lote": self.lote
+        }).fetchall()
+        db.commit()
+        return token, filas
+
+    def cargar_citas(self, db, cita_ids: List[int]) -> dict:
+        filas = db.execute(text("""
+            SELECT c.id, c.fecha_hora, u.nombre, u.email, s.nombre as servicio_nombre,
+                   e.nombre as estilista_nombre, s.precio
+            FROM citas c
+            JOIN usuarios u ON c.cliente_id = u.id
+            JOIN servicios s ON c.servicio_id = s.id
+            LEFT JOIN estilistas e ON c.estilista_id = e.id
+            WHERE c.id IN :ids
+        """).bindparams(bindparam("ids", expanding=True)).columns(fecha_hora=DateTime), {"ids": cita_ids})
+        return {fila.id: fila for fila in filas}
+
+    def _enviar(self, mensaje: MIMEMultipart) -> Optional[str]:
+        try:
+            self.servicio.pool.enviar(mensaje)
+            return None
+        except Exception as e:
+            return str(e) or type(e).__name__
+
+    def procesar_lote(self) -> int:
+        """Reclama, envía y marca un lote; devuelve cuántas notificaciones reclamó"""
         db = SessionLocal()
         try:
-            # Buscar citas para mañana
-            tomorrow = datetime.now() + timedelta(days=1)
-            tomorrow_start = tomorrow.replace(hour=0, minute=0, second=0, microsecond=0)
-            tomorrow_end = tomorrow.replace(hour=23, minute=59, second=59, microsecond=999999)
-            
-            query = text("""
-                SELECT c.id, c.fecha_hora, u.nombre, u.email, s.nombre as servicio_nombre, 
-                       e.nombre as estilista_nombre, s.precio
-                FROM citas c
-                JOIN usuarios u ON c.cliente_id = u.id
-                JOIN servicios s ON c.servicio_id = s.id
-                LEFT JOIN estilistas e ON c.estilista_id = e.id
-                WHERE c.fecha_hora BETWEEN :start AND :end
-                AND c.estado = 'confirmada'
-                AND c.id NOT IN (
-                    SELECT cita_id FROM notificaciones 
-                    WHERE tipo = 'recordatorio' AND enviado = 1
+            token, reclamadas = self.reclamar(db)
+            if not reclamadas:
+                return 0
+            citas = self.cargar_citas(db, list({n.cita_id for n in reclamadas}))
+
+            # Se renderiza por tipo, un lote de filas por plantilla
+            envios, errores, por_tipo = [], {}, {}
+            for notificacion in reclamadas:
+                cita = citas.get(notificacion.cita_id)
+                if cita is None or notificacion.tipo not in PLANTILLAS:
+                    errores[notificacion.id] = "Cita no encontrada" if cita is None else "Tipo sin plantilla"
+                    continue
+                por_tipo.setdefault(notificacion.tipo, []).append((notificacion, cita))
+            for tipo, pares in por_tipo.items():
+                renderizados = PLANTILLAS[tipo].renderizar_lote(
+                    (c.nombre, c.servicio_nombre, c.fecha_hora, c.estilista_nombre, c.precio) for _, c in pares
                 )
-            """)
-            
-            result = db.execute(query, {
-                'start': tomorrow_start,
-                'end': tomorrow_end
-            })
-            
-            citas = result.fetchall()
-            
-            for cita in citas:
-                # Crear email de recordatorio
-                subject = "Recordatorio de Cita - Paris Style"
-                body = f"""
-                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    <h2 style="color: #D97706;">Recordatorio de Cita - Paris Style</h2>
-                    <p>Hola <strong>{cita.nombre}</strong>,</p>
-                    <p>Te recordamos que tienes una cita programada para mañana:</p>
-                    
-                    <div style="background-color: #FEF3C7; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                        <h3 style="margin-top: 0; color: #92400E;">Detalles de tu Cita</h3>
-                        <p><strong>Servicio:</strong> {cita.servicio_nombre}</p>
-                        <p><strong>Fecha:</strong> {cita.fecha_hora.strftime('%d/%m/%Y')}</p>
-                        <p><strong>Hora:</strong> {cita.fecha_hora.strftime('%H:%M')}</p>
-                        {f'<p><strong>Estilista:</strong> {cita.estilista_nombre}</p>' if cita.estilista_nombre else ''}
-                        <p><strong>Precio:</strong> ${cita.precio:,}</p>
-                    </div>
-                    
-                    <p>Si necesitas reagendar o cancelar tu cita, por favor contáctanos con al menos 2 horas de anticipación.</p>
-                    
-                    <div style="background-color: #F3F4F6; padding: 15px; border-radius: 8px; margin: 20px 0;">
-                        <p style="margin: 0;"><strong>Dirección:</strong> Calle 123 #45-67, Bogotá</p>
-                        <p style="margin: 5px 0 0 0;"><strong>Teléfono:</strong> +57 300 123 4567</p>
-                    </div>
-                    
-                    <p>¡Te esperamos en Paris Style!</p>
-                    
-                    <div style="text-align: center; margin-top: 30px; padding-top: 20px; border-top: 1px solid #E5E7EB;">
-                        <p style="color: #6B7280; font-size: 12px;">
-                            Este es un mensaje automático, por favor no responder a este email.
-                        </p>
-                    </div>
-                </div>
-                """
-                
-                # Enviar email
-                if self.send_email(cita.email, subject, body):
-                    # Registrar notificación como enviada
-                    insert_notification = text("""
-                        INSERT INTO notificaciones (usuario_id, cita_id, tipo, mensaje, enviado, fecha_envio)
-                        SELECT u.id, :cita_id, 'recordatorio', :mensaje, 1, :fecha_envio
-                        FROM usuarios u
-                        WHERE u.email = :email
-                    """)
-                    
-                    db.execute(insert_notification, {
-                        'cita_id': cita.id,
-                        'mensaje': f'Recordatorio enviado para cita del {cita.fecha_hora.strftime("%d/%m/%Y %H:%M")}',
-                        'fecha_envio': datetime.now(),
-                        'email': cita.email
+                for (notificacion, cita), (asunto, texto, html) in zip(pares, renderizados):
+                    mensaje = self.servicio.crear_mensaje(cita.email, asunto, html, texto)
+                    mensaje["Message-ID"] = f"<notificacion-{notificacion.id}@{self.dominio}>"
+                    envios.append((notificacion, mensaje))
+
+            with ThreadPoolExecutor(max_workers=self.servicio.pool.max_conexiones, thread_name_prefix="smtp") as ejecutor:
+                resultados = ejecutor.map(self._enviar, [mensaje for _, mensaje in envios])
+                for (notificacion, _), error in zip(envios, resultados):
+                    if error is not None:
+                        errores[notificacion.id] = error
+
+            ahora = datetime.now()
+            enviadas = [
+                {
+                    "id": n.id, "token": token, "ahora": ahora,
+                    "mensaje": f'{PLANTILLAS[n.tipo].historial} para cita del {citas[n.cita_id].fecha_hora.strftime("%d/%m/%Y %H:%M")}'
+                }
+                for n, _ in envios if n.id not in errores
+            ]
+            if enviadas:
+                # Historial y marca en la misma transacción, solo si el lease sigue siendo nuestro
+                # (una fila por cita y tipo: si ya había una sin enviar, se marca como enviada)
+                db.execute(text("""
+                    INSERT INTO notificaciones (usuario_id, cita_id, tipo, mensaje, enviado, fecha_envio)
+                    SELECT usuario_id, cita_id, tipo, :mensaje, 1, :ahora
+                    FROM notificaciones_salida
+                    WHERE id = :id AND reclamado_por = :token AND estado = 'pendiente'
+                    ON CONFLICT (cita_id, tipo) DO UPDATE
+                    SET mensaje = excluded.mensaje, enviado = 1, fecha_envio = excluded.fecha_envio
+                """).bindparams(bindparam("ahora", type_=DateTime)), enviadas)
+                db.execute(text("""
+                    UPDATE notificaciones_salida
+                    SET estado = 'enviada', fecha_envio = :ahora, reclamado_por = NULL, ultimo_error = NULL
+                    WHERE id = :id AND reclamado_por = :token AND estado = 'pendiente'
+                """).bindparams(bindparam("ahora", type_=DateTime)), enviadas)
+
+            if errores:
+                intentos = {n.id: n.intentos for n in reclamadas}
+                fallidas = []
+                for notificacion_id, error in errores.items():
+                    agotada = intentos[notificacion_id] >= self.max_intentos
+                    if agotada:
+                        logger.error("Notificación %s descartada tras %s intentos: %s",
+                                     notificacion_id, intentos[notificacion_id], error)
+                    fallidas.append({
+                        "id": notificacion_id, "token": token, "error": error[:500],
+                        "estado": "fallida" if agotada else "pendiente",
+                        "disponible_en": ahora + timedelta(seconds=espera_reintento(
+                            intentos[notificacion_id], self.reintento_base, self.reintento_maximo
+                        ))
                     })
-            
+                db.execute(text("""
+                    UPDATE notificaciones_salida
+                    SET estado = :estado, disponible_en = :disponible_en, ultimo_error = :error, reclamado_por = NULL
+                    WHERE id = :id AND reclamado_por = :token AND estado = 'pendiente'
+                """).bindparams(bindparam("disponible_en", type_=DateTime)), fallidas)
+
             db.commit()
-            logger.info(f"Procesados {len(citas)} recordatorios de citas")
-            
-        except Exception as e:
-            logger.error(f"Error procesando recordatorios: {e}")
+            logger.info("Lote de notificaciones procesado", extra={"campos": {
+                "reclamadas": len(reclamadas), "enviadas": len(enviadas), "con_error": len(errores)
+            }})
+            return len(reclamadas)
+
+        except Exception:
             db.rollback()
+            logger.exception("Error procesando la bandeja de salida")
+            return 0
         finally:
             db.close()
-    
-    def send_confirmation_emails(self):
-        """Envía emails de confirmación para citas pendientes"""
+
+    def ejecutar(self, detener: Optional[threading.Event] = None, intervalo: float = OUTBOX_INTERVALO, tareas=()):
+        """Procesa lotes mientras haya trabajo y espera `intervalo` segundos cuando la bandeja está vacía.
+
+        `tareas` son funciones que se llaman en cada vuelta (p. ej. encolar
+        los recordatorios a su hora).
+        """
+        detener = detener or threading.Event()
+        while not detener.is_set():
+            for tarea in tareas:
+                tarea()
+            if not self.procesar_lote():
+                detener.wait(intervalo)
+
+class ProgramadorRecordatorios:
+    """Encola cada recordatorio en la bandeja de salida cuando llega su citas.recordatorio_en.
+
+    La API fija recordatorio_en al confirmar la cita (la antelación es
+    PARIS_STYLE_RECORDATORIO_HORAS) y lo borra al cancelarla o completarla.
+    Solo los que vencen dentro del horizonte están en memoria, en un
+    min-heap; cada refresco los lee con un rango sobre el índice parcial
+    idx_citas_recordatorio, así que ni la memoria ni la consulta dependen
+    de cuántas citas futuras o notificaciones antiguas haya. Al disparar se
+    comprueba de nuevo el estado y se pone recordatorio_en a NULL en la
+    misma transacción que el INSERT en la bandeja.
+    """
+
+    def __init__(self, horizonte_segundos: float = RECORDATORIOS_HORIZONTE, refresco_segundos: float = RECORDATORIOS_REFRESCO):
+        self.horizonte = timedelta(seconds=horizonte_segundos)
+        self.refresco = timedelta(seconds=refresco_segundos)
+        self._heap: List[Tuple[datetime, int]] = []
+        self._programadas: Set[int] = set()
+        self._proximo_refresco: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def refrescar(self, db, ahora: datetime) -> int:
+        """Añade al heap los recordatorios que vencen antes de ahora + horizonte; devuelve cuántos son nuevos"""
+        filas = db.execute(text("""
+            SELECT id, recordatorio_en FROM citas
+            WHERE estado = 'confirmada' AND recordatorio_en <= :hasta
+        """).bindparams(bindparam("hasta", type_=DateTime)).columns(recordatorio_en=DateTime), {
+            "hasta": ahora + self.horizonte
+        })
+        nuevos = 0
+        for cita_id, recordatorio_en in filas:
+            if cita_id not in self._programadas:
+                heapq.heappush(self._heap, (recordatorio_en, cita_id))
+                self._programadas.add(cita_id)
+                nuevos += 1
+        self._proximo_refresco = ahora + self.refresco
+        return nuevos
+
+    def vencidos(self, ahora: datetime) -> List[int]:
+        ids = []
+        while self._heap and self._heap[0][0] <= ahora:
+            _, cita_id = heapq.heappop(self._heap)
+            self._programadas.discard(cita_id)
+            ids.append(cita_id)
+        return ids
+
+    def disparar(self, db, cita_ids: List[int], ahora: datetime) -> int:
+        """Encola los recordatorios de citas que siguen confirmadas, pendientes de recordatorio y sin empezar"""
+        parametros = {"ids": cita_ids, "ahora": ahora}
+        encolados = db.execute(text("""
+            INSERT OR IGNORE INTO notificaciones_salida
+                (cita_id, usuario_id, tipo, estado, intentos, disponible_en, fecha_creacion)
+            SELECT id, cliente_id, 'recordatorio', 'pendiente', 0, :ahora, :ahora
+            FROM citas
+            WHERE id IN :ids AND estado = 'confirmada' AND recordatorio_en <= :ahora AND fecha_hora > :ahora
+        """).bindparams(bindparam("ids", expanding=True), bindparam("ahora", type_=DateTime)), parametros).rowcount
+        # También se limpian las de citas ya empezadas, que no llevan recordatorio
+        db.execute(text("""
+            UPDATE citas SET recordatorio_en = NULL
+            WHERE id IN :ids AND estado = 'confirmada' AND recordatorio_en <= :ahora
+        """).bindparams(bindparam("ids", expanding=True), bindparam("ahora", type_=DateTime)), parametros)
+        db.commit()
+        return encolados
+
+    def tarea(self, ahora: Optional[datetime] = None) -> int:
+        """Para TrabajadorNotificaciones.ejecutar: refresca si toca y dispara los vencidos"""
+        ahora = ahora or datetime.now()
+        if self._proximo_refresco is not None and ahora < self._proximo_refresco and not (
+            self._heap and self._heap[0][0] <= ahora
+        ):
+            return 0
         db = SessionLocal()
         try:
-            # Buscar citas pendientes de confirmación
-            query = text("""
-                SELECT c.id, c.fecha_hora, u.nombre, u.email, s.nombre as servicio_nombre, 
-                       e.nombre as estilista_nombre, s.precio
-                FROM citas c
-                JOIN usuarios u ON c.cliente_id = u.id
-                JOIN servicios s ON c.servicio_id = s.id
-                LEFT JOIN estilistas e ON c.estilista_id = e.id
-                WHERE c.estado = 'pendiente'
-                AND c.fecha_creacion >= :since
-                AND c.id NOT IN (
-                    SELECT cita_id FROM notificaciones 
-                    WHERE tipo = 'confirmacion' AND enviado = 1
-                )
-            """)
-            
-            # Buscar citas creadas en las últimas 2 horas
-            since = datetime.now() - timedelta(hours=2)
-            result = db.execute(query, {'since': since})
-            citas = result.fetchall()
-            
-            for cita in citas:
-                subject = "Confirmación de Cita - Paris Style"
-                body = f"""
-                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    <h2 style="color: #D97706;">¡Cita Agendada Exitosamente!</h2>
-                    <p>Hola <strong>{cita.nombre}</strong>,</p>
-                    <p>Tu cita ha sido agendada exitosamente en Paris Style.</p>
-                    
-                    <div style="background-color: #ECFDF5; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #10B981;">
-                        <h3 style="margin-top: 0; color: #065F46;">Detalles de tu Cita</h3>
-                        <p><strong>Servicio:</strong> {cita.servicio_nombre}</p>
-                        <p><strong>Fecha:</strong> {cita.fecha_hora.strftime('%d/%m/%Y')}</p>
-                        <p><strong>Hora:</strong> {cita.fecha_hora.strftime('%H:%M')}</p>
-                        {f'<p><strong>Estilista:</strong> {cita.estilista_nombre}</p>' if cita.estilista_nombre else ''}
-                        <p><strong>Precio:</strong> ${cita.precio:,}</p>
-                    </div>
-                    
-                    <p>Recibirás un recordatorio 24 horas antes de tu cita.</p>
-                    
-                    <div style="background-color: #FEF2F2; padding: 15px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #EF4444;">
-                        <p style="margin: 0; color: #991B1B;"><strong>Política de Cancelación:</strong></p>
-                        <p style="margin: 5px 0 0 0; color: #991B1B;">Las cancelaciones deben realizarse con al menos 2 horas de anticipación.</p>
-                    </div>
-                    
-                    <p>¡Esperamos verte pronto en Paris Style!</p>
-                </div>
-                """
-                
-                if self.send_email(cita.email, subject, body):
-                    # Registrar notificación
-                    insert_notification = text("""
-                        INSERT INTO notificaciones (usuario_id, cita_id, tipo, mensaje, enviado, fecha_envio)
-                        SELECT u.id, :cita_id, 'confirmacion', :mensaje, 1, :fecha_envio
-                        FROM usuarios u
-                        WHERE u.email = :email
-                    """)
-                    
-                    db.execute(insert_notification, {
-                        'cita_id': cita.id,
-                        'mensaje': f'Confirmación enviada para cita del {cita.fecha_hora.strftime("%d/%m/%Y %H:%M")}',
-                        'fecha_envio': datetime.now(),
-                        'email': cita.email
-                    })
-            
-            db.commit()
-            logger.info(f"Procesadas {len(citas)} confirmaciones de citas")
-            
+            if self._proximo_refresco is None or ahora >= self._proximo_refresco:
+                self.refrescar(db, ahora)
+            ids = self.vencidos(ahora)
+            if not ids:
+                db.commit()
+                return 0
+            encolados = self.disparar(db, ids, ahora)
+            logger.info(f"Encolados {encolados} recordatorios de citas")
+            return encolados
         except Exception as e:
-            logger.error(f"Error procesando confirmaciones: {e}")
+            logger.error(f"Error encolando recordatorios: {e}")
             db.rollback()
+            # Se recargan desde la base de datos en el próximo refresco
+            self._heap, self._programadas, self._proximo_refresco = [], set(), None
+            return 0
         finally:
             db.close()
 
 def run_notification_service():
     """Función principal para ejecutar el servicio de notificaciones"""
     notification_service = NotificationService()
-    
-    # Programar tareas
-    schedule.every().day.at("18:00").do(notification_service.send_appointment_reminder)
-    schedule.every(30).minutes.do(notification_service.send_confirmation_emails)
+    trabajador = TrabajadorNotificaciones(notification_service)
+    programador = ProgramadorRecordatorios()
     
     logger.info("Servicio de notificaciones iniciado")
-    logger.info("Recordatorios programados para las 18:00 diariamente")
-    logger.info("Confirmaciones cada 30 minutos")
+    logger.info(f"Recordatorios programados por cita, horizonte de {RECORDATORIOS_HORIZONTE:g} s")
+    logger.info(f"Bandeja de salida revisada cada {OUTBOX_INTERVALO:g} s cuando está vacía")
     
-    while True:
-        schedule.run_pending()
-        time.sleep(60)  # Verificar cada minuto
+    try:
+        trabajador.ejecutar(tareas=[programador.tarea])
+    finally:
+        notification_service.pool.cerrar()
 
 if __name__ == "__main__":
     run_notification_service()
@@ -0,0 +1,205 @@
+"""Plantillas de los emails de Paris Style.
+
+Cada tipo de notificación se compila una sola vez al importar el módulo:
+el diseño común (encabezado, saludo y pie) se combina con el contenido del
+tipo y se convierte en una cadena de str.format para HTML y otra para texto
+plano. Las plantillas se escriben con la sintaxis de string.Template ($campo)
+porque el HTML está lleno de llaves de CSS. Después renderizar un lote es
+solo una sustitución por destinatario; las fechas se formatean una vez por
+hora distinta del lote y estilistas, servicios y precios se escapan y
+formatean una vez por valor.
+
+Las filas son tuplas en el orden de CAMPOS:
+
+    plantilla = PLANTILLAS["recordatorio"]
+    for asunto, texto, html in plantilla.renderizar_lote(filas): ...
+"""
+from datetime import datetime
+from html import escape
+from string import Template
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CAMPOS = ("nombre", "servicio_nombre", "fecha_hora", "estilista_nombre", "precio")
+
+DISENO_HTML = """
+<div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+    <h2 style="color: #D97706;"><!--titulo--></h2>
+    <p>Hola <strong>$nombre</strong>,</p>
+<!--contenido-->
+    <div style="text-align: center; margin-top: 30px; padding-top: 20px; border-top: 1px solid #E5E7EB;">
+        <p style="color: #6B7280; font-size: 12px;">
+            Este es un mensaje automático, por favor no responder a este email.
+        </p>
+    </div>
+</div>
+"""
+
+DISENO_TEXTO = """<!--titulo-->
+
+Hola $nombre,
+
+<!--contenido-->
+
+--
+Paris Style - Calle 123 #45-67, Bogotá - +57 300 123 4567
+Este es un mensaje automático, por favor no responder a este email.
+"""
+
+DETALLES_HTML = """
+    <div style="background-color: $fondo; padding: 20px; border-radius: 8px; margin: 20px 0;$borde">
+        <h3 style="margin-top: 0; color: $color;">Detalles de tu Cita</h3>
+        <p><strong>Servicio:</strong> $$servicio</p>
+        <p><strong>Fecha:</strong> $$fecha</p>
+        <p><strong>Hora:</strong> $$hora</p>
+        $$linea_estilista
+        <p><strong>Precio:</strong> $$$$$$precio</p>
+    </div>
+"""
+
+DETALLES_TEXTO = """Servicio: $servicio
+Fecha: $fecha
+Hora: $hora
+${linea_estilista}Precio: $$$precio"""
+
+def detalles_html(fondo: str, color: str, borde: str = "") -> str:
+    return Template(DETALLES_HTML).substitute(fondo=fondo, color=color, borde=borde and f" {borde}")
+
+def compilar(plantilla: str) -> str:
+    """Convierte la sintaxis de string.Template ($campo, ${campo}, $$) en una cadena de str.format.
+
+    Template.substitute vuelve a recorrer la plantilla con una expresión
+    regular en cada llamada; str.format_map sobre la cadena ya convertida
+    solo copia literales y valores.
+    """
+    partes, posicion = [], 0
+    for coincidencia in Template.pattern.finditer(plantilla):
+        partes.append(plantilla[posicion:coincidencia.start()].replace("{", "{{").replace("}", "}}"))
+        if coincidencia.group("escaped") is not None:
+            partes.append("$")
+        elif coincidencia.group("invalid") is not None:
+            raise ValueError(f"Marcador inválido en la plantilla, posición {coincidencia.start()}")
+        else:
+            partes.append("{" + (coincidencia.group("named") or coincidencia.group("braced")) + "}")
+        posicion = coincidencia.end()
+    partes.append(plantilla[posicion:].replace("{", "{{").replace("}", "}}"))
+    return "".join(partes)
+
+class PlantillaEmail:
+    """Un tipo de email compilado: asunto, versión HTML y versión de texto"""
+
+    def __init__(self, asunto: str, titulo: str, html: str, texto: str, historial: str):
+        self.asunto = asunto
+        self.historial = historial
+        self.html = compilar(DISENO_HTML.replace("<!--titulo-->", titulo).replace("<!--contenido-->", html))
+        self.texto = compilar(DISENO_TEXTO.replace("<!--titulo-->", titulo).replace("<!--contenido-->", texto))
+
+    def renderizar_lote(self, filas: Iterable[Tuple]) -> List[Tuple[str, str, str]]:
+        """(asunto, texto, html) para cada fila (nombre, servicio_nombre, fecha_hora, estilista_nombre, precio)"""
+        fechas: Dict[datetime, Tuple[str, str]] = {}
+        estilistas: Dict[Optional[str], Tuple[str, str, str, str]] = {}
+        servicios: Dict[str, str] = {}
+        precios: Dict[int, str] = {}
+        html, texto, asunto = self.html.format, self.texto.format, self.asunto
+        renderizados = []
+        for nombre, servicio, fecha_hora, estilista, precio in filas:
+            fecha = fechas.get(fecha_hora)
+            if fecha is None:
+                fecha = fechas[fecha_hora] = (
+                    f"{fecha_hora.day:02d}/{fecha_hora.month:02d}/{fecha_hora.year}",
+                    f"{fecha_hora.hour:02d}:{fecha_hora.minute:02d}"
+                )
+            linea_texto, linea_html, quien, quien_html = estilistas.get(estilista) or estilistas.setdefault(estilista, (
+                f"Estilista: {estilista}\n" if estilista else "",
+                f"<p><strong>Estilista:</strong> {escape(estilista)}</p>" if estilista else "",
+                estilista or "Paris Style",
+                escape(estilista or "Paris Style")
+            ))
+            servicio_html = servicios.get(servicio) or servicios.setdefault(servicio, escape(servicio))
+            precio_texto = precios.get(precio) or precios.setdefault(precio, f"{precio:,}")
+            renderizados.append((
+                asunto,
+                texto(nombre=nombre, servicio=servicio, fecha=fecha[0], hora=fecha[1], precio=precio_texto,
+                      quien=quien, linea_estilista=linea_texto),
+                html(nombre=escape(nombre), servicio=servicio_html, fecha=fecha[0], hora=fecha[1], precio=precio_texto,
+                     quien=quien_html, linea_estilista=linea_html),
+            ))
+        return renderizados
+
+    def renderizar(self, fila: Tuple) -> Tuple[str, str, str]:
+        return self.renderizar_lote([fila])[0]
+
+PLANTILLAS = {
+    "confirmacion": PlantillaEmail(
+        asunto="Confirmación de Cita - Paris Style",
+        titulo="¡Cita Agendada Exitosamente!",
+        html="""    <p>Tu cita ha sido agendada exitosamente en Paris Style.</p>
+""" + detalles_html("#ECFDF5", "#065F46", "border-left: 4px solid #10B981;") + """
+    <p>Recibirás un recordatorio antes de tu cita.</p>
+
+    <div style="background-color: #FEF2F2; padding: 15px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #EF4444;">
+        <p style="margin: 0; color: #991B1B;"><strong>Política de Cancelación:</strong></p>
+        <p style="margin: 5px 0 0 0; color: #991B1B;">Las cancelaciones deben realizarse con al menos 2 horas de anticipación.</p>
+    </div>
+
+    <p>¡Esperamos verte pronto en Paris Style!</p>""",
+        texto="""Tu cita ha sido agendada exitosamente en Paris Style.
+
+""" + DETALLES_TEXTO + """
+
+Recibirás un recordatorio antes de tu cita.
+Política de cancelación: las cancelaciones deben realizarse con al menos 2 horas de anticipación.
+
+¡Esperamos verte pronto en Paris Style!""",
+        historial="Confirmación enviada",
+    ),
+    "cita_confirmada": PlantillaEmail(
+        asunto="Cita Confirmada - Paris Style",
+        titulo="¡Tu Cita está Confirmada!",
+        html="""    <p>$quien confirmó tu cita.</p>
+""" + detalles_html("#ECFDF5", "#065F46", "border-left: 4px solid #10B981;") + """
+    <p>¡Te esperamos en Paris Style!</p>""",
+        texto="""$quien confirmó tu cita.
+
+""" + DETALLES_TEXTO + """
+
+¡Te esperamos en Paris Style!""",
+        historial="Confirmación del estilista enviada",
+    ),
+    "cancelacion": PlantillaEmail(
+        asunto="Cita Cancelada - Paris Style",
+        titulo="Cita Cancelada",
+        html="""    <p>Tu cita de <strong>$servicio</strong> del $fecha a las $hora fue cancelada.</p>
+
+    <p>Puedes agendar una nueva cita cuando quieras desde nuestra página.</p>
+
+    <div style="background-color: #F3F4F6; padding: 15px; border-radius: 8px; margin: 20px 0;">
+        <p style="margin: 0;"><strong>Teléfono:</strong> +57 300 123 4567</p>
+    </div>""",
+        texto="""Tu cita de $servicio del $fecha a las $hora fue cancelada.
+
+Puedes agendar una nueva cita cuando quieras desde nuestra página.""",
+        historial="Cancelación enviada",
+    ),
+    "recordatorio": PlantillaEmail(
+        asunto="Recordatorio de Cita - Paris Style",
+        titulo="Recordatorio de Cita - Paris Style",
+        html="""    <p>Te recordamos que tienes una cita próximamente:</p>
+""" + detalles_html("#FEF3C7", "#92400E") + """
+    <p>Si necesitas reagendar o cancelar tu cita, por favor contáctanos con al menos 2 horas de anticipación.</p>
+
+    <div style="background-color: #F3F4F6; padding: 15px; border-radius: 8px; margin: 20px 0;">
+        <p style="margin: 0;"><strong>Dirección:</strong> Calle 123 #45-67, Bogotá</p>
+        <p style="margin: 5px 0 0 0;"><strong>Teléfono:</strong> +57 300 123 4567</p>
+    </div>
+
+    <p>¡Te esperamos en Paris Style!</p>""",
+        texto="""Te recordamos que tienes una cita próximamente:
+
+""" + DETALLES_TEXTO + """
+
+Si necesitas reagendar o cancelar tu cita, por favor contáctanos con al menos 2 horas de anticipación.
+
+¡Te esperamos en Paris Style!""",
+        historial="Recordatorio enviado",
+    ),
+}
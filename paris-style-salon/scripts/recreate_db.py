@@ -1,18 +1,17 @@
-import sqlite3
-import os
+from db_config import conectar_sqlite, eliminar_base_datos, ruta_sqlite
+from migraciones import aplicar_migraciones
 
 def recreate_database():
     """Eliminar y recrear la base de datos completamente"""
     
-    db_path = 'paris_style.db'
+    db_path = ruta_sqlite()
     
     # Eliminar base de datos existente
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    if eliminar_base_datos(db_path):
         print("🗑️ Base de datos anterior eliminada")
     
     # Crear nueva base de datos
-    conn = sqlite3.connect(db_path)
+    conn = conectar_sqlite(db_path)
     cursor = conn.cursor()
     
     try:
@@ -81,14 +80,10 @@ def recreate_database():
             )
         """)
         
-        # Crear índices
-        cursor.execute("CREATE INDEX idx_usuarios_email ON usuarios(email)")
-        cursor.execute("CREATE INDEX idx_citas_fecha ON citas(fecha_hora)")
-        cursor.execute("CREATE INDEX idx_citas_cliente ON citas(cliente_id)")
-        cursor.execute("CREATE INDEX idx_citas_estilista ON citas(estilista_id)")
-        cursor.execute("CREATE INDEX idx_citas_estado ON citas(estado)")
-        
         conn.commit()
+        
+        # Índices y columnas posteriores (fecha_fin, ...)
+        aplicar_migraciones(conn)
         print("✅ Nueva base de datos creada exitosamente!")
         
     except Exception as e:
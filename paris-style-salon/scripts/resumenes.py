@@ -0,0 +1,97 @@
+"""Resúmenes diarios de citas por estilista y por servicio.
+
+resumen_diario_estilista y resumen_diario_servicio guardan, por día de la
+cita y estado, cuántas citas hay, su precio_total sumado y los minutos
+reservados. La API los mantiene al día en la misma transacción que crea
+o cambia de estado una cita, así que GET /api/admin/reportes lee filas
+por día en vez de recorrer citas. Las citas sin estilista se acumulan con
+estilista_id = 0.
+
+Si se cargan citas por otra vía (SQL directo, restauraciones) los
+resúmenes se reconstruyen desde citas:
+
+    python scripts/resumenes.py                                   # todo
+    python scripts/resumenes.py --desde 2025-01-01 --hasta 2025-01-31
+"""
+import argparse
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from db_config import conectar_sqlite, ruta_sqlite
+
+# Minutos reservados de una cita; las antiguas sin fecha_fin usan la duración del servicio
+MINUTOS_CITA = """COALESCE(
+    CAST(ROUND((julianday(c.fecha_fin) - julianday(c.fecha_hora)) * 1440) AS INTEGER),
+    (SELECT s.duracion_minutos FROM servicios s WHERE s.id = c.servicio_id),
+    0
+)"""
+
+def _rango_citas(desde: Optional[date], hasta: Optional[date]):
+    """Condición sobre citas.fecha_hora (usa idx_citas_fecha) y sobre el día de los resúmenes"""
+    condiciones_citas, condiciones_dias, parametros = [], [], {}
+    if desde:
+        condiciones_citas.append("c.fecha_hora >= :desde_hora")
+        condiciones_dias.append("dia >= :desde")
+        parametros.update(desde=desde.isoformat(), desde_hora=f"{desde.isoformat()} 00:00:00")
+    if hasta:
+        condiciones_citas.append("c.fecha_hora < :hasta_hora")
+        condiciones_dias.append("dia <= :hasta")
+        parametros.update(hasta=hasta.isoformat(), hasta_hora=f"{(hasta + timedelta(days=1)).isoformat()} 00:00:00")
+    return (
+        " AND ".join(condiciones_citas) or "1 = 1",
+        " AND ".join(condiciones_dias) or "1 = 1",
+        parametros,
+    )
+
+def reconstruir_resumenes(conexion, desde: Optional[date] = None, hasta: Optional[date] = None) -> int:
+    """Recalcula los resúmenes del rango desde citas; devuelve cuántas filas de resumen por estilista escribió.
+
+    No abre transacción: quien llama debe hacerlo para que la API no vea
+    los resúmenes a medio borrar.
+    """
+    filtro_citas, filtro_dias, parametros = _rango_citas(desde, hasta)
+    total = 0
+    for tabla, columna, clave in (("resumen_diario_estilista", "estilista_id", "COALESCE(c.estilista_id, 0)"),
+                                  ("resumen_diario_servicio", "servicio_id", "c.servicio_id")):
+        conexion.execute(f"DELETE FROM {tabla} WHERE {filtro_dias}", parametros)
+        cursor = conexion.execute(f"""
+            INSERT INTO {tabla} (dia, {columna}, estado, citas, ingresos, minutos)
+            SELECT date(c.fecha_hora), {clave}, COALESCE(c.estado, 'pendiente'),
+                   COUNT(*), SUM(COALESCE(c.precio_total, 0)), SUM({MINUTOS_CITA})
+            FROM citas c
+            WHERE {filtro_citas}
+            GROUP BY 1, 2, 3
+        """, parametros)
+        if tabla == "resumen_diario_estilista":
+            total = cursor.rowcount
+    return total
+
+def reconstruir_base_datos(ruta: str = None, desde: Optional[date] = None, hasta: Optional[date] = None) -> int:
+    conexion = conectar_sqlite(ruta)
+    conexion.isolation_level = None
+    try:
+        # Con el lock de escritura tomado ninguna cita cambia mientras se recalcula
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            filas = reconstruir_resumenes(conexion, desde, hasta)
+            conexion.execute("COMMIT")
+            return filas
+        except Exception:
+            conexion.execute("ROLLBACK")
+            raise
+    finally:
+        conexion.close()
+
+def _fecha(valor: str) -> date:
+    return datetime.strptime(valor, "%Y-%m-%d").date()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstruye los resúmenes diarios de citas")
+    parser.add_argument("--desde", type=_fecha, help="primer día (YYYY-MM-DD), por defecto el de la primera cita")
+    parser.add_argument("--hasta", type=_fecha, help="último día (YYYY-MM-DD), por defecto el de la última cita")
+    args = parser.parse_args()
+
+    ruta = ruta_sqlite()
+    print(f"🔧 Reconstruyendo resúmenes de {ruta}...")
+    filas = reconstruir_base_datos(ruta, args.desde, args.hasta)
+    print(f"✅ {filas} filas de resumen por estilista y día")
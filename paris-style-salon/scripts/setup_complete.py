@@ -1,22 +1,22 @@
-import sqlite3
 import hashlib
-import os
+
+from db_config import conectar_sqlite, eliminar_base_datos, ruta_sqlite
+from migraciones import aplicar_migraciones
 
 def setup_complete_system():
     """Configuración completa del sistema Paris Style"""
     
-    db_path = 'paris_style.db'
+    db_path = ruta_sqlite()
     
     print("🚀 CONFIGURACIÓN COMPLETA DEL SISTEMA PARIS STYLE")
     print("=" * 60)
     
     # Eliminar DB existente
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    if eliminar_base_datos(db_path):
         print("✅ Base de datos anterior eliminada")
     
     # Crear nueva DB
-    conn = sqlite3.connect(db_path)
+    conn = conectar_sqlite(db_path)
     cursor = conn.cursor()
     
     try:
@@ -167,6 +167,9 @@ def setup_complete_system():
         
         conn.commit()
         
+        # Índices y columnas posteriores (fecha_actualizacion, fecha_fin, ...)
+        aplicar_migraciones(conn)
+        
         print("✅ Sistema configurado completamente!")
         print("\n" + "="*60)
         print("🔑 CREDENCIALES DE ACCESO:")
@@ -1,19 +1,17 @@
-import sqlite3
 import hashlib
 
+from db_config import conectar_sqlite
+from migraciones import aplicar_migraciones
+
 def setup_enhanced_users():
     """Configurar usuarios con roles específicos"""
     
-    conn = sqlite3.connect('paris_style.db')
+    conn = conectar_sqlite()
     cursor = conn.cursor()
     
     try:
         # Agregar columnas si no existen
-        try:
-            cursor.execute("ALTER TABLE usuarios ADD COLUMN es_estilista BOOLEAN DEFAULT FALSE")
-            cursor.execute("ALTER TABLE usuarios ADD COLUMN estilista_id INTEGER")
-        except:
-            pass  # Las columnas ya existen
+        aplicar_migraciones(conn)
         
         # Limpiar usuarios existentes
         cursor.execute("DELETE FROM usuarios")